@@ -2,8 +2,8 @@ import typer
 import sys
 import atexit
 from pathlib import Path
-from typing import Optional
-from sortomatic.core import database
+from typing import List, Optional
+from sortomatic.core import database, quarantine
 from sortomatic.core.config import settings
 from sortomatic.core.pipeline.manager import PipelineManager
 from sortomatic.l8n import Strings
@@ -41,6 +41,8 @@ def main(
     ctx: typer.Context,
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Show DEBUG logs"),
     threads: Optional[int] = typer.Option(None, "--threads", "-j", help="Max threads to use"),
+    walker: Optional[str] = typer.Option(None, "--walker", help=f"Directory traversal: sequential or parallel (default: {settings.walker})"),
+    backend: Optional[List[str]] = typer.Option(None, "--backend", help="Execution backend of a pass, e.g. hash=process (repeatable)"),
     reset: bool = typer.Option(False, "--reset", help="Reset database before operation"),
     config: Optional[Path] = typer.Option(None, "--config", "-c", help="Path to config directory containing settings.yaml and filetypes.yaml"),
     cache: Optional[Path] = typer.Option(None, "--cache", help=f"Path to cache directory (default: {settings.cache_dir})")
@@ -55,7 +57,13 @@ def main(
         settings.cache_dir = cache.expanduser()
         
     if threads:
+        # Also the ceiling of the adaptive worker count
         settings.max_workers = threads
+    if walker:
+        settings.walker = walker
+    for choice in backend or []:
+        pass_name, _, kind = choice.partition("=")
+        settings.pass_backends[pass_name.strip()] = kind.strip()
     if reset:
         settings.reset_db = True
         
@@ -83,13 +91,25 @@ def scan_callback(
 @scan_app.command("all", help=Strings.SCAN_ALL_DOC)
 def scan_all(
     path: str = typer.Argument(..., help=Strings.SCAN_PATH_HELP),
+    incremental: bool = typer.Option(False, "--incremental", "-i", help=Strings.SCAN_INCREMENTAL_HELP),
+    estimate: bool = typer.Option(False, "--estimate", help=Strings.SCAN_ESTIMATE_HELP),
 ):
+    if incremental:
+        settings.incremental = True
+    if estimate:
+        settings.estimate_total = True
     _run_pipeline(path, mode="all")
 
 @scan_app.command("index", help=Strings.SCAN_INDEX_DOC)
 def scan_index(
     path: str = typer.Argument(..., help=Strings.SCAN_PATH_HELP),
+    incremental: bool = typer.Option(False, "--incremental", "-i", help=Strings.SCAN_INCREMENTAL_HELP),
+    estimate: bool = typer.Option(False, "--estimate", help=Strings.SCAN_ESTIMATE_HELP),
 ):
+    if incremental:
+        settings.incremental = True
+    if estimate:
+        settings.estimate_total = True
     _run_pipeline(path, mode="index")
 
 @scan_app.command("category", help=Strings.SCAN_CAT_DOC)
@@ -97,9 +117,51 @@ def scan_categorize():
     _run_pipeline(None, mode="category")
 
 @scan_app.command("hash", help=Strings.SCAN_HASH_DOC)
-def scan_hash():
+def scan_hash(
+    time_budget: Optional[str] = typer.Option(None, "--time-budget", "-t", help=Strings.SCAN_TIME_BUDGET_HELP),
+    order: Optional[str] = typer.Option(None, "--order", help=Strings.SCAN_HASH_ORDER_HELP),
+):
+    if time_budget:
+        settings.hash_time_budget = _parse_duration(time_budget)
+    if order:
+        settings.hash_order = order
     _run_pipeline(None, mode="hash")
 
+def _parse_duration(value: str) -> float:
+    """Seconds in '5400', '90m', '2h' or '1h30m'."""
+    import re
+    text = value.strip().lower()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)\s*([hms])", text)
+    if not parts or re.sub(r"\d+(?:\.\d+)?\s*[hms]", "", text).strip():
+        raise typer.BadParameter(f"Invalid duration: {value}")
+    units = {'h': 3600, 'm': 60, 's': 1}
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+@scan_app.command("target", help=Strings.SCAN_TARGET_DOC)
+def scan_target(column: str = typer.Argument(..., help=Strings.SCAN_TARGET_HELP)):
+    from .core.pipeline import registry
+    database.init_db(str(ensure_environment(Path.cwd())))
+    try:
+        passes = registry.plan(column)
+    except ValueError as e:
+        logger.error(str(e))
+        raise typer.Exit(1)
+    logger.info(Strings.TARGET_PLAN.format(column=column, passes=" -> ".join(spec.name for spec in passes)))
+    result = PipelineManager().run_target(column)
+    done = ", ".join(f"{name}: {count} files" for name, count in result['counts'].items()) or "nothing to do"
+    if result['skipped']:
+        logger.error(Strings.TARGET_INCOMPLETE.format(column=column, passes=", ".join(result['skipped']), counts=done))
+        raise typer.Exit(1)
+    logger.success(Strings.TARGET_DONE.format(column=column, counts=done))
+
+@scan_app.command("archives", help=Strings.SCAN_ARCHIVES_DOC)
+def scan_archives():
+    _run_pipeline(None, mode="archives")
+
 def _run_pipeline(path: Optional[str], mode: str):
     """Execute scan pipeline for specified mode."""
     import time
@@ -117,8 +179,8 @@ def _run_pipeline(path: Optional[str], mode: str):
     
     if reset and path:
         typer.confirm(Strings.WIPE_CONFIRM, abort=True)
-        database.db.drop_tables([database.FileIndex])
-        database.db.create_tables([database.FileIndex])
+        database.db.drop_tables(database.MODELS)
+        database.db.create_tables(database.MODELS)
         logger.warning(Strings.WIPE_SUCCESS)
     elif mode in ['all', 'index'] and not reset:
         existing_count = database.FileIndex.select().count()
@@ -140,8 +202,10 @@ def _run_pipeline(path: Optional[str], mode: str):
         task_desc = Strings.INDEXING_MSG
     elif mode == 'category':
         task_desc = Strings.CATEGORIZING_MSG
-    elif mode == 'hash':
+    elif mode in ('hash', 'quarantine'):
         task_desc = Strings.HASHING_MSG
+    elif mode == 'archives':
+        task_desc = Strings.ARCHIVES_MSG
     else:
         task_desc = f"Running {mode} pass..."
     
@@ -150,10 +214,16 @@ def _run_pipeline(path: Optional[str], mode: str):
     if mode == 'category':
         total = database.FileIndex.select().where(database.FileIndex.category.is_null()).count()
     elif mode == 'hash':
-        total = database.FileIndex.select().where(
-            (database.FileIndex.full_hash.is_null()) & 
-            (database.FileIndex.entry_type == 'file')
-        ).count()
+        total = manager.hash_query().count()
+    elif mode == 'quarantine':
+        total = manager.hash_query(quarantined=True).count()
+    estimated = False
+    if mode in ('all', 'index') and settings.estimate_total and not settings.incremental:
+        from .core.estimate import TreeEstimator
+        estimator = TreeEstimator(Path(path)).run(settings.estimate_seconds)
+        total = max(1, round(estimator.interval('files')[0]))
+        estimated = True
+        logger.info(Strings.ESTIMATE_TOTAL.format(count=total))
     
     with create_scan_progress(console, mode, total) as progress:
         task = progress.add_task(task_desc, total=total)
@@ -164,19 +234,25 @@ def _run_pipeline(path: Optional[str], mode: str):
         result = None
         try:
             if mode == 'all':
-                # For 'all' mode, just run index pass here
-                result = manager.run_index(path, update_progress)
+                # One stream: each file is read once for its category and hashes
+                result = manager.run_all(path, update_progress)
+                _size_bundles(manager)
             elif mode == 'index':
                  result = manager.run_index(path, update_progress)
+                 _size_bundles(manager)
             elif mode == 'category':
                  result = manager.run_categorize(update_progress)
             elif mode == 'hash':
                  result = manager.run_hash(update_progress)
+            elif mode == 'quarantine':
+                 result = manager.run_hash(update_progress, quarantined=True)
+            elif mode == 'archives':
+                 result = manager.run_archives(update_progress)
             else:
                 result = 0
             
             # For indeterminate progress, update total at end to fill the bar
-            if total is None and result:
+            if (total is None or estimated) and result:
                 count = result['count'] if isinstance(result, dict) else result
                 # This makes the bar fill to 100% and shows "X/X"
                 progress.update(task, total=count, completed=count)
@@ -219,14 +295,185 @@ def _run_pipeline(path: Optional[str], mode: str):
     summary_parts.append(f"in {humanize.naturaldelta(elapsed)}")
     
     logger.success(" ".join(summary_parts))
+    if mode in ('hash', 'quarantine'):
+        pending = manager.unverified_bytes()
+        if pending['count']:
+            logger.info(Strings.HASH_UNVERIFIED.format(
+                size=humanize.naturalsize(pending['bytes'], binary=True), count=pending['count']))
+        quarantined = len(quarantine.entries())
+        if quarantined:
+            logger.info(Strings.HASH_QUARANTINED.format(count=quarantined))
+    if isinstance(result, dict) and 'relisted_dirs' in result:
+        logger.info(Strings.INCREMENTAL_SUMMARY.format(**result))
     
-    # For 'all' mode, continue with categorize and hash passes
     if mode == 'all':
-        _run_pipeline(None, mode='category')
-        _run_pipeline(None, mode='hash')
+        # Incremental walks skip unchanged directories: finish the rows an
+        # interrupted scan left there from the database
+        if settings.incremental:
+            if database.FileIndex.select().where(database.FileIndex.category.is_null()).exists():
+                _run_pipeline(None, mode='category')
+            if manager.hash_query().exists():
+                _run_pipeline(None, mode='hash')
+        if settings.index_archives:
+            _run_pipeline(None, mode='archives')
+
+@app.command(help=Strings.ESTIMATE_DOC)
+def estimate(
+    path: str = typer.Argument(..., help=Strings.SCAN_PATH_HELP),
+    seconds: Optional[float] = typer.Option(None, "--seconds", "-s", help=Strings.ESTIMATE_SECONDS_HELP),
+):
+    """
+    Estimate file count, size, category mix and hash time without a full walk.
+    """
+    import humanize
+    from rich.table import Table
+    from .core.estimate import estimate_tree
+
+    if not Path(path).is_dir():
+        logger.error(Strings.PATH_NOT_FOUND.format(path=path))
+        raise typer.Exit(1)
+
+    result = estimate_tree(Path(path), seconds or settings.estimate_seconds)
+
+    def count(value):
+        return humanize.intcomma(round(value)) if value != float("inf") else "?"
+
+    def size(value):
+        return humanize.naturalsize(value, binary=True) if value != float("inf") else "?"
+
+    table = Table(title=Strings.ESTIMATE_TITLE)
+    table.add_column(Strings.ESTIMATE_METRIC_LABEL, style="cyan")
+    table.add_column(Strings.ESTIMATE_VALUE_LABEL, justify="right", style="magenta")
+    table.add_column(Strings.ESTIMATE_RANGE_LABEL, justify="right", style="dim")
+    for key, label, fmt in (('files', Strings.ESTIMATE_FILES, count), ('bytes', Strings.ESTIMATE_BYTES, size),
+                            ('dirs', Strings.ESTIMATE_DIRS, count), ('bundles', Strings.ESTIMATE_BUNDLES, count)):
+        value, low, high = result[key]
+        table.add_row(label, fmt(value), f"{fmt(low)} - {fmt(high)}")
+    if result['hash_seconds']:
+        value, low, high = result['hash_seconds']
+        table.add_row(Strings.ESTIMATE_HASH_TIME, humanize.naturaldelta(value),
+                      f"{humanize.naturaldelta(low)} - {humanize.naturaldelta(high) if high != float('inf') else '?'}")
+    console.print(table)
+
+    categories = Table(title=Strings.ESTIMATE_CATEGORIES_TITLE)
+    categories.add_column(Strings.CATEGORY_LABEL, style="cyan")
+    categories.add_column(Strings.ESTIMATE_FILES, justify="right", style="magenta")
+    categories.add_column(Strings.SIZE_LABEL, justify="right")
+    categories.add_column(Strings.ESTIMATE_SHARE_LABEL, justify="right", style="dim")
+    for name, row in result['categories'].items():
+        categories.add_row(name, count(row['files']), size(row['bytes']), f"{row['share']:.1%}")
+    console.print(categories)
+
+    files = result['files']
+    if files[1] == files[2]:
+        logger.info(Strings.ESTIMATE_EXACT)
+    else:
+        logger.info(Strings.ESTIMATE_SUMMARY.format(probes=result['probes'], listed=result['listed_dirs']))
+
+@app.command(help=Strings.WATCH_DOC)
+def watch(
+    path: str = typer.Argument(..., help=Strings.SCAN_PATH_HELP),
+):
+    """
+    Watch a folder and keep its index current.
+    """
+    from .core.watcher import Watcher
+
+    db_path = ensure_environment(Path(path))
+    database.init_db(str(db_path))
+
+    watcher = Watcher(Path(path))
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+        logger.info(Strings.WATCH_STOPPED)
+
+def _size_bundles(manager: PipelineManager):
+    """Measure atomic folders right after indexing so sizes and stats include them."""
+    sized = manager.run_bundle_sizes()
+    if sized:
+        logger.info(Strings.BUNDLES_SIZED.format(count=sized))
+
+@app.command("quarantine", help=Strings.QUARANTINE_DOC)
+def quarantine_command(
+    path: Optional[str] = typer.Argument(None),
+    retry: bool = typer.Option(False, "--retry", help=Strings.QUARANTINE_RETRY_HELP),
+):
+    """
+    List (or retry) the files the hash pass gave up on.
+    """
+    if retry:
+        _run_pipeline(path, mode="quarantine")
+        return
+
+    base_path = Path(path) if path else Path.cwd()
+    db_path = base_path / DATA_FOLDER_NAME / DB_NAME
+    if not db_path.exists():
+        logger.error(f"No database found at {db_path}")
+        raise typer.Exit(1)
+    database.init_db(str(db_path))
+
+    entries = quarantine.entries()
+    if not entries:
+        logger.info(Strings.QUARANTINE_EMPTY)
+        return
+
+    import humanize
+    from rich.table import Table
+    table = Table(title=Strings.QUARANTINE_TITLE)
+    table.add_column(Strings.DUPLICATES_FILE_LABEL, style="cyan", overflow="fold")
+    table.add_column(Strings.SIZE_LABEL, justify="right")
+    table.add_column(Strings.ERROR_LABEL, style="red")
+    table.add_column(Strings.ATTEMPTS_LABEL, justify="right", style="magenta")
+    table.add_column(Strings.LAST_ATTEMPT_LABEL)
+    table.add_column(Strings.RETRY_AFTER_LABEL)
+    for entry in entries:
+        table.add_row(
+            entry.path,
+            humanize.naturalsize(entry.size_bytes, binary=True),
+            entry.error,
+            str(entry.attempts),
+            humanize.naturaltime(entry.last_attempt),
+            humanize.naturaltime(entry.retry_after),
+        )
+    console.print(table)
+
+@app.command(help=Strings.MERGE_DOC)
+def merge(
+    catalog_path: str = typer.Argument(..., metavar="CATALOG", help=Strings.MERGE_CATALOG_HELP),
+    sources: List[str] = typer.Argument(..., help=Strings.MERGE_SOURCES_HELP),
+):
+    """
+    Merge per-folder databases into a catalog database.
+    """
+    from .core import catalog
+
+    volumes = []
+    for source in sources:
+        name, _, location = source.rpartition("=")
+        location = Path(location)
+        db_path = location / DATA_FOLDER_NAME / DB_NAME if location.is_dir() else location
+        if not db_path.is_file():
+            logger.error(Strings.MERGE_SOURCE_MISSING.format(source=source))
+            raise typer.Exit(1)
+        if not name:
+            # The scanned folder the database belongs to
+            root = db_path.parent.parent if db_path.parent.name == DATA_FOLDER_NAME else db_path
+            name = str(root.resolve())
+        volumes.append((name, str(db_path)))
+
+    database.init_db(catalog_path)
+    catalog.merge(volumes)
+    files = database.CatalogFile.select().count()
+    logger.success(Strings.MERGE_SUMMARY.format(catalog=catalog_path, volumes=database.Volume.select().count(), files=files))
 
 @app.command(help=Strings.STATS_DOC)
-def stats(path: Optional[str] = typer.Argument(None)):
+def stats(
+    path: Optional[str] = typer.Argument(None),
+    duplicates: bool = typer.Option(False, "--duplicates", help=Strings.STATS_DUPLICATES_HELP),
+    runs: bool = typer.Option(False, "--runs", help=Strings.STATS_RUNS_HELP),
+):
     """
     Show insights about your files.
     """
@@ -238,6 +485,13 @@ def stats(path: Optional[str] = typer.Argument(None)):
         raise typer.Exit(1)
         
     database.init_db(str(db_path))
+
+    if duplicates:
+        _print_duplicates()
+        return
+    if runs:
+        _print_runs()
+        return
     
     from peewee import fn
     
@@ -260,6 +514,121 @@ def stats(path: Optional[str] = typer.Argument(None)):
         
     console.print(table)
 
+def _print_runs(limit: int = 30):
+    """Print the last scan passes, their speed and how it compares with the runs before."""
+    import humanize
+    from rich.table import Table
+    from .core.pipeline.history import recent_runs
+
+    runs = recent_runs(limit)
+    if not runs:
+        logger.info(Strings.RUNS_EMPTY)
+        return
+
+    table = Table(title=Strings.RUNS_TITLE)
+    table.add_column(Strings.STARTED_LABEL, style="dim")
+    table.add_column(Strings.PASS_LABEL, style="cyan")
+    table.add_column(Strings.STATE_LABEL)
+    table.add_column(Strings.FILES_LABEL, justify="right", style="magenta")
+    table.add_column(Strings.SIZE_LABEL, justify="right")
+    table.add_column(Strings.DURATION_LABEL, justify="right")
+    table.add_column(Strings.FILES_RATE_LABEL, justify="right")
+    table.add_column(Strings.MB_RATE_LABEL, justify="right")
+    table.add_column(Strings.TREND_LABEL, justify="right")
+    table.add_column(Strings.ERRORS_LABEL, justify="right")
+    table.add_column(Strings.WORKERS_LABEL, justify="right")
+    table.add_column(Strings.THROUGHPUT_LABEL)
+    table.add_column(Strings.VERSION_LABEL, style="dim")
+
+    for entry in runs:
+        run = entry['run']
+        change = entry['change']
+        if change is None:
+            trend = ""
+        else:
+            # Slower than usual is what matters (a slow NAS, a regression)
+            color = "red" if change < -0.2 else "green" if change > 0.2 else "white"
+            trend = f"[{color}]{change:+.0%}[/{color}]"
+        table.add_row(
+            run.started_at.strftime("%Y-%m-%d %H:%M"),
+            run.pass_name,
+            run.state,
+            str(run.files),
+            humanize.naturalsize(run.bytes, binary=True),
+            humanize.naturaldelta(entry['duration']),
+            f"{run.files_per_second:.1f}",
+            f"{run.mb_per_second:.1f}",
+            trend,
+            f"{run.errors} ({run.timeouts})" if run.errors else "0",
+            str(run.workers or ""),
+            _sparkline(entry['samples']),
+            run.version or "",
+        )
+    console.print(table)
+
+def _sparkline(samples: List[int], width: int = 20) -> str:
+    """Throughput over the run as block characters, scaled to its own peak."""
+    if not samples:
+        return ""
+    step = max(1, -(-len(samples) // width))
+    points = [sum(samples[i:i + step]) / len(samples[i:i + step]) for i in range(0, len(samples), step)]
+    peak = max(points) or 1
+    blocks = "▁▂▃▄▅▆▇█"
+    return "".join(blocks[min(len(blocks) - 1, int(p / peak * len(blocks)))] for p in points)
+
+def _print_duplicates(limit: int = 50):
+    """Print the duplicate groups with the most reclaimable space, hard links included."""
+    import humanize
+    from rich.table import Table
+    from .core.pipeline.passes.duplicates import duplicate_groups, member_duplicate_groups
+
+    groups = sorted(duplicate_groups(), key=lambda g: g['reclaimable_bytes'], reverse=True)
+
+    table = Table(title=Strings.DUPLICATES_TITLE)
+    table.add_column(Strings.DUPLICATES_FILE_LABEL, style="cyan", overflow="fold")
+    table.add_column(Strings.COUNT_LABEL, justify="right", style="magenta")
+    table.add_column(Strings.SIZE_LABEL, justify="right")
+    table.add_column(Strings.RECLAIMABLE_LABEL, justify="right", style="green")
+    table.add_column(Strings.NOTE_LABEL, style="dim")
+
+    for group in groups[:limit]:
+        if group['already_deduplicated']:
+            note = Strings.ALREADY_DEDUPLICATED
+        elif group['hardlinks']:
+            note = Strings.HARDLINKS_NOTE.format(count=group['hardlinks'])
+        else:
+            note = ""
+        table.add_row(
+            group['files'][0]['path'],
+            str(len(group['files'])),
+            humanize.naturalsize(group['size_bytes'], binary=True),
+            humanize.naturalsize(group['reclaimable_bytes'], binary=True),
+            note,
+        )
+
+    console.print(table)
+    total = sum(g['reclaimable_bytes'] for g in groups)
+    logger.info(Strings.DUPLICATES_SUMMARY.format(groups=len(groups), size=humanize.naturalsize(total, binary=True)))
+
+    members = sorted(member_duplicate_groups(), key=lambda g: g['reclaimable_bytes'], reverse=True)
+    if not members:
+        return
+    table = Table(title=Strings.MEMBER_DUPLICATES_TITLE)
+    table.add_column(Strings.DUPLICATES_FILE_LABEL, style="cyan", overflow="fold")
+    table.add_column(Strings.COUNT_LABEL, justify="right", style="magenta")
+    table.add_column(Strings.SIZE_LABEL, justify="right")
+    table.add_column(Strings.RECLAIMABLE_LABEL, justify="right", style="green")
+    for group in members[:limit]:
+        first = group['members'][0]
+        table.add_row(
+            f"{first['archive']} :: {first['member']}",
+            str(len(group['members'])),
+            humanize.naturalsize(group['size_bytes'], binary=True),
+            humanize.naturalsize(group['reclaimable_bytes'], binary=True),
+        )
+    console.print(table)
+    logger.info(Strings.MEMBER_DUPLICATES_SUMMARY.format(groups=len(members)))
+
 @app.command(help="Wipe the local database.")
 def reset(path: Optional[str] = typer.Argument(None)):
     """
@@ -271,8 +640,8 @@ def reset(path: Optional[str] = typer.Argument(None)):
     database.init_db(str(db_path))
     
     typer.confirm(Strings.WIPE_CONFIRM, abort=True)
-    database.db.drop_tables([database.FileIndex])
-    database.db.create_tables([database.FileIndex])
+    database.db.drop_tables(database.MODELS)
+    database.db.create_tables(database.MODELS)
     logger.warning(Strings.WIPE_SUCCESS)
 
 @app.command()
@@ -281,7 +650,8 @@ def gui(
     port: int = typer.Option(None, help=f"Port to run the GUI on (default: {settings.gui_port})"),
     theme: str = typer.Option(None, help=f"Theme name (default: {settings.gui_theme})"),
     dark: bool = typer.Option(None, "--dark/--light", help=f"Enable/Disable dark mode (default: {settings.gui_dark_mode})"),
-    cache: Optional[Path] = typer.Option(None, help="Override cache directory")
+    cache: Optional[Path] = typer.Option(None, help="Override cache directory"),
+    watch: bool = typer.Option(False, "--watch", help=Strings.WATCH_HELP)
 ):
     """Launch the Web Interface."""
     from .ui.main import start_app
@@ -298,7 +668,7 @@ def gui(
     db_path = ensure_environment(base_path)
     database.init_db(str(db_path))
     
-    start_app(final_port, final_theme, final_dark, path)
+    start_app(final_port, final_theme, final_dark, path, watch=watch)
 
 if __name__ in {"__main__", "__mp_main__"}:
     try:
@@ -0,0 +1,97 @@
+"""Catalogs: the indexes of many scan roots merged into one database."""
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from peewee import EXCLUDED, SQL, Expression, Table, Value, fn
+from .config import settings
+from .database import CATALOG_MODELS, CatalogFile, Volume, db
+from ..utils.logger import logger
+
+# Schema name the source database is attached under
+SOURCE_SCHEMA = "merge_source"
+
+# FileIndex columns copied into the catalog
+COLUMNS = ('path', 'filename', 'extension', 'entry_type', 'size_bytes', 'modified_at', 'device', 'inode',
+           'category', 'mime_type', 'fast_hash', 'full_hash', 'perceptual_hash')
+# Columns identifying a row within its volume
+KEY = ('path', 'modified_at')
+
+def merge(sources: Iterable[Tuple[str, str]], chunk_rows: Optional[int] = None) -> List[Dict]:
+    """
+    Merges each (volume name, database file) of sources into the catalog
+    (the database db is bound to). See merge_volume.
+    """
+    db.create_tables(CATALOG_MODELS)
+    return [merge_volume(name, path, chunk_rows) for name, path in sources]
+
+def merge_volume(name: str, path: str, chunk_rows: Optional[int] = None) -> Dict:
+    """
+    Streams the FileIndex of the database at path into the catalog as
+    volume `name`.
+
+    The source is ATTACHed to the catalog connection and copied with
+    INSERT ... SELECT over ranges of settings.merge_chunk_rows source ids,
+    one transaction each, so rows never go through Python and the catalog
+    WAL stays bounded. A row already merged (same volume, path and mtime)
+    only takes the results computed since (category, hashes); a file that
+    changed gets a new row and the rows the source no longer has are
+    removed, so the volume mirrors the source after every merge.
+
+    Returns the rows the volume now has, and how many were added or updated and removed.
+    """
+    chunk_rows = max(1, chunk_rows or settings.merge_chunk_rows)
+    db.execute_sql(f'ATTACH DATABASE ? AS "{SOURCE_SCHEMA}"', (os.fspath(path),))
+    try:
+        source = Table('fileindex', schema=SOURCE_SCHEMA).bind(db)
+        available = {column.name for column in db.get_columns('fileindex', schema=SOURCE_SCHEMA)}
+        volume, _ = Volume.get_or_create(name=name, defaults={'source': os.fspath(path)})
+
+        # Older databases lack some columns: they are merged as NULL
+        selected = [Value(volume.id)] + [getattr(source.c, column) if column in available else Value(None)
+                                         for column in COLUMNS]
+        fields = [CatalogFile.volume] + [getattr(CatalogFile, column) for column in COLUMNS]
+        results = [column for column in COLUMNS if column not in KEY]
+        changed = None
+        for column in results:
+            clause = Expression(getattr(CatalogFile, column), 'IS NOT', getattr(EXCLUDED, column))
+            changed = clause if changed is None else (changed | clause)
+
+        merged = 0
+        last_id = source.select(fn.MAX(source.c.id)).scalar() or 0
+        for low in range(0, last_id, chunk_rows):
+            rows = source.select(*selected).where((source.c.id > low) & (source.c.id <= low + chunk_rows))
+            with db.atomic():
+                merged += (CatalogFile
+                           .insert_from(rows, fields)
+                           .on_conflict(conflict_target=[CatalogFile.volume, CatalogFile.path, CatalogFile.modified_at],
+                                        preserve=[getattr(CatalogFile, column) for column in results],
+                                        where=changed)
+                           .as_rowcount()
+                           .execute())
+
+        # Rows of files deleted or changed on the volume since the last merge
+        gone = ~fn.EXISTS(source.select(SQL('1')).where(
+            (source.c.path == CatalogFile.path) & (source.c.modified_at == CatalogFile.modified_at)))
+        first, last = (CatalogFile
+                       .select(fn.MIN(CatalogFile.id), fn.MAX(CatalogFile.id))
+                       .where(CatalogFile.volume == volume)
+                       .scalar(as_tuple=True))
+        removed = 0
+        for low in range((first or 1) - 1, last or 0, chunk_rows):
+            with db.atomic():
+                removed += (CatalogFile
+                            .delete()
+                            .where((CatalogFile.volume == volume) &
+                                   (CatalogFile.id > low) & (CatalogFile.id <= low + chunk_rows) &
+                                   gone)
+                            .execute())
+
+        volume.source = os.fspath(path)
+        volume.files = CatalogFile.select().where(CatalogFile.volume == volume).count()
+        volume.merged_at = datetime.now()
+        volume.save()
+    finally:
+        db.execute_sql(f'DETACH DATABASE "{SOURCE_SCHEMA}"')
+
+    logger.info(f"Merged {name}: {volume.files} rows ({merged} added or updated, {removed} removed)")
+    return {'volume': name, 'files': volume.files, 'merged': merged, 'removed': removed}
@@ -0,0 +1,87 @@
+"""Resumable index walks: the walk frontier is checkpointed to the database."""
+import os
+from pathlib import Path
+from typing import Generator, List, Optional
+from .config import settings
+from .database import WalkFrontier, db
+from .ignore import compile_ignore
+from .scanner import scan_directory
+from .types import WalkEntry
+from ..utils.logger import logger
+
+class ResumableWalk:
+    """
+    Depth-first walk equivalent to smart_walk whose position can be saved.
+
+    checkpoint() must only be called once every record yielded so far has
+    been written to the database (the pipeline drains its in-flight work
+    first). It stores the directories still on the stack, plus the one
+    currently being yielded. A later walk of the same root starts from that
+    frontier instead of from the root.
+
+    Nothing else needs saving: a directory's sub-directories are only
+    pushed once all its records are yielded, so a directory that left the
+    stack never comes back to it, and the checkpoint stays the size of
+    the stack (depth times fan-out), not of the tree.
+    """
+    def __init__(self, root: Path):
+        self.root = os.fspath(root)
+        self.resumed = False
+        self._stack: List[str] = []
+        self._current: Optional[str] = None
+
+    def load(self) -> int:
+        """Restores a saved frontier for this root. Returns the number of pending directories."""
+        self._stack = [row.path for row in (WalkFrontier.select(WalkFrontier.path)
+                                            .where(WalkFrontier.root == self.root)
+                                            .order_by(WalkFrontier.seq))]
+        self.resumed = bool(self._stack)
+        if self.resumed:
+            logger.info(f"Resuming index of {self.root}: {len(self._stack)} directories left")
+        else:
+            self._stack = [self.root]
+        return len(self._stack)
+
+    def walk(self) -> Generator[WalkEntry, None, None]:
+        if not self._stack and not self.resumed:
+            self.load()
+        atomic_markers = set(settings.atomic_markers)
+        ignore = compile_ignore(settings.ignore_patterns)
+
+        while self._stack:
+            dirpath = self._stack.pop()
+            self._current = dirpath
+            records, subdirs = scan_directory(dirpath, atomic_markers, ignore)
+            yield from records
+            # Reversed so siblings are visited in listing order
+            self._stack.extend(reversed(subdirs))
+            self._current = None
+
+    def checkpoint(self):
+        """
+        Snapshots the frontier and returns the function that saves it.
+        Call only when every yielded record is flushed (or queued ahead of
+        the returned function on the same writer).
+        """
+        pending = list(self._stack)
+        if self._current is not None:
+            # Partly yielded: listed again on resume (the upsert makes repeats harmless)
+            pending.append(self._current)
+        return lambda: self._save(pending)
+
+    def _save(self, pending: List[str]):
+        with db.atomic():
+            WalkFrontier.delete().where(WalkFrontier.root == self.root).execute()
+            rows = [{'root': self.root, 'path': path, 'seq': seq} for seq, path in enumerate(pending)]
+            for start in range(0, len(rows), 500):
+                (WalkFrontier.insert_many(rows[start:start + 500])
+                 .on_conflict_replace()
+                 .execute())
+        logger.debug(f"Checkpoint: {len(pending)} directories pending")
+
+    def finish(self):
+        """The walk completed: its checkpoint is no longer needed."""
+        WalkFrontier.delete().where(WalkFrontier.root == self.root).execute()
+
+def has_checkpoint(root) -> bool:
+    return WalkFrontier.select().where(WalkFrontier.root == os.fspath(root)).exists()
@@ -27,6 +27,14 @@ class Settings:
         self.ignore_patterns: List[str] = [".git", "__pycache__", ".DS_Store", "node_modules", ".venv", ".sortomatic"]
         self.atomic_markers: List[str] = [".git", ".hg", "Makefile", "package.json", "requirements.txt", "venv"]
         self.batch_size: int = 1000
+        self.chunked_submission: bool = True        # Group small items into one executor task
+        self.chunk_target_ms: float = 20.0          # Wall time one chunk aims for
+        self.max_chunk_size: int = 512              # Items per chunk at most
+        self.writer_batch_rows: int = 5000          # Rows coalesced into one write transaction
+        self.writer_max_delay: float = 0.5          # Seconds a write waits for more rows to join its transaction
+        self.writer_queue_rows: int = 50000         # Rows queued for the writer before producers block
+        self.db_page_rows: int = 2000               # Rows a database pass reads per query (keyset pages)
+        self.merge_chunk_rows: int = 50000          # Source rows copied per transaction by merge
         self.reset_db: bool = False
         
         # New: Externalized magic numbers
@@ -34,9 +42,45 @@ class Settings:
         self.fast_hash_size: int = 4 * 1024        # 4KB
         self.categorization_timeout: float = 1.0    # 1 second
         self.hashing_timeout: float = 60.0          # 60 seconds (generous for large files)
+        self.hash_order: str = "index"              # 'index' or 'reclaim' (likely duplicates, largest first)
+        self.hash_time_budget: float = None          # Seconds the hash pass may run; None means no limit
+        self.quarantine_backoff: float = 3600.0     # Seconds before a file that failed to hash is retried (doubles per failure)
+        self.quarantine_max_backoff: float = 30 * 86400.0  # Longest wait between two retries
         
         cpu_count = os.cpu_count() or 4
         self.max_workers = max(1, cpu_count // 2)
+        self.adaptive_concurrency: bool = True       # Resize the active workers during a pass (at most max_workers)
+        self.concurrency_interval: float = 1.0       # Seconds between two resize decisions
+        self.iowait_threshold: float = 0.25          # iowait share above which workers are only queueing on the disk
+
+        # Execution backend per pass: 'thread' or 'process' (CPU-bound work: image decoding, fingerprints)
+        self.pass_backends: Dict[str, str] = {'categorize': 'thread', 'hash': 'thread'}
+        self.process_workers: int = None             # None means os.cpu_count()
+        self.process_batch_size: int = 16           # Items sent to a worker process at once
+
+        # Traversal: 'sequential' or 'parallel' (threads listing directories concurrently)
+        self.walker: str = "sequential"
+        self.walk_workers: int = None               # None means max_workers
+        self.incremental: bool = False               # Only re-list directories changed since the last scan
+        self.checkpoint_interval: float = 30.0       # Seconds between walk checkpoints (0 disables resuming)
+        self.estimate_total: bool = False            # Estimate the file count first for a determinate index progress bar
+        self.estimate_seconds: float = 5.0           # Time budget of an estimate
+
+        # Per-device I/O scheduling for the categorize and hash passes
+        self.io_scheduling: bool = True
+        self.hdd_readers: int = 2                   # Concurrent readers on a spinning disk
+        self.ssd_readers: int = 8                   # ... on a SATA/SAS SSD
+        self.nvme_readers: int = 32                 # ... on an NVMe drive (network fs, loop and VM disks use max_workers)
+
+        # Archive members (zip, jar, tar...)
+        self.index_archives: bool = False            # List archive members during 'scan all'
+        self.archive_memory_limit: int = 16 * 1024 * 1024  # Bytes of member metadata kept per archive
+
+        # Watch mode
+        self.watch_debounce: float = 1.0            # Seconds of quiet before a batch of changes is processed
+        self.watch_max_delay: float = 10.0          # Max seconds a change waits during an event storm
+        self.watch_batch_size: int = 5000           # Pending paths that force a batch
+        self.watch_rescan_interval: float = 300.0   # Fallback rescan period when inotify can't be used
 
         # GUI Settings
         self.gui_port: int = 8080
@@ -82,12 +126,48 @@ class Settings:
                 data = yaml.safe_load(f) or {}
                 if data.get("max_workers") is not None:
                     self.max_workers = data["max_workers"]
+                self.adaptive_concurrency = data.get("adaptive_concurrency", self.adaptive_concurrency)
+                self.concurrency_interval = data.get("concurrency_interval", self.concurrency_interval)
+                self.iowait_threshold = data.get("iowait_threshold", self.iowait_threshold)
                 self.batch_size = data.get("batch_size", self.batch_size)
+                self.chunked_submission = data.get("chunked_submission", self.chunked_submission)
+                self.chunk_target_ms = data.get("chunk_target_ms", self.chunk_target_ms)
+                self.max_chunk_size = data.get("max_chunk_size", self.max_chunk_size)
+                self.writer_batch_rows = data.get("writer_batch_rows", self.writer_batch_rows)
+                self.writer_max_delay = data.get("writer_max_delay", self.writer_max_delay)
+                self.writer_queue_rows = data.get("writer_queue_rows", self.writer_queue_rows)
+                self.db_page_rows = data.get("db_page_rows", self.db_page_rows)
+                self.merge_chunk_rows = data.get("merge_chunk_rows", self.merge_chunk_rows)
                 self.reset_db = data.get("reset_db", self.reset_db)
                 self.hashing_chunk_size = data.get("hashing_chunk_size", self.hashing_chunk_size)
                 self.fast_hash_size = data.get("fast_hash_size", self.fast_hash_size)
                 self.categorization_timeout = data.get("categorization_timeout", self.categorization_timeout)
                 self.hashing_timeout = data.get("hashing_timeout", self.hashing_timeout)
+                self.hash_order = data.get("hash_order", self.hash_order)
+                self.hash_time_budget = data.get("hash_time_budget", self.hash_time_budget)
+                self.quarantine_backoff = data.get("quarantine_backoff", self.quarantine_backoff)
+                self.quarantine_max_backoff = data.get("quarantine_max_backoff", self.quarantine_max_backoff)
+                self.walker = data.get("walker", self.walker)
+                self.incremental = data.get("incremental", self.incremental)
+                self.checkpoint_interval = data.get("checkpoint_interval", self.checkpoint_interval)
+                self.estimate_total = data.get("estimate_total", self.estimate_total)
+                self.estimate_seconds = data.get("estimate_seconds", self.estimate_seconds)
+                self.io_scheduling = data.get("io_scheduling", self.io_scheduling)
+                self.hdd_readers = data.get("hdd_readers", self.hdd_readers)
+                self.ssd_readers = data.get("ssd_readers", self.ssd_readers)
+                self.nvme_readers = data.get("nvme_readers", self.nvme_readers)
+                self.index_archives = data.get("index_archives", self.index_archives)
+                self.archive_memory_limit = data.get("archive_memory_limit", self.archive_memory_limit)
+                self.watch_debounce = data.get("watch_debounce", self.watch_debounce)
+                self.watch_max_delay = data.get("watch_max_delay", self.watch_max_delay)
+                self.watch_batch_size = data.get("watch_batch_size", self.watch_batch_size)
+                self.watch_rescan_interval = data.get("watch_rescan_interval", self.watch_rescan_interval)
+                self.pass_backends.update(data.get("pass_backends") or {})
+                if data.get("process_workers") is not None:
+                    self.process_workers = data["process_workers"]
+                self.process_batch_size = data.get("process_batch_size", self.process_batch_size)
+                if data.get("walk_workers") is not None:
+                    self.walk_workers = data["walk_workers"]
                 self.gui_port = data.get("gui_port", self.gui_port)
                 self.gui_theme = data.get("gui_theme", self.gui_theme)
                 self.gui_dark_mode = data.get("gui_dark_mode", self.gui_dark_mode)
@@ -1,3 +1,4 @@
+import os
 from peewee import *
 from peewee import fn
 from datetime import datetime
@@ -15,12 +16,26 @@ class BaseModel(Model):
 class FileIndex(BaseModel):
     path = CharField(unique=True, index=True, max_length=1024)
     filename = CharField(index=True)
+    parent = CharField(null=True, index=True, max_length=1024)  # Containing directory
     extension = CharField(null=True)
-    size_bytes = IntegerField()
+    size_bytes = IntegerField(index=True)  # Indexed: duplicate candidates share a size
     modified_at = DateTimeField()
     
+    # Filesystem identity: paths sharing (device, inode) are hard links of the same data
+    device = IntegerField(null=True)
+    inode = IntegerField(null=True)
+    
     # New Field: 'file' or 'bundle' (for atomic folders)
     entry_type = CharField(default='file', index=True) 
+
+    # Bundles only: real content size (mirrored into size_bytes), and the
+    # digest of their directory mtimes the numbers were computed for
+    bundle_bytes = IntegerField(null=True)
+    bundle_files = IntegerField(null=True)
+    bundle_signature = CharField(null=True)
+
+    # Archives only: members listed into ArchiveMember (None: not listed yet)
+    archive_members = IntegerField(null=True)
     
     # Analysis
     category = CharField(null=True, index=True)
@@ -29,7 +44,7 @@ class FileIndex(BaseModel):
     # Hashing
     fast_hash = CharField(null=True, index=True) # e.g. MD5 partial
     full_hash = CharField(null=True, index=True) # e.g. SHA-256
-    perceptual_hash = CharField(null=True)       # For images
+    perceptual_hash = CharField(null=True)       # For images ('' when it could not be decoded)
     
     is_duplicate = BooleanField(default=False)
     group_id = CharField(null=True, index=True)  # To group duplicates together
@@ -37,6 +52,167 @@ class FileIndex(BaseModel):
     # For the "War Room" (Review phase)
     action_pending = CharField(null=True) # e.g., 'KEEP', 'IGNORE', 'MERGE'
 
+    class Meta:
+        indexes = (
+            (('device', 'inode'), False),
+        )
+
+class DirSnapshot(BaseModel):
+    """
+    State of a directory when it was last listed.
+    Used by incremental rescans to skip directories whose mtime did not change.
+    """
+    path = CharField(unique=True, index=True, max_length=1024)
+    parent = CharField(null=True, index=True, max_length=1024)
+    mtime_ns = IntegerField()
+    inode = IntegerField()
+    device = IntegerField()
+    is_bundle = BooleanField(default=False)
+
+class WalkFrontier(BaseModel):
+    """
+    Checkpoint of an interrupted index pass: the directories still to list,
+    in stack order (by seq). Rows for a root are removed once its walk completes.
+    """
+    root = CharField(index=True, max_length=1024)
+    path = CharField(max_length=1024)
+    seq = IntegerField(default=0)
+
+    class Meta:
+        indexes = (
+            (('root', 'path'), True),
+        )
+
+class ArchiveMember(BaseModel):
+    """
+    A file stored inside an indexed archive (zip, jar, tar...), read from
+    the container's directory or headers without extracting anything.
+    crc32 is the checksum the container records (zip only).
+    """
+    archive = CharField(index=True, max_length=1024)  # FileIndex.path of the archive
+    member = CharField(max_length=1024)
+    size_bytes = IntegerField()
+    compressed_bytes = IntegerField(null=True)
+    crc32 = IntegerField(null=True)
+    modified_at = DateTimeField(null=True)
+
+    class Meta:
+        indexes = (
+            (('archive', 'member'), True),
+            (('size_bytes', 'crc32'), False),
+        )
+
+class HashFailure(BaseModel):
+    """
+    Quarantine of files that could not be hashed (read error or timeout).
+    The hash pass skips them until retry_after, which doubles with every
+    failed attempt; a change of size or mtime, or a successful hash, ends
+    the quarantine.
+    """
+    path = CharField(unique=True, index=True, max_length=1024)  # FileIndex.path
+    size_bytes = IntegerField()
+    modified_at = DateTimeField()
+    error = CharField()  # Exception class, or 'Timeout'
+    attempts = IntegerField(default=1)
+    last_attempt = DateTimeField()
+    retry_after = DateTimeField(index=True)
+
+class ScanRun(BaseModel):
+    """
+    One pass of a scan and how fast it went (see pipeline.history.RunRecorder).
+    samples holds the files completed per sample_seconds interval, as JSON.
+    """
+    pass_name = CharField(index=True)
+    root = CharField(null=True, max_length=1024)
+    version = CharField(null=True)  # Sortomatic version that ran the pass
+    state = CharField()  # 'completed', 'cancelled' or 'failed'
+    started_at = DateTimeField(index=True)
+    ended_at = DateTimeField()
+    files = IntegerField(default=0)
+    bytes = IntegerField(default=0)
+    errors = IntegerField(default=0)
+    timeouts = IntegerField(default=0)
+    files_per_second = FloatField(default=0.0)
+    mb_per_second = FloatField(default=0.0)
+    workers = IntegerField(null=True)  # Most workers busy at once during the pass
+    sample_seconds = FloatField(default=1.0)
+    samples = TextField(null=True)
+
+# Every table owned by Sortomatic (created on init, dropped on reset)
+MODELS = [FileIndex, DirSnapshot, WalkFrontier, ArchiveMember, HashFailure, ScanRun]
+
+class Volume(BaseModel):
+    """A scan root whose index was merged into this catalog (see catalog.merge)."""
+    name = CharField(unique=True, max_length=1024)
+    source = CharField(max_length=1024)  # Database file it was last merged from
+    files = IntegerField(default=0)
+    merged_at = DateTimeField(null=True)
+
+class CatalogFile(BaseModel):
+    """
+    A FileIndex row of a merged volume. A row is identified by its volume,
+    path and mtime: merging again only adds what changed since.
+    """
+    volume = ForeignKeyField(Volume, backref='catalog_files', on_delete='CASCADE')
+    path = CharField(max_length=1024)
+    filename = CharField()
+    extension = CharField(null=True)
+    entry_type = CharField(default='file')
+    size_bytes = IntegerField(index=True)
+    modified_at = DateTimeField()
+    device = IntegerField(null=True)
+    inode = IntegerField(null=True)
+    category = CharField(null=True, index=True)
+    mime_type = CharField(null=True)
+    fast_hash = CharField(null=True)
+    full_hash = CharField(null=True, index=True)
+    perceptual_hash = CharField(null=True)
+
+    class Meta:
+        indexes = (
+            (('volume', 'path', 'modified_at'), True),
+        )
+
+# Tables of a catalog database, created by the first merge
+CATALOG_MODELS = [Volume, CatalogFile]
+
+def _migrate_columns(model):
+    """Adds nullable columns declared on the model but missing from an older database."""
+    from playhouse.migrate import SqliteMigrator, migrate
+
+    table = model._meta.table_name
+    existing = {column.name for column in db.get_columns(table)}
+    missing = [f for f in model._meta.sorted_fields if f.column_name not in existing]
+    if not missing:
+        return
+
+    migrator = SqliteMigrator(db.obj)
+    # add_column also creates the field's index
+    migrate(*[migrator.add_column(table, field.column_name, field) for field in missing])
+    logger.info(f"Database migrated: added {', '.join(f.column_name for f in missing)} to {table}")
+
+def _backfill_parents():
+    """
+    Fills FileIndex.parent for rows indexed before the column existed:
+    migration adds it empty, and incremental rescans look files up by it.
+    """
+    filled = (FileIndex
+              .update(parent=fn.dirname(FileIndex.path))
+              .where(FileIndex.parent.is_null())
+              .execute())
+    if filled:
+        logger.info(f"Database migrated: filled parent for {filled} rows")
+
+def under_path(field, dir_path: str):
+    """
+    Expression selecting values of field strictly below dir_path.
+    Uses a range on the (indexed) path instead of LIKE, which is
+    case-insensitive in SQLite and cannot use the index.
+    """
+    prefix = dir_path.rstrip(os.sep) + os.sep
+    upper = prefix[:-1] + chr(ord(os.sep) + 1)
+    return (field > prefix) & (field < upper)
+
 def init_db(db_path: str = "data/sortomatic.db"):
     """
     Initializes the SQLite connection with high-performance settings.
@@ -48,13 +224,21 @@ def init_db(db_path: str = "data/sortomatic.db"):
         'synchronous': 0           # Risky but fast for local tools
     })
     
+    # For _backfill_parents
+    database.register_function(os.path.dirname, 'dirname', 1)
+
     # Bind the proxy to the real database
     db.initialize(database)
     logger.info(f"Database initialized at {db_path} (WAL mode). Proxy ID: {id(db)}")
     
-    # Create tables if they don't exist
+    # Upgrade older tables first: create_tables would otherwise try to
+    # index columns that do not exist yet
     db.connect()
-    db.create_tables([FileIndex])
+    for model in MODELS:
+        if model.table_exists():
+            _migrate_columns(model)
+    db.create_tables(MODELS)
+    _backfill_parents()
     
     return database
 
@@ -99,6 +283,13 @@ def get_children(parent_path: str, search: Optional[str] = None):
             
     return sorted(list(folders)), sorted(files, key=lambda f: f.filename)
 
+def shared_across_threads() -> bool:
+    """
+    True when other threads can open their own connection to the database.
+    An in-memory database only exists for the connection that created it.
+    """
+    return getattr(db.obj, "database", None) != ":memory:"
+
 def close_db():
     """
     Closes the database connection.
@@ -0,0 +1,200 @@
+"""Quick size estimates of huge trees from random directory probes."""
+import math
+import os
+import random
+import time
+from collections import defaultdict
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .config import settings
+from .ignore import compile_ignore
+from .scanner import scan_directory
+from .types import WalkEntry
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Two-sided 95% normal quantile
+Z_95 = 1.96
+
+class TreeEstimator:
+    """
+    Estimates file count, bytes and category mix of a tree without walking it.
+
+    Each probe descends from the root to a leaf, picking one sub-directory
+    at random at every level (Knuth's random path estimator). A directory
+    reached after choices among k1, k2... siblings stands for k1*k2*...
+    directories like it, so its files are counted with that weight. The
+    weighted sum along one probe is an unbiased estimate of the tree
+    total; averaging many probes gives the estimate and the spread between
+    probes its confidence interval.
+
+    Listings go through scan_directory (same ignore and bundle rules as the
+    index pass) and are cached, so the upper levels are listed once.
+    """
+    def __init__(self, root: Path, rng: Optional[random.Random] = None):
+        self.root = os.fspath(root)
+        self.rng = rng or random.Random()
+        self._atomic_markers = set(settings.atomic_markers)
+        self._ignore = compile_ignore(settings.ignore_patterns)
+        self._listings: Dict[str, Tuple[List[WalkEntry], List[str]]] = {}
+        self._sums = defaultdict(float)
+        self._squares = defaultdict(float)
+        self._categories = defaultdict(lambda: [0.0, 0.0])  # category -> [files, bytes] (summed over probes)
+        self._samples: List[WalkEntry] = []
+        self.probes = 0
+
+    def _list(self, dirpath: str):
+        listing = self._listings.get(dirpath)
+        if listing is None:
+            listing = scan_directory(dirpath, self._atomic_markers, self._ignore)
+            self._listings[dirpath] = listing
+        return listing
+
+    def probe(self):
+        """Runs one random root-to-leaf descent and adds its weighted counts."""
+        totals = defaultdict(float)
+        weight = 1
+        dirpath = self.root
+        while True:
+            records, subdirs = self._list(dirpath)
+            totals['dirs'] += weight
+            for record in records:
+                if record.entry_type == 'bundle':
+                    totals['bundles'] += weight
+                    continue
+                totals['files'] += weight
+                totals['bytes'] += weight * record.size_bytes
+                category = self._categories[settings.get_category(os.path.splitext(record.path)[1])]
+                category[0] += weight
+                category[1] += weight * record.size_bytes
+                if len(self._samples) < 256:
+                    self._samples.append(record)
+            if not subdirs:
+                break
+            weight *= len(subdirs)
+            dirpath = self.rng.choice(subdirs)
+
+        for key in ('files', 'bytes', 'dirs', 'bundles'):
+            self._sums[key] += totals[key]
+            self._squares[key] += totals[key] ** 2
+        self.probes += 1
+
+    def run(self, seconds: float = 5.0, max_probes: int = 100_000):
+        """Probes until the time budget or max_probes is spent, or the whole tree has been listed."""
+        deadline = time.monotonic() + seconds
+        while self.probes < max_probes and time.monotonic() < deadline:
+            self.probe()
+            if self.probes % 100 == 0 and self.complete():
+                break
+        return self
+
+    def complete(self) -> bool:
+        """True once every directory of the tree is in the listing cache (small trees)."""
+        return all(subdir in self._listings
+                   for _records, subdirs in self._listings.values()
+                   for subdir in subdirs)
+
+    def _exact(self, key: str) -> float:
+        if key == 'dirs':
+            return float(len(self._listings))
+        records = [r for listing in self._listings.values() for r in listing[0]]
+        if key == 'bundles':
+            return float(sum(1 for r in records if r.entry_type == 'bundle'))
+        files = [r for r in records if r.entry_type != 'bundle']
+        return float(len(files) if key == 'files' else sum(r.size_bytes for r in files))
+
+    def interval(self, key: str) -> Tuple[float, float, float]:
+        """(estimate, low, high) for 'files', 'bytes', 'dirs' or 'bundles' (95% interval)."""
+        if self.probes and self.complete():
+            exact = self._exact(key)
+            return exact, exact, exact
+        n = self.probes
+        if not n:
+            return 0.0, 0.0, 0.0
+        mean = self._sums[key] / n
+        if n < 2:
+            return mean, 0.0, math.inf
+        variance = max(0.0, (self._squares[key] - n * mean * mean) / (n - 1))
+        margin = Z_95 * math.sqrt(variance / n)
+        return mean, max(0.0, mean - margin), mean + margin
+
+    def category_mix(self) -> Dict[str, Dict[str, float]]:
+        """Estimated files, bytes and share of files per category, largest first."""
+        categories, probes = self._categories, self.probes
+        if probes and self.complete():
+            categories, probes = defaultdict(lambda: [0.0, 0.0]), 1
+            for records, _subdirs in self._listings.values():
+                for record in records:
+                    if record.entry_type != 'bundle':
+                        category = categories[settings.get_category(os.path.splitext(record.path)[1])]
+                        category[0] += 1
+                        category[1] += record.size_bytes
+
+        files = sum(cat_files for cat_files, _ in categories.values()) or 1.0
+        mix = {}
+        for name, (cat_files, cat_bytes) in sorted(categories.items(), key=lambda kv: kv[1][1], reverse=True):
+            mix[name] = {
+                'files': cat_files / probes,
+                'bytes': cat_bytes / probes,
+                'share': cat_files / files,
+            }
+        return mix
+
+    def read_throughput(self, seconds: float = 1.0) -> Optional[float]:
+        """
+        Bytes/s of hashing sampled files the way the hash pass does (xxHash64
+        in hashing_chunk_size reads). Recently listed files may be cached, so
+        this is optimistic on cold spinning disks.
+        """
+        if xxhash is None or not self._samples:
+            return None
+        read = 0
+        start = time.monotonic()
+        deadline = start + seconds
+        for record in self.rng.sample(self._samples, len(self._samples)):
+            try:
+                hasher = xxhash.xxh64()
+                with open(record.path, 'rb') as f:
+                    for chunk in iter(partial(f.read, settings.hashing_chunk_size), b""):
+                        hasher.update(chunk)
+                        read += len(chunk)
+                        if time.monotonic() >= deadline:
+                            break
+            except OSError:
+                continue
+            if time.monotonic() >= deadline:
+                break
+        elapsed = time.monotonic() - start
+        return read / elapsed if read and elapsed > 0 else None
+
+def estimate_tree(root: Path, seconds: float = 5.0, rng: Optional[random.Random] = None) -> Dict:
+    """
+    Runs probes for most of `seconds`, then times a few reads.
+
+    Returns files/bytes/dirs/bundles as (estimate, low, high), the category
+    mix, the measured hash throughput and the expected hash time. The hash
+    time assumes the readers the root's device gets from the I/O scheduler.
+    """
+    from .pipeline.devices import describe_device, readers_for
+
+    estimator = TreeEstimator(root, rng).run(seconds * 0.8)
+    result = {key: estimator.interval(key) for key in ('files', 'bytes', 'dirs', 'bundles')}
+    result['probes'] = estimator.probes
+    result['listed_dirs'] = len(estimator._listings)
+    result['categories'] = estimator.category_mix()
+
+    rate = estimator.read_throughput(seconds * 0.2)
+    try:
+        kind = describe_device(os.stat(root).st_dev)['kind']
+    except OSError:
+        kind = 'other'
+    readers = min(readers_for(kind), settings.max_workers)
+    result['hash_rate'] = rate
+    result['hash_seconds'] = (
+        tuple(value / (rate * readers) for value in result['bytes']) if rate else None
+    )
+    return result
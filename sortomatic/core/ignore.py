@@ -0,0 +1,110 @@
+"""Compiled matcher for the `ignore` patterns of filetypes.yaml."""
+import fnmatch
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, Optional, Pattern, Tuple
+
+_GLOB_CHARS = set("*?[")
+
+def _translate_path_glob(pattern: str) -> str:
+    """
+    Translates a path glob into a regex body.
+    `*` and `?` stay inside one path segment, `**/` spans any number of
+    directories (including none) and a bare `**` matches anything.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i
+            if j < n and pattern[j] == "!":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            j = pattern.find("]", j)
+            if j == -1:
+                out.append("\\[")
+                continue
+            body = pattern[i:j].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            elif body.startswith(("^", "[")):
+                body = "\\" + body
+            out.append(f"[{body}]")
+            i = j + 1
+        else:
+            out.append(re.escape(c))
+    return "".join(out)
+
+class IgnoreMatcher:
+    """
+    Matches entries against all ignore patterns at once.
+
+    - Literal names (`.git`, `node_modules`) go into a set.
+    - Name globs (`*.tmp`, `~$*`) are combined into a single regex.
+    - Patterns containing a `/` are matched against the full path.
+      Absolute ones (`/mnt/nas/tmp/**`) are anchored at the filesystem root,
+      relative ones (`cache/*.tmp`, `**/cache/*.tmp`) match at any depth.
+
+    Name patterns follow fnmatch.fnmatch semantics, including os.path.normcase.
+    """
+    def __init__(self, patterns: Iterable[str]):
+        self.literals = set()
+        name_globs = []
+        path_globs = []
+
+        for pattern in patterns:
+            if not pattern:
+                continue
+            if "/" in pattern:
+                body = _translate_path_glob(pattern.rstrip("/"))
+                path_globs.append(body if pattern.startswith("/") else f"(?:.*/)?{body}")
+            elif _GLOB_CHARS.isdisjoint(pattern):
+                self.literals.add(os.path.normcase(pattern))
+            else:
+                name_globs.append(fnmatch.translate(os.path.normcase(pattern)))
+
+        self._name_re: Optional[Pattern] = re.compile("|".join(name_globs)) if name_globs else None
+        self._path_re: Optional[Pattern] = (
+            re.compile("(?s:" + "|".join(f"(?:{p})" for p in path_globs) + ")") if path_globs else None
+        )
+
+    def match_name(self, name: str) -> bool:
+        """True if a name-only pattern matches this entry name."""
+        name = os.path.normcase(name)
+        if name in self.literals:
+            return True
+        return self._name_re is not None and self._name_re.match(name) is not None
+
+    def match(self, name: str, path: str) -> bool:
+        """True if the entry (its base name and full path) should be ignored."""
+        if self.match_name(name):
+            return True
+        if self._path_re is None:
+            return False
+        if os.sep != "/":
+            path = path.replace(os.sep, "/")
+        return self._path_re.fullmatch(path) is not None
+
+@lru_cache(maxsize=8)
+def _compile(patterns: Tuple[str, ...]) -> IgnoreMatcher:
+    return IgnoreMatcher(patterns)
+
+def compile_ignore(patterns: Iterable[str]) -> IgnoreMatcher:
+    """Returns the matcher for these patterns, compiled once and then reused."""
+    return _compile(tuple(patterns))
@@ -0,0 +1,178 @@
+"""Incremental rescans driven by per-directory mtime snapshots."""
+import os
+from pathlib import Path
+from typing import Dict, Generator, List, Optional
+from peewee import EXCLUDED
+from .config import settings
+from .database import DirSnapshot, FileIndex, db, under_path
+from .ignore import compile_ignore
+from .scanner import scan_directory
+from .types import WalkEntry
+from ..utils.logger import logger
+
+class IncrementalWalker:
+    """
+    Walks root like smart_walk, but only re-lists directories whose
+    mtime/inode changed since the last snapshot.
+
+    A directory's mtime moves when entries are added, removed or renamed
+    in it, so an unchanged directory costs one stat instead of a listing
+    plus one stat per file. Its sub-directories are taken from the snapshot
+    table and still visited, since their own changes do not bubble up.
+    Files rewritten in place do not move their directory's mtime either:
+    the files an unchanged directory is known to hold are stat'ed again
+    (without listing it), and those whose size or mtime changed are
+    yielded, so the index pass refreshes them and clears their category
+    and hashes.
+
+    Rows for entries that disappeared from a re-listed directory are
+    deleted as the walk goes. New snapshots are kept in memory and only
+    written by commit(), once the caller has flushed the yielded records:
+    an interrupted run never leaves a snapshot for unsaved files.
+
+    Snapshots and rows are read on the thread consuming walk(), on its own
+    connection. With a writer (the DatabaseWriter of the pass), the deletes
+    are queued on it with writer.call(), so they are serialized with the
+    pass's other writes; the 'removed' count is then final once the writer
+    is closed. Without one, they run on the consuming thread.
+    """
+    def __init__(self, root: Path, writer=None):
+        self.root = os.fspath(root)
+        self.writer = writer
+        self.stats = {'relisted_dirs': 0, 'skipped_dirs': 0, 'rewritten': 0, 'removed': 0}
+        self._pending: List[Dict] = []
+
+    def walk(self) -> Generator[WalkEntry, None, None]:
+        atomic_markers = set(settings.atomic_markers)
+        ignore = compile_ignore(settings.ignore_patterns)
+
+        stack = [self.root]
+        while stack:
+            dirpath = stack.pop()
+            try:
+                st = os.stat(dirpath)
+            except OSError:
+                # Vanished between the parent listing and now
+                self._forget_tree(dirpath)
+                continue
+
+            snapshot = DirSnapshot.get_or_none(DirSnapshot.path == dirpath)
+            if (snapshot is not None and snapshot.mtime_ns == st.st_mtime_ns
+                    and snapshot.inode == st.st_ino and snapshot.device == st.st_dev):
+                self.stats['skipped_dirs'] += 1
+                if not snapshot.is_bundle:
+                    yield from self._restat(dirpath)
+                    children = (DirSnapshot.select(DirSnapshot.path)
+                                .where(DirSnapshot.parent == dirpath)
+                                .order_by(DirSnapshot.path.desc()))
+                    stack.extend(child.path for child in children)
+                continue
+
+            self.stats['relisted_dirs'] += 1
+            records, subdirs = scan_directory(dirpath, atomic_markers, ignore)
+            is_bundle = bool(records) and records[0].entry_type == 'bundle' and records[0].path == dirpath
+            self._reconcile(dirpath, snapshot, records, subdirs, is_bundle)
+            self._pending.append({
+                'path': dirpath,
+                'parent': os.path.dirname(dirpath),
+                'mtime_ns': st.st_mtime_ns,
+                'inode': st.st_ino,
+                'device': st.st_dev,
+                'is_bundle': is_bundle,
+            })
+
+            yield from records
+            stack.extend(reversed(subdirs))
+
+    def _restat(self, dirpath: str) -> Generator[WalkEntry, None, None]:
+        """Files of the unchanged directory dirpath whose size or mtime changed."""
+        known = list(FileIndex
+                     .select(FileIndex.path, FileIndex.size_bytes, FileIndex.modified_at)
+                     .where((FileIndex.parent == dirpath) & (FileIndex.entry_type == 'file'))
+                     .tuples())
+        gone = []
+        for path, size_bytes, modified_at in known:
+            try:
+                st = os.stat(path)
+            except OSError:
+                gone.append(path)
+                continue
+            entry = WalkEntry(path, 'file', st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
+            if (entry.size_bytes, entry.modified_at) != (size_bytes, modified_at):
+                self.stats['rewritten'] += 1
+                yield entry
+        if gone:
+            self._delete(gone)
+
+    def commit(self):
+        """Persists the snapshots of every directory listed during the walk."""
+        if not self._pending:
+            return
+        fields = ['parent', 'mtime_ns', 'inode', 'device', 'is_bundle']
+        with db.atomic():
+            for start in range(0, len(self._pending), 500):
+                (DirSnapshot
+                 .insert_many(self._pending[start:start + 500])
+                 .on_conflict(conflict_target=[DirSnapshot.path],
+                              update={getattr(DirSnapshot, f): getattr(EXCLUDED, f) for f in fields})
+                 .execute())
+        logger.debug(f"Saved {len(self._pending)} directory snapshots")
+        self._pending = []
+
+    def _reconcile(self, dirpath: str, snapshot: Optional[DirSnapshot], records: List[WalkEntry], subdirs: List[str], is_bundle: bool):
+        """Deletes rows for entries of dirpath that no longer exist (or are now ignored)."""
+        if snapshot is None and not FileIndex.select().where(FileIndex.parent == dirpath).exists():
+            # First time we see this directory: nothing to forget
+            return
+
+        if is_bundle:
+            # Became an atomic folder: its content is no longer indexed file by file
+            self._forget_tree(dirpath, keep_self=True)
+            return
+
+        if snapshot is not None and snapshot.is_bundle:
+            # Stopped being a bundle: drop the bundle row itself
+            self._delete([dirpath])
+
+        # Bundle rows of sub-directories are kept: those are re-checked when visited
+        seen = {record.path for record in records}
+        known = set(subdirs)
+        stale = [row.path for row in FileIndex.select(FileIndex.path, FileIndex.entry_type).where(FileIndex.parent == dirpath)
+                 if row.path not in seen and not (row.entry_type == 'bundle' and row.path in known)]
+        if stale:
+            self._delete(stale)
+
+        for child in DirSnapshot.select(DirSnapshot.path).where(DirSnapshot.parent == dirpath):
+            if child.path not in known:
+                self._forget_tree(child.path)
+
+    def _forget_tree(self, dirpath: str, keep_self: bool = False):
+        self._apply(lambda: forget_tree(dirpath, keep_self))
+
+    def _delete(self, paths: List[str]):
+        def delete():
+            removed = 0
+            with db.atomic():
+                for start in range(0, len(paths), 500):
+                    removed += FileIndex.delete().where(FileIndex.path.in_(paths[start:start + 500])).execute()
+            return removed
+        self._apply(delete)
+
+    def _apply(self, delete):
+        """Runs delete() (which returns the rows removed) on the writer, or here without one."""
+        def run():
+            self.stats['removed'] += delete()
+        if self.writer is not None:
+            self.writer.call(run)
+        else:
+            run()
+
+def forget_tree(dirpath: str, keep_self: bool = False) -> int:
+    """Deletes every row and snapshot at or below dirpath. Returns the number of rows removed."""
+    with db.atomic():
+        removed = FileIndex.delete().where(under_path(FileIndex.path, dirpath)).execute()
+        DirSnapshot.delete().where(under_path(DirSnapshot.path, dirpath)).execute()
+        if not keep_self:
+            removed += FileIndex.delete().where(FileIndex.path == dirpath).execute()
+            DirSnapshot.delete().where(DirSnapshot.path == dirpath).execute()
+    return removed
@@ -0,0 +1,152 @@
+"""Execution backends: where the pipeline runs the work of a pass."""
+import concurrent.futures
+import multiprocessing
+import os
+from typing import Callable, List, Optional
+from ..config import settings
+from .control import ScanCancelled
+
+# 'thread': the shared thread pool (I/O-bound work, the default)
+# 'process': batches sent to a process pool (GIL-bound work: image decoding, fingerprints)
+BACKENDS = {'thread', 'process'}
+
+_process_pool = None
+
+def _apply_settings(values: dict):
+    """Process pool initializer: children start from the parent's settings, CLI overrides included."""
+    from ..config import settings as child_settings
+    child_settings.__dict__.update(values)
+
+def get_process_pool():
+    """Returns the global process pool, initializing it if needed."""
+    global _process_pool
+    if _process_pool is None:
+        # spawn: children never inherit the parent's threads or its database connection
+        _process_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=settings.process_workers or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_apply_settings,
+            initargs=(dict(vars(settings)),),
+        )
+    return _process_pool
+
+def shutdown_process_pool(wait=False):
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=wait, cancel_futures=True)
+        _process_pool = None
+
+def backend_for(pass_name: str) -> str:
+    """Backend configured for a pass in settings.pass_backends (default: 'thread')."""
+    name = settings.pass_backends.get(pass_name, 'thread')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}' for pass '{pass_name}' (expected one of {', '.join(sorted(BACKENDS))})")
+    return name
+
+class ThreadBackend:
+    """
+    Runs worker_func(item) on the shared thread pool.
+    controller is the ConcurrencyController worker_func runs under, if any:
+    the pipeline keeps at most its limit of items submitted at once.
+    """
+    def __init__(self, executor, worker_func: Callable, controller=None):
+        self.executor = executor
+        self.worker_func = worker_func
+        self.controller = controller
+
+    def submit(self, item) -> concurrent.futures.Future:
+        return self.executor.submit(self.worker_func, item)
+
+    def flush(self):
+        pass
+
+class ProcessBackend:
+    """
+    Sends items to a process pool in batches of settings.process_batch_size.
+
+    encode(item) turns an item into a small picklable tuple (paths in),
+    batch_func runs in the child over a list of them and returns one
+    compact tuple per item, which decode() turns back into a result.
+    Each submitted item still gets its own future, so the pipeline's
+    sliding window does not change; flush() sends a partial batch.
+
+    Items for which cpu_bound(item) is false stay on the thread backend.
+
+    With a control (the pass's ScanControl), submit() waits while the scan
+    is paused and drops items once it is cancelled (their result is None),
+    and each batch is awaited from a thread of executor under
+    control.run(): a batch in the pool holds one worker slot, so throttle()
+    caps the batches in flight. A cancel abandons the batches still
+    running; their results are discarded. track wraps the function
+    awaiting a batch (the manager counts it as a busy worker).
+    """
+    def __init__(self, batch_func: Callable, encode: Callable, decode: Callable,
+                 fallback: Optional[ThreadBackend] = None, cpu_bound: Optional[Callable] = None,
+                 pool=None, batch_size: Optional[int] = None, control=None, executor=None,
+                 track: Optional[Callable] = None):
+        self.batch_func = batch_func
+        self.encode = encode
+        self.decode = decode
+        self.fallback = fallback
+        self.cpu_bound = cpu_bound
+        self.pool = pool or get_process_pool()
+        self.batch_size = max(1, batch_size or settings.process_batch_size)
+        self.control = control
+        self.executor = executor or (fallback.executor if fallback is not None else None)
+        self.track = track or (lambda func: func)
+        self._batch: List = []
+        self._futures: List[concurrent.futures.Future] = []
+
+    def submit(self, item) -> concurrent.futures.Future:
+        if self.fallback is not None and self.cpu_bound is not None and not self.cpu_bound(item):
+            return self.fallback.submit(item)
+        future = concurrent.futures.Future()
+        if self.control is not None and not self.control.wait():
+            future.set_result(None)
+            return future
+        self._batch.append(self.encode(item))
+        self._futures.append(future)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        return future
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch, futures = self._batch, self._futures
+        self._batch, self._futures = [], []
+        for future in futures:
+            future.set_running_or_notify_cancel()
+        if self.control is None or self.executor is None:
+            done = self.pool.submit(self.batch_func, batch)
+        else:
+            done = self.executor.submit(self.control.run, self.track(self._await_batch), batch)
+        done.add_done_callback(lambda done: self._fan_out(done, futures))
+
+    def _await_batch(self, batch: List):
+        """Runs batch in the pool and waits for it, giving up once the scan is cancelled."""
+        done = self.pool.submit(self.batch_func, batch)
+        while True:
+            try:
+                return done.result(timeout=0.1)
+            except concurrent.futures.TimeoutError:
+                if self.control.cancelled:
+                    done.cancel()
+                    raise ScanCancelled()
+
+    def _fan_out(self, done: concurrent.futures.Future, futures: List[concurrent.futures.Future]):
+        error = done.exception()
+        if error is not None:
+            for future in futures:
+                future.set_exception(error)
+            return
+        if done.result() is None:
+            # Cancelled before or while the batch ran
+            for future in futures:
+                future.set_result(None)
+            return
+        for future, result in zip(futures, done.result()):
+            try:
+                future.set_result(self.decode(result))
+            except Exception as e:
+                future.set_exception(e)
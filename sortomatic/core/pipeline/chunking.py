@@ -0,0 +1,45 @@
+"""Chunked task submission: one executor task per group of items."""
+import time
+from typing import Callable, List, Tuple
+from ..config import settings
+from ...utils.logger import logger
+
+class AdaptiveChunker:
+    """
+    Picks how many items go into one executor task.
+
+    Tiny items (the index pass on small files) are dominated by the cost of
+    a future per item, so they are grouped; slow items (hashing large
+    files) go out one by one so they still spread over the workers. The
+    size follows an average of the measured per-item time so that one task
+    takes about settings.chunk_target_ms.
+    """
+    def __init__(self, max_size: int = None, target_seconds: float = None):
+        self.max_size = max(1, max_size or settings.max_chunk_size)
+        self.target = (target_seconds if target_seconds is not None else settings.chunk_target_ms / 1000)
+        self.size = 1
+        self._per_item = None
+
+    def observe(self, items: int, seconds: float):
+        if items <= 0:
+            return
+        per_item = seconds / items
+        # Exponential moving average: one odd chunk does not swing the size
+        self._per_item = per_item if self._per_item is None else 0.7 * self._per_item + 0.3 * per_item
+        if self._per_item <= 0:
+            ideal = self.max_size
+        else:
+            ideal = int(self.target / self._per_item)
+        # Grow at most 2x per observation so the first measurements don't overshoot
+        self.size = max(1, min(self.max_size, ideal, self.size * 2))
+
+def run_chunk(worker_func: Callable, chunk: List) -> Tuple[List, float]:
+    """Executor task: applies worker_func to each item. Returns (results, seconds)."""
+    start = time.perf_counter()
+    results = []
+    for item in chunk:
+        try:
+            results.append(worker_func(item))
+        except Exception as e:
+            logger.error(f"FS Worker failed: {e}", exc_info=True)
+    return results, time.perf_counter() - start
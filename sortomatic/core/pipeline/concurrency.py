@@ -0,0 +1,153 @@
+"""Adaptive concurrency: how many workers of a pass run at once."""
+import threading
+import time
+from typing import Callable, Optional
+import psutil
+from ..config import settings
+from ...utils.logger import logger
+
+# A step must gain this much throughput to count as an improvement
+MIN_GAIN = 0.05
+# Per-item latency above this multiple of the best seen means workers are queueing
+LATENCY_TOLERANCE = 2.0
+# Share of the limit kept on a decrease
+BACKOFF = 0.75
+
+def concurrency_bound() -> int:
+    """Most workers a pass may run at once: max_workers (-j), the size of the thread pool."""
+    return max(1, settings.max_workers)
+
+def _iowait() -> Optional[float]:
+    """Share of CPU time spent waiting for I/O since the last call (None where not reported)."""
+    iowait = getattr(psutil.cpu_times_percent(interval=None), 'iowait', None)
+    return None if iowait is None else iowait / 100.0
+
+class ConcurrencyController:
+    """
+    Resizes the number of workers running at once during a pass (AIMD).
+
+    Workers run items through run(), which waits for a free slot.
+    Dispatchers feeding a shared pool should not submit more than `limit`
+    items at once, so pool threads are not left waiting in run(). Every
+    settings.concurrency_interval seconds the controller compares the
+    completion rate, the per-item latency and the system iowait with the
+    previous interval:
+
+    - the limit goes up while that raises throughput, doubling until the
+      first step that does not help (slow start), then one worker at a
+      time; a step that does not help is undone;
+    - when the latency has grown past LATENCY_TOLERANCE times the best
+      seen, or iowait passes settings.iowait_threshold, workers are only
+      queueing on the CPU or the disk and the limit drops to BACKOFF of its
+      value; a decrease that costs throughput is partly undone.
+
+    After every decrease the limit is held for an interval, so the limit
+    settles around the knee of the throughput curve instead of the bound.
+
+    The limit starts at the bound and stays between 1 and
+    concurrency_bound(): the controller only ever runs fewer workers than
+    max_workers. Changes are logged.
+    """
+    def __init__(self, name: str, start: Optional[int] = None, bound: Optional[int] = None,
+                 interval: Optional[float] = None):
+        self.name = name
+        self.bound = max(1, bound or concurrency_bound())
+        self.limit = max(1, min(self.bound, start or self.bound))
+        self.interval = interval if interval is not None else settings.concurrency_interval
+        self.slow_start = True
+        self.active = 0
+        self.decisions = []
+        self._cond = threading.Condition()
+        self._window_start = time.monotonic()
+        self._completed = 0
+        self._busy_seconds = 0.0
+        self._last_throughput = None
+        self._last_action = None
+        self._previous_limit = self.limit
+        self._best_latency = None
+        _iowait()  # The first reading only sets the baseline
+
+    def run(self, func: Callable, *args, items: int = 1):
+        """Calls func(*args) in a worker slot; items is how many items the call processes."""
+        with self._cond:
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.active += 1
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._cond:
+                self.active -= 1
+                self._completed += items
+                self._busy_seconds += elapsed
+                self._adjust()
+                self._cond.notify()
+
+    def wrap(self, func: Callable) -> Callable:
+        """func(item), run in a worker slot."""
+        return lambda item: self.run(func, item)
+
+    def _adjust(self):
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        # Too few completions say nothing (a window of very slow files)
+        if elapsed < self.interval or self._completed < self.limit:
+            return
+        throughput = self._completed / elapsed
+        latency = self._busy_seconds / self._completed
+        iowait = _iowait()
+        self._window_start = now
+        self._completed = 0
+        self._busy_seconds = 0.0
+
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+        previous, self._last_throughput = self._last_throughput, throughput
+        gain = 0.0 if previous is None else throughput / previous - 1
+        last_action, self._last_action = self._last_action, None
+
+        if iowait is not None and iowait >= settings.iowait_threshold:
+            congestion = f"iowait {iowait:.0%}"
+        elif latency > self._best_latency * LATENCY_TOLERANCE:
+            congestion = f"latency {1000 * latency:.1f} ms/item (best {1000 * self._best_latency:.1f})"
+        else:
+            congestion = None
+
+        old = self.limit
+        if last_action == 'up' and gain < MIN_GAIN:
+            # More workers did not help: go back and probe from there
+            reason = "no gain"
+            self.limit = self._previous_limit
+            self.slow_start = False
+        elif last_action == 'down' and gain < -MIN_GAIN:
+            # Fewer workers cost throughput: the decrease went too far
+            reason = "throughput fell"
+            self.limit = min(self.bound, self.limit + 1)
+        elif congestion:
+            # Workers are queueing on the CPU or the disk
+            reason = congestion
+            self.limit = max(1, int(self.limit * BACKOFF))
+            self.slow_start = False
+        elif last_action == 'down':
+            # Hold an interval so the next probe compares steady states
+            return
+        else:
+            reason = "throughput improving" if last_action == 'up' else "probing"
+            self.limit = min(self.bound, self.limit * 2 if self.slow_start else self.limit + 1)
+        self._previous_limit = old
+
+        if self.limit > old:
+            self._last_action = 'up'
+        elif self.limit < old:
+            self._last_action = 'down'
+
+        if self.limit != old:
+            self.decisions.append((now, old, self.limit))
+            logger.info(
+                f"{self.name} concurrency {old} -> {self.limit}: {reason} "
+                f"({throughput:.0f} items/s, iowait {'n/a' if iowait is None else f'{iowait:.0%}'})"
+            )
+            if self.limit > old:
+                self._cond.notify_all()
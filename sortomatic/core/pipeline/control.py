@@ -0,0 +1,191 @@
+"""Cooperative pause, resume, throttle and cancel for running passes."""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from ...utils.logger import logger
+
+class ScanInterrupted(Exception):
+    """Raised by check() inside a long read when the scan is paused: the item starts over on resume."""
+
+class ScanCancelled(ScanInterrupted):
+    """Raised by check() once the scan is cancelled: the item is dropped."""
+
+_local = threading.local()
+
+def check_interrupt():
+    """
+    Called by workers between reads (e.g. hashing chunks). Raises
+    ScanInterrupted when the scan running this item is paused or cancelled,
+    so the file is closed at once instead of being read to the end.
+    """
+    control = getattr(_local, 'control', None)
+    if control is not None:
+        control.check()
+
+class ScanControl:
+    """
+    Control surface shared by the coordinator, the workers and the UI.
+
+    Workers run items through run(): it waits while the scan is paused or
+    more than throttle() workers are busy, and an item interrupted by a
+    pause (check_interrupt() in its read loop) is started over once the scan
+    resumes, so its result is never lost nor written twice. Coordinators
+    call wait() before handing out more work. cancel() is sticky until
+    reset(): items not started are dropped and stay pending in the
+    database for the next scan.
+
+    The manager reports progress with begin(), counter() and end(); status()
+    returns a snapshot that can be read from any thread.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._paused = False
+        self._cancelled = False
+        self._cap: Optional[int] = None
+        self._active = 0
+        self.reset()
+
+    def reset(self):
+        with self._cond:
+            self._paused = False
+            self._cancelled = False
+            self._cond.notify_all()
+        self.state = 'idle'
+        self.pass_name: Optional[str] = None
+        self.done = 0
+        self._started: Optional[float] = None
+        self._paused_at: Optional[float] = None
+        self._paused_seconds = 0.0
+
+    # --- UI side ---
+
+    def pause(self):
+        with self._cond:
+            if self._paused or self._cancelled:
+                return
+            self._paused = True
+            self._paused_at = time.monotonic()
+        self.state = 'paused'
+        logger.info("Scan paused")
+
+    def resume(self):
+        with self._cond:
+            if not self._paused:
+                return
+            self._paused = False
+            self._paused_seconds += time.monotonic() - self._paused_at
+            self._paused_at = None
+            self._cond.notify_all()
+        self.state = 'running' if self.pass_name else 'idle'
+        logger.info("Scan resumed")
+
+    def cancel(self):
+        with self._cond:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            if self._paused:
+                self._paused = False
+                self._paused_seconds += time.monotonic() - self._paused_at
+                self._paused_at = None
+            self._cond.notify_all()
+        self.state = 'cancelled'
+        logger.warning("Scan cancelled")
+
+    def throttle(self, workers: Optional[int]):
+        """Busy workers allowed at once (None lifts the limit). Running items finish first."""
+        with self._cond:
+            self._cap = max(1, workers) if workers else None
+            self._cond.notify_all()
+        logger.info(f"Scan throttled to {workers} workers" if workers else "Scan throttle lifted")
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    # --- Manager side ---
+
+    def begin(self, pass_name: str):
+        self.pass_name = pass_name
+        self.done = 0
+        self._started = time.monotonic()
+        self._paused_seconds = 0.0
+        if self._paused_at is not None:
+            self._paused_at = self._started
+        if not self._cancelled:
+            self.state = 'paused' if self._paused else 'running'
+
+    def end(self):
+        if not self._cancelled:
+            self.state = 'completed'
+
+    def counter(self, progress_callback: Optional[Callable] = None) -> Callable:
+        """progress_callback that also counts the item in status()."""
+        def advance():
+            self.done += 1
+            if progress_callback:
+                progress_callback()
+        return advance
+
+    def wait(self) -> bool:
+        """Blocks while paused. False once cancelled."""
+        with self._cond:
+            while self._paused and not self._cancelled:
+                self._cond.wait()
+            return not self._cancelled
+
+    def check(self):
+        if self._cancelled:
+            raise ScanCancelled()
+        if self._paused:
+            raise ScanInterrupted()
+
+    # --- Worker side ---
+
+    def run(self, func: Callable, *args) -> Any:
+        """func(*args) once the scan may go on; None if it was cancelled first."""
+        while True:
+            with self._cond:
+                while not self._cancelled and (self._paused or (self._cap and self._active >= self._cap)):
+                    self._cond.wait()
+                if self._cancelled:
+                    return None
+                self._active += 1
+            _local.control = self
+            try:
+                return func(*args)
+            except ScanCancelled:
+                return None
+            except ScanInterrupted:
+                # Paused mid-item: wait above, then start the item over
+                continue
+            finally:
+                _local.control = None
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    def wrap(self, func: Callable) -> Callable:
+        """func(item), run under this control."""
+        return lambda item: self.run(func, item)
+
+    def status(self) -> Dict[str, Any]:
+        elapsed = 0.0
+        if self._started is not None:
+            paused = self._paused_seconds
+            if self._paused_at is not None:
+                paused += time.monotonic() - self._paused_at
+            elapsed = max(0.0, time.monotonic() - self._started - paused)
+        return {
+            'state': self.state,
+            'pass': self.pass_name,
+            'done': self.done,
+            'elapsed': elapsed,
+            'rate': self.done / elapsed if elapsed else 0.0,
+            'busy_workers': self._active,
+            'throttle': self._cap,
+        }
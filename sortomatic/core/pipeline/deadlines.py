@@ -0,0 +1,131 @@
+"""Per-file time limits enforced by one shared supervisor thread."""
+import heapq
+import itertools
+import threading
+import time
+from typing import Optional
+from ...utils.logger import logger
+
+# Share of the timeout after which a slow-file warning is logged
+WARN_RATIO = 0.8
+
+class DeadlineExceeded(Exception):
+    """
+    Raised by Deadline.check() once the time limit has passed.
+    Not an OSError (unlike TimeoutError), so read-error handlers let it through.
+    """
+
+class Deadline:
+    """
+    Time limit of one unit of work (hashing or categorizing a file).
+
+    The worker calls check() between reads: past the limit it raises
+    DeadlineExceeded, so the read loop ends and the file is closed instead
+    of being read on in the background. Use as a context manager so the
+    supervisor forgets the deadline when the work finishes.
+    """
+    def __init__(self, supervisor: "DeadlineSupervisor", timeout: float,
+                 warning: Optional[str] = None, message: Optional[str] = None):
+        now = time.monotonic()
+        self.supervisor = supervisor
+        self.timeout = timeout
+        self.warn_at = now + timeout * WARN_RATIO
+        self.expires_at = now + timeout
+        self.warning = warning
+        self.message = message or f"Timed out after {timeout}s"
+        self.expired = False
+        self.finished = False
+
+    def check(self):
+        if not self.expired and time.monotonic() >= self.expires_at:
+            # Noticed before the supervisor got to it
+            self.expire()
+        if self.expired:
+            raise DeadlineExceeded(self.message)
+
+    def expire(self):
+        if not self.expired:
+            self.expired = True
+            logger.warning(self.message)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.supervisor.release(self)
+        return False
+
+class DeadlineSupervisor:
+    """
+    Single thread that fires the slow-file warnings and marks deadlines as
+    expired, replacing a watchdog thread per file.
+
+    Deadlines sit in a heap keyed by their next event (warning, then
+    expiry). Finished ones are skipped when they come up and the heap is
+    compacted once they outnumber the live ones.
+    """
+    def __init__(self):
+        self._heap = []
+        self._active = set()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, timeout: float, warning: Optional[str] = None, message: Optional[str] = None) -> Deadline:
+        deadline = Deadline(self, timeout, warning, message)
+        with self._cond:
+            self._active.add(deadline)
+            first = self._heap[0][0] if self._heap else None
+            heapq.heappush(self._heap, (deadline.warn_at, next(self._seq), 'warn', deadline))
+            heapq.heappush(self._heap, (deadline.expires_at, next(self._seq), 'expire', deadline))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sortomatic_deadlines", daemon=True)
+                self._thread.start()
+            elif first is None or deadline.warn_at < first:
+                self._cond.notify()
+        return deadline
+
+    def release(self, deadline: Deadline):
+        with self._cond:
+            deadline.finished = True
+            self._active.discard(deadline)
+            if len(self._heap) > 2 * (2 * len(self._active) + 512):
+                self._heap = [entry for entry in self._heap if not entry[3].finished]
+                heapq.heapify(self._heap)
+
+    def active(self) -> int:
+        """Deadlines currently watched."""
+        return len(self._active)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    due, _seq, kind, deadline = self._heap[0]
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+                    heapq.heappop(self._heap)
+                    if not deadline.finished:
+                        break
+
+            if kind == 'warn':
+                if deadline.warning:
+                    logger.warning(deadline.warning)
+            else:
+                deadline.expire()
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+def get_supervisor() -> DeadlineSupervisor:
+    """Returns the process-wide supervisor, creating it if needed."""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = DeadlineSupervisor()
+        return _supervisor
@@ -0,0 +1,168 @@
+"""Per-device I/O scheduling for the passes that read file contents."""
+import os
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, Iterator, List, Optional
+from ..config import settings
+from ...utils.logger import logger
+
+SYS_DEV_BLOCK = "/sys/dev/block"
+
+# Parts of a sysfs device path, and disk vendors, of virtual machine disks:
+# they report rotational=1 whatever actually stores their data
+VIRTUAL_BUSES = ("/virtio", "/vbd-", "/xen", "/VMBUS")
+VIRTUAL_VENDORS = ("QEMU", "VMWARE", "VBOX", "MSFT", "GOOGLE", "AMAZON", "XEN", "RED HAT")
+
+def describe_device(dev: Optional[int]) -> Dict[str, Any]:
+    """
+    Resolves an st_dev to its block device and kind ('hdd', 'ssd', 'nvme' or 'other').
+    Only kinds read from a physical disk limit readers: 'other' does not.
+    Network and virtual filesystems (NFS, tmpfs, overlay...) have no block
+    device, and loop, RAM and virtual machine disks report a rotational flag
+    that says nothing of the storage behind them: all come back as 'other'.
+    Device-mapper and md volumes take the kind of the disks they sit on.
+    """
+    if dev is None:
+        return {'name': "unknown", 'kind': 'other'}
+    name = f"{os.major(dev)}:{os.minor(dev)}"
+    sys_path = os.path.realpath(os.path.join(SYS_DEV_BLOCK, name))
+    if not os.path.exists(sys_path):
+        return {'name': name, 'kind': 'other'}
+    sys_path = _whole_disk(sys_path)
+    return {'name': os.path.basename(sys_path), 'kind': _block_kind(sys_path)}
+
+def _whole_disk(sys_path: str) -> str:
+    """Partitions report the flags of the disk holding them."""
+    if os.path.exists(os.path.join(sys_path, "partition")):
+        return os.path.dirname(sys_path)
+    return sys_path
+
+def _read(path: str) -> str:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def _block_kind(sys_path: str, depth: int = 0) -> str:
+    if "/devices/virtual/" in sys_path:
+        # dm and md volumes: the kind of their underlying disks, when they agree
+        slaves = os.path.join(sys_path, "slaves")
+        try:
+            kinds = {_block_kind(_whole_disk(os.path.realpath(os.path.join(slaves, slave))), depth + 1)
+                     for slave in os.listdir(slaves)} if depth < 8 else set()
+        except OSError:
+            kinds = set()
+        return kinds.pop() if len(kinds) == 1 else 'other'
+
+    vendor = " ".join((_read(os.path.join(sys_path, "device", "vendor")),
+                       _read(os.path.join(sys_path, "device", "model")))).upper()
+    if (any(bus.upper() in sys_path.upper() for bus in VIRTUAL_BUSES) or
+            any(marker in vendor for marker in VIRTUAL_VENDORS)):
+        return 'other'
+
+    rotational = _read(os.path.join(sys_path, "queue", "rotational"))
+    if rotational == "1":
+        return 'hdd'
+    if rotational != "0":
+        return 'other'
+    return 'nvme' if os.path.basename(sys_path).startswith("nvme") else 'ssd'
+
+def readers_for(kind: str) -> int:
+    """Concurrent readers allowed on one device of this kind."""
+    limits = {
+        'hdd': settings.hdd_readers,
+        'ssd': settings.ssd_readers,
+        'nvme': settings.nvme_readers,
+    }
+    return max(1, limits.get(kind) or settings.max_workers)
+
+class DeviceScheduler:
+    """
+    Hands out work so that each device has at most its own number of
+    readers in flight: a spinning disk gets 1-2 sequential readers while an
+    NVMe drive in the same scan keeps many.
+
+    Items are pushed with their st_dev, and ready() releases those whose
+    device has a free slot. The pipeline calls done() when an item finishes,
+    and report() summarises throughput per device.
+    """
+    def __init__(self):
+        self._devices: Dict[Optional[int], Dict[str, Any]] = {}
+        self._backlog = defaultdict(deque)
+        self._active = defaultdict(int)
+        self._pending = 0
+
+    def _device(self, dev: Optional[int]) -> Dict[str, Any]:
+        info = self._devices.get(dev)
+        if info is None:
+            info = describe_device(dev)
+            info.update(limit=readers_for(info['kind']), files=0, bytes=0, first=None, last=None)
+            self._devices[dev] = info
+            logger.debug(f"Device {info['name']} ({info['kind']}): {info['limit']} concurrent readers")
+        return info
+
+    def push(self, item, dev: Optional[int]):
+        self._device(dev)
+        self._backlog[dev].append(item)
+        self._pending += 1
+
+    def pending(self) -> int:
+        """Items waiting for a free slot on their device."""
+        return self._pending
+
+    def clear(self):
+        """Drops the waiting items (the ones in flight still report done())."""
+        self._backlog.clear()
+        self._pending = 0
+
+    def ready(self, max_items: int) -> Iterator:
+        """Yields up to max_items waiting items whose device has a free slot, round-robin across devices."""
+        released = 0
+        progress = True
+        while released < max_items and progress:
+            progress = False
+            for dev, queue in self._backlog.items():
+                if queue and self._active[dev] < self._devices[dev]['limit']:
+                    self._active[dev] += 1
+                    self._pending -= 1
+                    released += 1
+                    progress = True
+                    info = self._devices[dev]
+                    if info['first'] is None:
+                        info['first'] = time.monotonic()
+                    yield queue.popleft()
+                    if released >= max_items:
+                        return
+
+    def done(self, dev: Optional[int], size_bytes: int = 0):
+        info = self._devices[dev]
+        self._active[dev] -= 1
+        info['files'] += 1
+        info['bytes'] += size_bytes or 0
+        info['last'] = time.monotonic()
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Files, bytes and throughput per device, busiest first."""
+        rows = []
+        for info in self._devices.values():
+            if not info['files']:
+                continue
+            elapsed = max((info['last'] or 0) - (info['first'] or 0), 1e-6)
+            rows.append({
+                'device': info['name'],
+                'kind': info['kind'],
+                'readers': info['limit'],
+                'files': info['files'],
+                'bytes': info['bytes'],
+                'files_per_s': info['files'] / elapsed,
+                'mb_per_s': info['bytes'] / elapsed / (1024 * 1024),
+            })
+        return sorted(rows, key=lambda r: r['bytes'], reverse=True)
+
+    def log_report(self, pass_name: str):
+        for row in self.report():
+            logger.info(
+                f"{pass_name} on {row['device']} ({row['kind']}, {row['readers']} readers): "
+                f"{row['files']} files, {row['mb_per_s']:.1f} MB/s, {row['files_per_s']:.1f} files/s"
+            )
@@ -0,0 +1,136 @@
+"""Scan-run history: one ScanRun row per pass, with its throughput over time."""
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from ..database import ScanRun
+from ...utils.logger import logger
+
+# Throughput samples kept per run: past this, neighbouring samples are merged
+MAX_SAMPLES = 720
+
+# Earlier runs of the same pass a run is compared with
+TREND_RUNS = 5
+
+def _version() -> Optional[str]:
+    try:
+        from importlib.metadata import version
+        return version("sortomatic")
+    except Exception:
+        return None
+
+class RunRecorder:
+    """
+    Counts what a pass does and saves it as a ScanRun.
+
+    The pipeline coordinator calls add() for every item completed and
+    error() for items lost to an exception. Completions are also counted
+    per second; once there are more than MAX_SAMPLES samples, neighbouring
+    ones are merged and the interval doubles, so a run of any length keeps
+    a curve of bounded size.
+
+    Workers call worker_started() and worker_finished() around the work
+    itself (not while waiting for a slot): the most running at once is
+    saved as the run's workers.
+    """
+    def __init__(self, pass_name: str, root: Optional[str] = None):
+        self.pass_name = pass_name
+        self.root = root
+        self.workers = 0
+        self._busy = 0
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.sample_seconds = 1.0
+        self.samples: List[int] = []
+        self._start = time.monotonic()
+
+    def add(self, size_bytes: Optional[int] = 0, error: Optional[str] = None):
+        """One item done; error is the ctx['error'] of a file that failed ('Timeout' for a timeout)."""
+        self.files += 1
+        self.bytes += size_bytes or 0
+        if error:
+            self.errors += 1
+            if error == 'Timeout':
+                self.timeouts += 1
+
+        index = int((time.monotonic() - self._start) / self.sample_seconds)
+        while index >= MAX_SAMPLES:
+            self.samples = [sum(self.samples[i:i + 2]) for i in range(0, len(self.samples), 2)]
+            self.sample_seconds *= 2
+            index //= 2
+        if index >= len(self.samples):
+            self.samples.extend([0] * (index + 1 - len(self.samples)))
+        self.samples[index] += 1
+
+    def worker_started(self):
+        with self._lock:
+            self._busy += 1
+            if self._busy > self.workers:
+                self.workers = self._busy
+
+    def worker_finished(self):
+        with self._lock:
+            self._busy -= 1
+
+    def error(self, count: int = 1):
+        """Items that failed without a result."""
+        self.errors += count
+
+    def save(self, state: str = 'completed') -> Optional[ScanRun]:
+        """Writes the ScanRun (on the calling thread's connection). A failure to record never fails the scan."""
+        elapsed = max(time.monotonic() - self._start, 1e-6)
+        try:
+            return ScanRun.create(
+                pass_name=self.pass_name,
+                root=self.root,
+                version=_version(),
+                state=state,
+                started_at=self.started_at,
+                ended_at=datetime.now(),
+                files=self.files,
+                bytes=self.bytes,
+                errors=self.errors,
+                timeouts=self.timeouts,
+                files_per_second=self.files / elapsed,
+                mb_per_second=self.bytes / elapsed / (1024 * 1024),
+                workers=self.workers or None,
+                sample_seconds=self.sample_seconds,
+                samples=json.dumps(self.samples),
+            )
+        except Exception as e:
+            logger.warning(f"Could not record the {self.pass_name} run: {e}")
+            return None
+
+def recent_runs(limit: int = 20, pass_name: Optional[str] = None) -> List[Dict]:
+    """
+    The last `limit` runs, newest first. 'change' compares each run's
+    files/s with the average of the TREND_RUNS completed runs of the same
+    pass before it (None without any).
+    """
+    query = ScanRun.select().order_by(ScanRun.started_at.desc())
+    if pass_name:
+        query = query.where(ScanRun.pass_name == pass_name)
+    runs = []
+    for run in query.limit(limit):
+        previous = (ScanRun
+                    .select(ScanRun.files_per_second)
+                    .where((ScanRun.pass_name == run.pass_name) &
+                           (ScanRun.started_at < run.started_at) &
+                           (ScanRun.state == 'completed') &
+                           (ScanRun.files > 0))
+                    .order_by(ScanRun.started_at.desc())
+                    .limit(TREND_RUNS))
+        rates = [row.files_per_second for row in previous]
+        baseline = sum(rates) / len(rates) if rates else None
+        runs.append({
+            'run': run,
+            'duration': (run.ended_at - run.started_at).total_seconds(),
+            'samples': json.loads(run.samples) if run.samples else [],
+            'change': run.files_per_second / baseline - 1 if baseline else None,
+        })
+    return runs
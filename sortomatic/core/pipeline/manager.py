@@ -1,14 +1,35 @@
 import os
 import concurrent.futures
 import atexit
-from datetime import datetime
+import time
+from functools import partial
+from collections import deque
+from itertools import chain
 from pathlib import Path
 from typing import Optional, Dict
-from ..database import FileIndex, db
+from peewee import EXCLUDED, Case, fn
+from ..database import ArchiveMember, FileIndex, HashFailure, db, shared_across_threads
+from .. import quarantine
 from ..config import settings
-from ..scanner import smart_walk
-from ..types import ScanContext
-from .passes import categorization, hashing
+from ..scanner import get_walker
+from ..types import ScanContext, WalkEntry
+from .backends import ProcessBackend, ThreadBackend, backend_for, shutdown_process_pool
+from .chunking import AdaptiveChunker, run_chunk
+from .concurrency import ConcurrencyController, concurrency_bound
+from .control import ScanControl, ScanInterrupted
+from .paging import paginate
+from . import registry
+from .registry import Pass
+from .devices import DeviceScheduler
+from .history import RunRecorder
+from .stages import Stage, StagedPipeline, log_depths
+from .writer import DatabaseWriter
+from .passes import archives, bundles, categorization, content, hashing
+from ...utils.logger import logger
+
+# Columns written by the staged pipeline (index, categorize and hash results)
+STAGED_COLUMNS = ('path', 'filename', 'parent', 'extension', 'entry_type', 'size_bytes', 'modified_at',
+                  'device', 'inode', 'category', 'mime_type', 'fast_hash', 'full_hash', 'perceptual_hash')
 
 # Global executor instance for the pipeline
 _executor = None
@@ -18,7 +39,7 @@ def get_executor():
     global _executor
     if _executor is None:
         _executor = concurrent.futures.ThreadPoolExecutor(
-            max_workers=settings.max_workers,
+            max_workers=concurrency_bound(),
             thread_name_prefix="sortomatic_worker"
         )
     return _executor
@@ -31,6 +52,7 @@ def _shutdown_executor(wait=False):
         # It's much faster for stopping large batches of tasks.
         _executor.shutdown(wait=wait, cancel_futures=True)
         _executor = None
+    shutdown_process_pool(wait=wait)
 
 # We use a lambda to ensure the default atexit call doesn't block forever
 atexit.register(lambda: _shutdown_executor(wait=False))
@@ -41,23 +63,61 @@ class PipelineManager:
     Note: Uses global database state initialized via database.init_db().
     """
     def __init__(self):
-        pass
+        self.pipeline: Optional[StagedPipeline] = None
+        self.control = ScanControl()
+        # RunRecorder of the running pass
+        self.recorder: Optional[RunRecorder] = None
+
+    # --- Control ---
+
+    def pause(self):
+        """Stops handing out work; reads in progress stop at their next chunk and start over on resume."""
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def cancel(self):
+        """Ends the running pass cooperatively; unfinished items stay pending for the next scan."""
+        self.control.cancel()
+        pipeline = self.pipeline
+        if pipeline is not None:
+            pipeline.stop()
+
+    def throttle(self, workers: Optional[int]):
+        """Caps the busy workers (None lifts the cap), e.g. during business hours."""
+        self.control.throttle(workers)
+
+    def status(self) -> Dict:
+        """Snapshot of the running pass: state, progress, rate and queue depths."""
+        status = self.control.status()
+        status['queues'] = self.queue_depths()
+        return status
+
+    def _index_pass(self, item: WalkEntry) -> Optional[ScanContext]:
+        """Extract filesystem metadata.
+
+        The walker already did the stat, so this pass performs no syscalls.
+        A bare (path, type) tuple is still accepted and stat'ed here.
+        """
+        if not isinstance(item, WalkEntry):
+            path_str, entry_type = item
+            try:
+                st = os.stat(path_str)
+            except OSError:
+                return None
+            item = WalkEntry(path_str, entry_type, st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
 
-    def _index_pass(self, item: tuple) -> Optional[ScanContext]:
-        """Extract filesystem metadata."""
-        path_str, entry_type = item
-        try:
-            stat = os.stat(path_str)
-        except OSError:
-            return None
-            
         return ScanContext(
-            path=path_str,
-            filename=os.path.basename(path_str),
-            entry_type=entry_type,
-            size_bytes=stat.st_size,
-            modified_at=datetime.fromtimestamp(stat.st_mtime),
-            category='Project/Bundle' if entry_type == 'bundle' else None,
+            path=item.path,
+            filename=os.path.basename(item.path),
+            parent=os.path.dirname(item.path),
+            entry_type=item.entry_type,
+            size_bytes=item.size_bytes,
+            modified_at=item.modified_at,
+            device=item.device,
+            inode=item.inode,
+            category='Project/Bundle' if item.entry_type == 'bundle' else None,
             mime_type=None,
             fast_hash=None,
             full_hash=None,
@@ -100,10 +160,106 @@ class PipelineManager:
             'id': item.id,
             'fast_hash': ctx.get('fast_hash'),
             'full_hash': ctx.get('full_hash'),
-            'perceptual_hash': ctx.get('perceptual_hash')
+            'perceptual_hash': ctx.get('perceptual_hash'),
+            'error': ctx.get('error')
         }
 
-    def _full_pass(self, item: tuple) -> Optional[ScanContext]:
+    def _bundle_pass(self, item: FileIndex) -> Optional[Dict[str, any]]:
+        """Compute the real size of an atomic folder (cached by directory mtimes)."""
+        ctx = bundles.size_bundle(ScanContext(
+            path=item.path,
+            bundle_bytes=item.bundle_bytes,
+            bundle_files=item.bundle_files,
+            bundle_signature=item.bundle_signature
+        ))
+        if (ctx.get('bundle_signature') == item.bundle_signature and
+                ctx.get('bundle_bytes') == item.bundle_bytes == item.size_bytes):
+            # Cache hit and nothing to restore: no write needed
+            return None
+
+        return {
+            'id': item.id,
+            'size_bytes': ctx.get('bundle_bytes'),
+            'bundle_bytes': ctx.get('bundle_bytes'),
+            'bundle_files': ctx.get('bundle_files'),
+            'bundle_signature': ctx.get('bundle_signature')
+        }
+
+    def _archive_pass(self, item: FileIndex) -> Dict[str, any]:
+        """List the members of an archive without extracting it."""
+        ctx = archives.list_members(ScanContext(path=item.path))
+        return {
+            'id': item.id,
+            'path': item.path,
+            'archive_members': len(ctx['members']),
+            'members': ctx['members']
+        }
+
+    def _registered_pass(self, spec: Pass, item: FileIndex) -> Dict[str, any]:
+        """Run a registered pass on one file: its inputs in, its outputs out."""
+        ctx = ScanContext({column: getattr(item, column) for column in spec.needs})
+        ctx = spec.load()(ctx)
+        return {'id': item.id, **{column: ctx.get(column) for column in spec.outputs}}
+
+    def _adaptive(self, name: str, worker_func):
+        """worker_func under a ConcurrencyController, with settings.adaptive_concurrency."""
+        if not settings.adaptive_concurrency:
+            return worker_func
+        return ConcurrencyController(name).wrap(worker_func)
+
+    def _busy(self, func):
+        """func, counted as a busy worker of the running pass (see RunRecorder.worker_started)."""
+        def run(*args):
+            recorder = self.recorder
+            if recorder is None:
+                return func(*args)
+            recorder.worker_started()
+            try:
+                return func(*args)
+            finally:
+                recorder.worker_finished()
+        return run
+
+    def _threads(self, name: str, worker_func) -> ThreadBackend:
+        """
+        worker_func on the thread pool, under self.control and, with
+        settings.adaptive_concurrency, a ConcurrencyController.
+        """
+        controller = ConcurrencyController(name) if settings.adaptive_concurrency else None
+        func = self._busy(worker_func)
+        if controller is not None:
+            func = controller.wrap(func)
+        return ThreadBackend(get_executor(), self.control.wrap(func), controller)
+
+    def _backend(self, pass_name: str, worker_func):
+        """Execution backend of a pass, per settings.pass_backends."""
+        threads = self._threads(pass_name.capitalize(), worker_func)
+        if backend_for(pass_name) != 'process':
+            return threads
+        if pass_name == 'categorize':
+            return ProcessBackend(
+                categorization.categorize_batch,
+                encode=lambda item: (item.id, item.path, item.filename, item.size_bytes),
+                decode=lambda row: dict(zip(('id', 'category', 'mime_type', 'extension'), row)),
+                control=self.control,
+                executor=get_executor(),
+                track=self._busy,
+            )
+        if pass_name == 'hash':
+            # Only images and audio need the CPU (decoding, fingerprints); plain
+            # content hashing is I/O-bound and stays on threads
+            return ProcessBackend(
+                hashing.hash_batch,
+                encode=lambda item: (item.id, item.path, item.size_bytes, item.category),
+                decode=lambda row: dict(zip(('id', 'fast_hash', 'full_hash', 'perceptual_hash', 'error'), row)),
+                fallback=threads,
+                cpu_bound=lambda item: hashing.is_cpu_bound(item.category),
+                control=self.control,
+                track=self._busy,
+            )
+        return threads
+
+    def _full_pass(self, item: WalkEntry) -> Optional[ScanContext]:
         """Run all passes in sequence for single item."""
         ctx = self._index_pass(item)
         if not ctx:
@@ -112,142 +268,827 @@ class PipelineManager:
         if ctx.get('entry_type') == 'bundle':
             return ctx
             
-        ctx = categorization.detect_type(ctx)
-        ctx = hashing.compute_hashes(ctx)
-        return ctx
+        return content.analyze(ctx)
+
 
 
+    def run_index(self, root_path: str, progress_callback=None, walker: Optional[str] = None, incremental: Optional[bool] = None):
+        """Index root_path.
 
-    def run_index(self, root_path: str, progress_callback=None):
-        return self._run_fs_pipeline(root_path, self._index_pass, progress_callback)
+        walker selects the traversal ('sequential', 'parallel'); defaults to settings.walker.
+        incremental only re-lists directories changed since the last scan; defaults to settings.incremental.
+        """
+        return self._run_walk(root_path, self._index_pass, progress_callback, walker, incremental)
         
     def run_categorize(self, progress_callback=None):
         # Fetch unsorted items
         query = FileIndex.select().where(FileIndex.category.is_null())
-        return self._run_db_pipeline(query, self._categorize_pass, progress_callback)
+        return self._run_db_pipeline(paginate(query), self._categorize_pass, progress_callback, "Categorize",
+                                     backend=self._backend('categorize', self._categorize_pass))
         
-    def run_hash(self, progress_callback=None):
-        # Fetch unhashed items (ignoring bundles)
+    def run_bundle_sizes(self, progress_callback=None):
+        """Size every atomic folder in parallel. Unchanged bundles only cost a walk of their directories."""
+        query = FileIndex.select().where(FileIndex.entry_type == 'bundle')
+        return self._run_db_pipeline(paginate(query), self._bundle_pass, progress_callback, "Bundles")
+
+    def run_archives(self, progress_callback=None):
+        """Index the members of archives not listed yet (or changed since)."""
+        # Members of archives that left the index
+        ArchiveMember.delete().where(ArchiveMember.archive.not_in(FileIndex.select(FileIndex.path))).execute()
+        is_archive = None
+        for suffix in archives.ARCHIVE_SUFFIXES:
+            clause = FileIndex.path.endswith(suffix)
+            is_archive = clause if is_archive is None else (is_archive | clause)
+        query = FileIndex.select(FileIndex.id, FileIndex.path, FileIndex.device, FileIndex.size_bytes).where(
+            (FileIndex.entry_type == 'file') &
+            (FileIndex.archive_members.is_null()) &
+            is_archive
+        )
+        return self._run_db_pipeline(paginate(query), self._archive_pass, progress_callback, "Archives",
+                                     flush=self._flush_archives)
+
+    def hash_query(self, order: Optional[str] = None, quarantined: Optional[bool] = False):
+        """Unhashed files (ignoring bundles), one path per inode: hard links are hashed once.
+
+        A link is left out while a lower id of its inode is unhashed, and
+        once any of them holds a hash for the same size and mtime, so paging
+        through the query never reads an inode twice in one run.
+
+        order 'reclaim' (default: settings.hash_order) puts first the files
+        that share their size with another inode, largest first: the likely
+        duplicates that free the most space once confirmed. Hard links of
+        the same inode do not count: they take no extra space.
+
+        Files whose last attempt failed are skipped until their retry time
+        (see quarantine); quarantined=True selects only the files with a
+        recorded failure, whatever their retry time, and None all files.
+        """
+        Sibling = FileIndex.alias()
+        earlier_link = Sibling.select().where(
+            (Sibling.device == FileIndex.device) &
+            (Sibling.inode == FileIndex.inode) &
+            (Sibling.id < FileIndex.id) &
+            (Sibling.full_hash.is_null()) &
+            (Sibling.entry_type == 'file')
+        )
+        # A link whose inode got its hash earlier in the run (an earlier
+        # page) takes it from _share_inode_hashes instead of being read
+        hashed_link = Sibling.select().where(
+            (Sibling.device == FileIndex.device) &
+            (Sibling.inode == FileIndex.inode) &
+            (Sibling.size_bytes == FileIndex.size_bytes) &
+            (Sibling.modified_at == FileIndex.modified_at) &
+            (Sibling.full_hash.is_null(False))
+        )
         query = FileIndex.select().where(
             (FileIndex.full_hash.is_null()) & 
-            (FileIndex.entry_type == 'file')
+            (FileIndex.entry_type == 'file') &
+            ~fn.EXISTS(earlier_link) &
+            ~fn.EXISTS(hashed_link)
         )
-        return self._run_db_pipeline(query, self._hash_pass, progress_callback)
+        if quarantined:
+            query = query.where(FileIndex.path.in_(HashFailure.select(HashFailure.path)))
+        elif quarantined is not None:
+            query = query.where(~quarantine.is_quarantined())
+        order = order or settings.hash_order
+        if order == 'reclaim':
+            shared = FileIndex.size_bytes.in_(self._shared_sizes())
+            query = query.order_by(Case(None, [(shared, 0)], 1), FileIndex.size_bytes.desc())
+        elif order != 'index':
+            raise ValueError(f"Unknown hash order '{order}' (expected index or reclaim)")
+        return query
+
+    def _hash_pages(self, order: Optional[str] = None, quarantined: Optional[bool] = False):
+        """hash_query(order, quarantined) read in keyset pages (see paginate).
 
-    def run_all(self, root_path: str, progress_callback=None):
-        return self._run_fs_pipeline(root_path, self._full_pass, progress_callback)
+        For 'reclaim', the files sharing their size with another inode are
+        paged first, then the others, each down the size_bytes index.
+        """
+        query = self.hash_query(order, quarantined).order_by()
+        if (order or settings.hash_order) != 'reclaim':
+            return paginate(query)
+        Sibling = FileIndex.alias()
+        shared = fn.EXISTS(Sibling.select().where(
+            (Sibling.size_bytes == FileIndex.size_bytes) &
+            (Sibling.id != FileIndex.id) &
+            (Sibling.entry_type == 'file') &
+            # Not a hard link of the same inode (rows without one count as their own)
+            (Sibling.inode.is_null() | FileIndex.inode.is_null() |
+             (Sibling.device != FileIndex.device) | (Sibling.inode != FileIndex.inode))
+        ))
+        keys = (FileIndex.size_bytes, FileIndex.id)
+        return chain(paginate(query.where(shared), keys, descending=True),
+                     paginate(query.where(~shared), keys, descending=True))
+
+    @staticmethod
+    def _shared_sizes():
+        """
+        Sizes held by more than one inode: the only ones that can be
+        duplicates (hard links of one inode are a single copy).
+        """
+        # (device, inode) as one value; a row without an inode stands for its own
+        inode = fn.COALESCE(FileIndex.device.cast('TEXT').concat(':').concat(FileIndex.inode),
+                            fn.printf('#%d', FileIndex.id))
+        return (FileIndex
+                .select(FileIndex.size_bytes)
+                .where(FileIndex.entry_type == 'file')
+                .group_by(FileIndex.size_bytes)
+                .having(fn.COUNT(fn.DISTINCT(inode)) > 1))
+
+    def unverified_bytes(self) -> Dict[str, int]:
+        """Unhashed files that share a size with another file: bytes still to read to settle every duplicate."""
+        row = (FileIndex
+               .select(fn.COUNT(FileIndex.id).alias('count'), fn.SUM(FileIndex.size_bytes).alias('bytes'))
+               .where((FileIndex.full_hash.is_null()) &
+                      (FileIndex.entry_type == 'file') &
+                      (FileIndex.size_bytes.in_(self._shared_sizes())))
+               .dicts()
+               .get())
+        return {'count': row['count'] or 0, 'bytes': row['bytes'] or 0}
+
+    def run_hash(self, progress_callback=None, order: Optional[str] = None, time_budget: Optional[float] = None,
+                 quarantined: Optional[bool] = False):
+        """Hash unhashed files in hash_query(order) order.
+
+        With a time_budget (default: settings.hash_time_budget) in seconds,
+        no file is started once it is spent; files already reading finish
+        and the rest waits for the next run.
+
+        Files that fail are quarantined (see _flush_hashes) and skipped by
+        later runs until their retry time; quarantined=True retries only
+        them, right away.
+        """
+        if time_budget is None:
+            time_budget = settings.hash_time_budget
+        stop_at = time.monotonic() + time_budget if time_budget else None
+        # Links to an inode hashed in an earlier run need no I/O at all
+        self._share_inode_hashes()
+        count = self._run_db_pipeline(self._hash_pages(order, quarantined), self._hash_pass, progress_callback, "Hash",
+                                      flush=self._flush_hashes, backend=self._backend('hash', self._hash_pass),
+                                      stop_at=stop_at)
+        # Hand each fresh result to the other paths of the same inode
+        self._share_inode_hashes()
+        return count
+
+    def _share_inode_hashes(self) -> int:
+        """Copies hashes to unhashed rows that share device, inode, size and mtime with a hashed row."""
+        Sibling = FileIndex.alias()
+
+        def sibling_value(field):
+            return (Sibling
+                    .select(getattr(Sibling, field.name))
+                    .where((Sibling.device == FileIndex.device) &
+                           (Sibling.inode == FileIndex.inode) &
+                           (Sibling.size_bytes == FileIndex.size_bytes) &
+                           (Sibling.modified_at == FileIndex.modified_at) &
+                           (Sibling.full_hash.is_null(False)))
+                    .limit(1))
+
+        with db.atomic():
+            return (FileIndex
+                    .update({field: sibling_value(field) for field in
+                             (FileIndex.fast_hash, FileIndex.full_hash, FileIndex.perceptual_hash)})
+                    .where((FileIndex.full_hash.is_null()) &
+                           (FileIndex.entry_type == 'file') &
+                           (FileIndex.inode.is_null(False)) &
+                           fn.EXISTS(sibling_value(FileIndex.full_hash)))
+                    .execute())
+
+    def run_all(self, root_path: str, progress_callback=None, walker: Optional[str] = None, incremental: Optional[bool] = None):
+        """Index, categorize and hash root_path in one stream (see _run_staged).
+
+        Walks are checkpointed and resumed as in run_index.
+        """
+        if incremental is None:
+            incremental = settings.incremental
+        if not incremental:
+            walk = self._resumable_walk(root_path, walker)
+            if walk is None:
+                return self._run_staged(get_walker(walker)(Path(root_path)), progress_callback, root_path)
+            result = self._run_staged(walk.walk(), progress_callback, root_path, checkpoint=walk.checkpoint)
+            # Cancelled: the last checkpoint saved during the run stays for the next one
+            if not self.control.cancelled:
+                walk.finish()
+            result['resumed'] = walk.resumed
+            return result
+
+        from ..incremental import IncrementalWalker
+        writer = DatabaseWriter()
+        inc = IncrementalWalker(Path(root_path), writer)
+        walk = inc.walk()
+        if not shared_across_threads():
+            # The walk reads the database, which the pipeline's source thread cannot open
+            walk = iter(list(walk))
+        result = self._run_staged(walk, progress_callback, root_path, writer=writer)
+        if not self.control.cancelled:
+            inc.commit()
+        result.update(inc.stats)
+        return result
+
+    def run_pass(self, name: str, progress_callback=None):
+        """Run the registered pass name on the files it has not filled yet (see registry.Pass)."""
+        spec = registry.passes()[name]
+        if spec.runner:
+            return getattr(self, spec.runner)(progress_callback)
+        query = FileIndex.select(FileIndex.id, *[getattr(FileIndex, c) for c in spec.needs]).where(spec.pending())
+        worker = partial(self._registered_pass, spec)
+        return self._run_db_pipeline(paginate(query), worker, progress_callback, spec.name.capitalize())
+
+    def run_target(self, column: str, progress_callback=None) -> Dict[str, any]:
+        """Fill column with the fewest passes (registry.plan).
+
+        A pass is skipped when no file is pending for it, or when a library
+        it requires is not installed. Returns the files processed per pass
+        ('counts') and the passes that could not run ('skipped'): column is
+        only complete when the latter is empty.
+        """
+        counts = {}
+        skipped = []
+        for spec in registry.plan(column):
+            if not spec.available():
+                logger.warning(f"Skipping the {spec.name} pass: {', '.join(spec.requires)} not installed")
+                skipped.append(spec.name)
+                continue
+            if not FileIndex.select().where(spec.pending()).exists():
+                logger.debug(f"Skipping the {spec.name} pass: {', '.join(spec.outputs)} up to date")
+                continue
+            result = self.run_pass(spec.name, progress_callback)
+            counts[spec.name] = result['count'] if isinstance(result, dict) else result
+        return {'counts': counts, 'skipped': skipped}
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Items waiting in front of each stage of the running staged pipeline (empty when idle)."""
+        pipeline = self.pipeline
+        return pipeline.depths() if pipeline is not None else {}
+
+    def index_entries(self, entries):
+        """Index an explicit list of walk records (e.g. files reported by the watcher)."""
+        return self._run_fs_pipeline(iter(entries), self._index_pass, None, record=False)
+
+    def _run_walk(self, root_path, worker_func, progress_callback, walker, incremental):
+        """Pick the walker and feed it to the filesystem pipeline."""
+        if incremental is None:
+            incremental = settings.incremental
+        if not incremental:
+            walk = self._resumable_walk(root_path, walker)
+            if walk is None:
+                return self._run_fs_pipeline(get_walker(walker)(Path(root_path)), worker_func, progress_callback,
+                                             root=root_path)
+
+            result = self._run_fs_pipeline(walk.walk(), worker_func, progress_callback, checkpoint=walk.checkpoint,
+                                           root=root_path)
+            if self.control.cancelled:
+                # Everything listed is written: the next run resumes from here
+                walk.checkpoint()()
+            else:
+                walk.finish()
+            result['resumed'] = walk.resumed
+            return result
+
+        from ..incremental import IncrementalWalker
+        if walker and walker != 'sequential':
+            logger.info(f"Incremental rescans walk sequentially (ignoring walker '{walker}')")
+        writer = DatabaseWriter()
+        inc = IncrementalWalker(Path(root_path), writer)
+        result = self._run_fs_pipeline(inc.walk(), worker_func, progress_callback, root=root_path, writer=writer)
+        # Records are flushed: the directory snapshots can now be trusted (unless the walk was cut short)
+        if not self.control.cancelled:
+            inc.commit()
+        result.update(inc.stats)
+        return result
+
+    @staticmethod
+    def _resumable_walk(root_path, walker):
+        """
+        Sequential full walks checkpoint their frontier and resume after an
+        interruption: the loaded ResumableWalk of root_path, or None for
+        walks that are not checkpointed.
+        """
+        if (walker or settings.walker) != 'sequential' or not settings.checkpoint_interval:
+            return None
+        from ..checkpoint import ResumableWalk
+        walk = ResumableWalk(Path(root_path))
+        walk.load()
+        return walk
 
     # --- Pipeline Engines ---
 
-    def _run_fs_pipeline(self, root_path, worker_func, progress_callback):
-        """Process files from filesystem to database using a sliding window."""
+    def _run_fs_pipeline(self, walker, worker_func, progress_callback, checkpoint=None, root=None, record=True,
+                         writer=None):
+        """Process files from filesystem to database using a sliding window.
+
+        With settings.chunked_submission, each executor task handles a chunk
+        of items whose size adapts to the measured per-item time (see
+        AdaptiveChunker), instead of one future per file. With
+        settings.adaptive_concurrency, a ConcurrencyController sets how many
+        tasks run at once.
+
+        Rows are written by a DatabaseWriter thread (writer, or a new one),
+        so dispatching goes on while SQLite commits; everything is committed
+        and the writer closed when this returns.
+
+        checkpoint is called every settings.checkpoint_interval seconds once
+        the window is drained, and the save function it returns is queued on
+        the writer behind every record the walker produced so far.
+
+        No chunk is handed out while self.control is paused, and a cancel
+        stops the walk; chunks already submitted are still written.
+
+        With record, the run is saved as a ScanRun (see RunRecorder).
+        """
         import concurrent.futures
+        from itertools import islice
         
         buffer = []
         total = 0
         total_bytes = 0
         executor = get_executor()
-        walker = smart_walk(Path(root_path))
+        self.control.begin("index")
+        progress_callback = self.control.counter(progress_callback)
+        run = self.recorder = RunRecorder("index", root)
+        chunk_func, item_func = self._busy(run_chunk), self._busy(worker_func)
+        chunker = AdaptiveChunker() if settings.chunked_submission else None
+        controller = ConcurrencyController("Index") if settings.adaptive_concurrency else None
+        writer = writer or DatabaseWriter()
         
         max_queued = settings.batch_size
-        futures = set()
+        futures = {}  # future -> number of items
+        queued = 0
+        last_checkpoint = time.monotonic()
         
         def fill_pool():
-            nonlocal total_bytes
-            while len(futures) < max_queued:
+            nonlocal queued
+            # The controller's limit caps the tasks submitted: none waits in the pool for a slot
+            while queued < max_queued and (controller is None or len(futures) < controller.limit):
+                if not self.control.wait():
+                    return False
+                if chunker is not None:
+                    chunk = list(islice(walker, chunker.size))
+                    if not chunk:
+                        return False
+                    if controller is not None:
+                        future = executor.submit(controller.run, chunk_func, worker_func, chunk, items=len(chunk))
+                    else:
+                        future = executor.submit(chunk_func, worker_func, chunk)
+                    futures[future] = len(chunk)
+                    queued += len(chunk)
+                    continue
                 try:
                     item = next(walker)
-                    futures.add(executor.submit(worker_func, item))
                 except StopIteration:
                     return False
+                if controller is not None:
+                    futures[executor.submit(controller.run, item_func, item)] = 1
+                else:
+                    futures[executor.submit(item_func, item)] = 1
+                queued += 1
             return True
 
-        has_more = fill_pool()
-        
-        while futures:
-            done, futures = concurrent.futures.wait(
-                futures, return_when=concurrent.futures.FIRST_COMPLETED
-            )
-            
+        def collect(done):
+            nonlocal buffer, total, total_bytes, queued
             for future in done:
+                items = futures.pop(future)
+                queued -= items
                 try:
-                    result = future.result()
+                    if chunker is not None:
+                        results, elapsed = future.result()
+                        chunker.observe(items, elapsed)
+                    else:
+                        results = [future.result()]
+                except Exception as e:
+                    logger.error(f"FS Worker failed: {e}", exc_info=True)
+                    run.error(items)
+                    continue
+
+                for result in results:
                     if result:
                         buffer.append(result)
                         total += 1
                         total_bytes += result.get('size_bytes', 0)
-                        if progress_callback:
-                            progress_callback()
+                        run.add(result.get('size_bytes', 0))
+                        progress_callback()
                     
-                    if len(buffer) >= (max_queued // 10):
-                        self._flush_insert(buffer)
-                        buffer = []
-                except Exception as e:
-                    from ...utils.logger import logger
-                    logger.error(f"FS Worker failed: {e}", exc_info=True)
+                if len(buffer) >= (max_queued // 10):
+                    writer.write(self._flush_insert, buffer)
+                    buffer = []
+
+        try:
+            has_more = fill_pool()
             
-            if has_more:
-                has_more = fill_pool()
-        
-        if buffer:
-            self._flush_insert(buffer)
+            while futures:
+                done, _ = concurrent.futures.wait(
+                    futures, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                collect(done)
+    
+                if checkpoint and has_more and time.monotonic() - last_checkpoint >= settings.checkpoint_interval:
+                    # Drain the window so nothing in flight is lost on resume
+                    done, _ = concurrent.futures.wait(futures)
+                    collect(done)
+                    writer.write(self._flush_insert, buffer)
+                    buffer = []
+                    save = checkpoint()
+                    if save:
+                        writer.call(save)
+                    last_checkpoint = time.monotonic()
+                
+                if has_more:
+                    has_more = fill_pool()
+            
+            if buffer:
+                writer.write(self._flush_insert, buffer)
+        except Exception:
+            if record:
+                run.save('failed')
+            raise
+        finally:
+            self.recorder = None
+            writer.close()
+        self.control.end()
+        if record:
+            self._save_run(run)
         return {'count': total, 'bytes': total_bytes}
 
-    def _run_db_pipeline(self, query, worker_func, progress_callback):
-        """Process items from database using a sliding window."""
+    def _run_staged(self, walker, progress_callback, root=None, writer=None, checkpoint=None):
+        """
+        Walk -> stat -> content as a staged pipeline.
+
+        Each file is opened once: content.analyze() takes the magic bytes,
+        the fast hash and the full hash from the same read, and results go
+        straight to the database writer instead of being written after
+        indexing and read back by the categorize and hash passes. Bundles
+        pass through without categorization or hashing.
+
+        Files already categorized and hashed with the same size and mtime
+        are not read again (see _known_files), so a scan that was cancelled
+        or killed picks up where it stopped. Files that fail to hash are
+        quarantined as in run_hash.
+
+        The content stage follows the settings of the separate passes: with
+        settings.io_scheduling, the stage sorts its input per device and
+        each device has at most its own number of readers (see Stage and
+        DeviceScheduler): workers go to whichever device has a free slot
+        instead of waiting for a busy one, and with the 'process' backend for hash,
+        perceptual hashes and fingerprints are computed in the process pool.
+        Items move between stages through queues, so there is no executor
+        submission to chunk (settings.chunked_submission does not apply).
+
+        checkpoint (ResumableWalk.checkpoint) is called on the walking thread
+        every settings.checkpoint_interval seconds; the save it returns is
+        queued on the writer once every record walked before it is written.
+
+        Pausing self.control holds the content workers (the bounded queues
+        then hold the walk); cancel() stops every stage. The run is saved as
+        a ScanRun; unchanged files count as files but not as bytes read.
+
+        Rows go through writer (or a new DatabaseWriter), closed on return.
+        The walker runs on the pipeline's source thread.
+        """
+        known = self._known_files()
+        scheduler = DeviceScheduler() if settings.io_scheduling else None
+        media = None
+        if backend_for('hash') == 'process':
+            media = ProcessBackend(
+                hashing.media_batch,
+                encode=lambda ctx: (ctx['path'], ctx['category']),
+                decode=lambda row: row,
+                batch_size=1,
+            )
+        # (records walked, save) of the checkpoints taken on the walking thread
+        checkpoints = deque()
+
+        def numbered():
+            # Items are numbered so the consumer knows when all those walked before a checkpoint are done
+            last = time.monotonic()
+            for seq, entry in enumerate(walker):
+                yield seq, entry
+                if checkpoint and time.monotonic() - last >= settings.checkpoint_interval:
+                    checkpoints.append((seq + 1, checkpoint()))
+                    last = time.monotonic()
+
+        def stat(item):
+            seq, entry = item
+            ctx = self._index_pass(entry)
+            if not ctx:
+                # Vanished since the listing: still reported, with nothing to write
+                return ScanContext(seq=seq, entry_type=None)
+            ctx['seq'] = seq
+            if ctx['entry_type'] == 'file' and known(ctx):
+                ctx['unchanged'] = True
+            return ctx
+
+        def read(ctx):
+            if media is None:
+                content.analyze(ctx)
+                return
+            content.analyze(ctx, media=False)
+            if ctx.get('category') and hashing.is_cpu_bound(ctx['category']):
+                fingerprint, perceptual = media.submit(ctx).result()
+                if fingerprint is not None:
+                    ctx['fast_hash'] = fingerprint
+                ctx['perceptual_hash'] = perceptual
+
+        read = self._busy(read)
+
+        def analyze(ctx):
+            if ctx['entry_type'] != 'file' or ctx.get('unchanged'):
+                return ctx
+            try:
+                read(ctx)
+            except ScanInterrupted:
+                raise
+            except Exception as e:
+                # Still reported (to release the checkpoints), but not written
+                logger.error(f"Scan failed for {ctx['path']}: {e}", exc_info=True)
+                ctx['failed'] = True
+            return ctx
+
+        depth = settings.batch_size
+        # Cancelled items come out as None and are dropped
+        content_stage = self.control.wrap(self._adaptive("Scan", analyze))
+
+        def device(ctx):
+            if ctx['entry_type'] != 'file' or ctx.get('unchanged'):
+                return None
+            return ctx['device'], ctx['size_bytes']
+
+        self.pipeline = StagedPipeline(numbered(), [
+            Stage("stat", stat, 1, depth),
+            Stage("content", content_stage, concurrency_bound(), depth,
+                  scheduler=scheduler, device=device),
+        ], output_size=depth)
+
+        buffer = []
+        errors = {}
+        total = 0
+        total_bytes = 0
+        unchanged = 0
+        # Items with a lower number than walked are all done; finished holds the ones done out of order
+        walked = 0
+        finished = set()
+        last_log = time.monotonic()
+        writer = writer or DatabaseWriter()
+        self.control.begin("all")
+        progress_callback = self.control.counter(progress_callback)
+        run = self.recorder = RunRecorder("all", root)
+
+        def flush():
+            nonlocal buffer, errors
+            writer.write(self._flush_insert, buffer)
+            buffer = []
+            if errors:
+                # After the rows: record() reads their size and mtime
+                writer.call(partial(quarantine.record, errors))
+                errors = {}
+
+        try:
+            for ctx in self.pipeline.run():
+                finished.add(ctx['seq'])
+                while walked in finished:
+                    finished.discard(walked)
+                    walked += 1
+                if ctx['entry_type'] is None:
+                    pass
+                elif ctx.get('failed'):
+                    run.error()
+                else:
+                    total += 1
+                    total_bytes += ctx.get('size_bytes', 0)
+                    progress_callback()
+                    if ctx.get('unchanged'):
+                        unchanged += 1
+                        run.add(0)
+                    else:
+                        run.add(ctx.get('size_bytes', 0), ctx.get('error'))
+                        buffer.append({name: ctx.get(name) for name in STAGED_COLUMNS})
+                        if ctx.get('error'):
+                            errors[ctx['path']] = ctx['error']
+                        if len(buffer) >= depth // 10:
+                            flush()
+                while checkpoints and checkpoints[0][0] <= walked:
+                    flush()
+                    writer.call(checkpoints.popleft()[1])
+                last_log = log_depths(self.pipeline, 5.0, last_log)
+            flush()
+            run.error(sum(stats['errors'] for stats in self.pipeline.stats().values()))
+        except Exception:
+            run.save('failed')
+            raise
+        finally:
+            self.pipeline = None
+            self.recorder = None
+            writer.close()
+        if scheduler is not None:
+            scheduler.log_report("Scan")
+        self.control.end()
+        self._save_run(run)
+        return {'count': total, 'bytes': total_bytes, 'unchanged': unchanged}
+
+    @staticmethod
+    def _known_files():
+        """
+        known(ctx): True when ctx's file is already in the database,
+        categorized and hashed (or quarantined), with the same size and mtime.
+
+        Rows are fetched a directory at a time (walkers list the files of a
+        directory together) on the calling thread's own connection. With an
+        in-memory database, which other threads cannot see, nothing is known.
+        """
+        if not shared_across_threads():
+            return lambda ctx: False
+        directories = {}
+
+        def known(ctx):
+            parent = ctx['parent']
+            rows = directories.get(parent)
+            if rows is None:
+                if len(directories) >= 256:
+                    directories.clear()
+                query = (FileIndex
+                         .select(FileIndex.path, FileIndex.size_bytes, FileIndex.modified_at)
+                         .where((FileIndex.parent == parent) &
+                                (FileIndex.category.is_null(False)) &
+                                (FileIndex.full_hash.is_null(False) | quarantine.is_quarantined()))
+                         .tuples())
+                rows = directories[parent] = {path: (size, mtime) for path, size, mtime in query}
+            return rows.get(ctx['path']) == (ctx['size_bytes'], ctx['modified_at'])
+        return known
+
+    def _run_db_pipeline(self, items, worker_func, progress_callback, pass_name: Optional[str] = None, flush=None,
+                         backend=None, stop_at: Optional[float] = None):
+        """Process items from database using a sliding window.
+
+        items are rows read by the caller, in keyset pages (see paginate)
+        so no cursor stays open on this thread while results are written.
+
+        Items run on backend (default: worker_func on the thread pool, under
+        a ConcurrencyController).
+        Results are written with flush (default: _flush_update) on a
+        DatabaseWriter thread; all of them are committed when this returns.
+
+        With settings.io_scheduling, items are released per device (st_dev)
+        so each disk only sees its own number of concurrent readers, and
+        per-device throughput is logged under pass_name at the end.
+
+        Past stop_at (a time.monotonic() value) no item is started: the ones
+        in flight complete and the others are left for a later run. The
+        same goes for a cancel of self.control; while it is paused, no item
+        is handed out.
+        """
         import concurrent.futures
         
         buffer = []
         total = 0
-        executor = get_executor()
+        backend = backend or self._threads(pass_name or "Worker", worker_func)
+        controller = getattr(backend, 'controller', None)
+        flush = flush or self._flush_update
         chunk_size = settings.batch_size
+        scheduler = DeviceScheduler() if settings.io_scheduling else None
+        writer = DatabaseWriter()
+        self.control.begin(pass_name or "worker")
+        progress_callback = self.control.counter(progress_callback)
+        run = self.recorder = RunRecorder((pass_name or "worker").lower())
         
-        query_iterator = query.iterator()
-        futures = set()
+        query_iterator = iter(items)
+        futures = {}  # future -> item
+        exhausted = False
+        stopped = False
+
+        def room() -> int:
+            # The controller's limit caps the items submitted: none waits in the pool for a slot
+            window = chunk_size if controller is None else min(chunk_size, controller.limit)
+            return window - len(futures)
         
         def fill_pool():
-            while len(futures) < chunk_size:
+            nonlocal exhausted, stopped
+            if not stopped:
+                cancelled = not self.control.wait()
+                if cancelled or (stop_at is not None and time.monotonic() >= stop_at):
+                    if not cancelled:
+                        logger.warning(f"{pass_name or 'Pass'}: time budget spent, stopping after {total} items")
+                    stopped = exhausted = True
+                    if scheduler is not None:
+                        scheduler.clear()
+            while room() > 0:
+                if scheduler is not None:
+                    for item in scheduler.ready(room()):
+                        futures[backend.submit(item)] = item
+                    # Keep reading only while the device backlog has room
+                    if exhausted or room() <= 0 or scheduler.pending() >= chunk_size:
+                        return
+                elif exhausted:
+                    return
                 try:
                     item = next(query_iterator)
-                    futures.add(executor.submit(worker_func, item))
                 except StopIteration:
-                    return False
-            return True
+                    exhausted = True
+                    continue
+                if scheduler is not None:
+                    scheduler.push(item, item.device)
+                else:
+                    futures[backend.submit(item)] = item
 
-        has_more = fill_pool()
+        try:
+            fill_pool()
+            backend.flush()
         
-        while futures:
-            done, futures = concurrent.futures.wait(
-                futures, return_when=concurrent.futures.FIRST_COMPLETED
-            )
+            while futures:
+                done, _ = concurrent.futures.wait(
+                    futures, return_when=concurrent.futures.FIRST_COMPLETED
+                )
             
-            for future in done:
-                try:
-                    result = future.result()
-                    if result:
-                        buffer.append(result)
-                        total += 1
-                        if progress_callback:
+                for future in done:
+                    item = futures.pop(future)
+                    if scheduler is not None:
+                        scheduler.done(item.device, item.size_bytes)
+                    try:
+                        result = future.result()
+                        if result:
+                            buffer.append(result)
+                            total += 1
+                            run.add(getattr(item, 'size_bytes', 0), result.get('error'))
                             progress_callback()
-                        
+                    except Exception as e:
+                        logger.error(f"DB Worker failed: {e}", exc_info=True)
+                        run.error()
+                    
                     if len(buffer) >= (chunk_size // 10):
-                        self._flush_update(buffer)
+                        writer.write(flush, buffer)
                         buffer = []
-                except Exception as e:
-                    from ...utils.logger import logger
-                    logger.error(f"DB Worker failed: {e}", exc_info=True)
             
-            if has_more:
-                has_more = fill_pool()
+                fill_pool()
+                backend.flush()
                     
-        if buffer:
-            self._flush_update(buffer)
+            writer.write(flush, buffer)
+        except Exception:
+            run.save('failed')
+            raise
+        finally:
+            self.recorder = None
+            writer.close()
+        if scheduler is not None and pass_name:
+            scheduler.log_report(pass_name)
+        self.control.end()
+        self._save_run(run)
         return total
 
+    def _save_run(self, run: RunRecorder):
+        """Records a finished pass; passes that found nothing to do are not kept."""
+        if run.files or run.errors:
+            run.save('cancelled' if self.control.cancelled else 'completed')
+
     def _flush_insert(self, data):
+        """Insert new rows; rows whose size or mtime changed are refreshed.
+
+        A changed file gets the new values for every column (for the index
+        pass: no category and no hashes), so later passes pick it up again.
+        Unchanged rows are left alone, except to backfill `parent`, `device`
+        and `inode`, and the category and hashes when they were still missing.
+        """
+        # A bundle's size_bytes holds its measured content, not the directory
+        # inode size the walker reports, so only its mtime counts
+        changed = (FileIndex.modified_at != EXCLUDED.modified_at) | (
+            (FileIndex.size_bytes != EXCLUDED.size_bytes) & (EXCLUDED.entry_type == 'file'))
+        # Location and identity columns are always refreshed
+        always = ('parent', 'device', 'inode')
+        update = {getattr(FileIndex, name): getattr(EXCLUDED, name) for name in always if name in data[0]}
+        for name in data[0]:
+            if name == 'path' or name in always:
+                continue
+            field = getattr(FileIndex, name)
+            update[field] = Case(None, [(changed | field.is_null(), getattr(EXCLUDED, name))], field)
+        update[FileIndex.is_duplicate] = Case(None, [(changed, False)], FileIndex.is_duplicate)
+        update[FileIndex.group_id] = Case(None, [(changed, None)], FileIndex.group_id)
+        update[FileIndex.archive_members] = Case(None, [(changed, None)], FileIndex.archive_members)
+
         with db.atomic():
-            FileIndex.insert_many(data).on_conflict_ignore().execute()
+            (FileIndex.insert_many(data)
+             .on_conflict(conflict_target=[FileIndex.path], update=update,
+                          where=(changed | FileIndex.parent.is_null() | FileIndex.inode.is_null() |
+                                 (FileIndex.category.is_null() & EXCLUDED.category.is_null(False)) |
+                                 (FileIndex.full_hash.is_null() & EXCLUDED.full_hash.is_null(False))))
+             .execute())
             
+    def _flush_archives(self, data):
+        """Replace the member rows of each listed archive, then record the member counts."""
+        paths = [item['path'] for item in data]
+        rows = [dict(member, archive=item['path']) for item in data for member in item['members']]
+        with db.atomic():
+            for i in range(0, len(paths), 500):
+                ArchiveMember.delete().where(ArchiveMember.archive.in_(paths[i:i + 500])).execute()
+            for i in range(0, len(rows), 500):
+                ArchiveMember.insert_many(rows[i:i + 500]).execute()
+        self._flush_update([{'id': item['id'], 'archive_members': item['archive_members']} for item in data])
+
+    def _flush_hashes(self, data):
+        """Write hash results; files that failed enter (or stay in) the quarantine, the others leave it."""
+        errors = {item['id']: item.pop('error', None) for item in data}
+        paths = dict(FileIndex.select(FileIndex.id, FileIndex.path).where(FileIndex.id.in_(list(errors))).tuples())
+        with db.atomic():
+            self._flush_update(data)
+            quarantine.record({paths[i]: error for i, error in errors.items() if error and i in paths})
+            quarantine.release(paths[i] for i, error in errors.items() if not error and i in paths)
+
     def _flush_update(self, data):
         if not data: return
         
@@ -0,0 +1,34 @@
+"""Keyset pagination: database work read page by page instead of through one long cursor."""
+from typing import Iterator, Optional, Sequence
+from peewee import Field, Tuple
+from ..config import settings
+
+def paginate(query, keys: Optional[Sequence[Field]] = None, descending: bool = False,
+             page_size: Optional[int] = None) -> Iterator:
+    """
+    Rows of query, fetched settings.db_page_rows at a time.
+
+    Each page is a fresh statement that starts after the keys of the last
+    row seen (WHERE (keys) > (last) ORDER BY keys LIMIT n, the id by
+    default) and is read to the end before its rows are handed out. No
+    cursor stays open while the pass writes, so the read snapshot is
+    released between pages and WAL checkpoints can catch up during long
+    passes; rows already processed are never scanned again.
+
+    keys must identify a row (end with the primary key) and should be
+    indexed; any ordering on query is replaced by theirs.
+    """
+    keys = tuple(keys or (query.model._meta.primary_key,))
+    page_size = max(1, page_size or settings.db_page_rows)
+    ordering = [key.desc() if descending else key for key in keys]
+    last = None
+    while True:
+        page = query.order_by(*ordering)
+        if last is not None:
+            current, bound = (keys[0], last[0]) if len(keys) == 1 else (Tuple(*keys), Tuple(*last))
+            page = page.where(current < bound if descending else current > bound)
+        rows = list(page.limit(page_size))
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last = tuple(getattr(rows[-1], key.name) for key in keys)
@@ -0,0 +1,102 @@
+import tarfile
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from ...config import settings
+from ....utils.logger import logger
+
+# Suffixes whose members are listed (matched case-insensitively)
+ARCHIVE_SUFFIXES = ('.zip', '.jar', '.tar', '.tar.gz', '.tgz')
+
+# Rough in-memory cost of one listed member, on top of its name
+MEMBER_OVERHEAD = 512
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+def _member_cost(name: str) -> int:
+    return MEMBER_OVERHEAD + 2 * len(name)
+
+def _zip_datetime(date_time) -> Optional[datetime]:
+    try:
+        return datetime(*date_time)
+    except (TypeError, ValueError):
+        return None
+
+def _zip_directory_size(fp) -> Optional[Tuple[int, int]]:
+    """(entries, central directory bytes) from the end record, before zipfile loads anything."""
+    end_record = getattr(zipfile, "_EndRecData", None)
+    if end_record is None:
+        return None
+    endrec = end_record(fp)
+    if not endrec:
+        return None
+    return endrec[zipfile._ECD_ENTRIES_TOTAL], endrec[zipfile._ECD_SIZE]
+
+def _list_zip(path: str, limit: int) -> Tuple[List[Dict], bool]:
+    with open(path, "rb") as fp:
+        directory = _zip_directory_size(fp)
+        if directory and directory[0] * MEMBER_OVERHEAD + directory[1] > limit:
+            logger.warning(f"Archive directory of {path} ({directory[0]} members) exceeds the memory limit, skipped")
+            return [], True
+
+        members = []
+        with zipfile.ZipFile(fp) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                members.append({
+                    'member': info.filename,
+                    'size_bytes': info.file_size,
+                    'compressed_bytes': info.compress_size,
+                    'crc32': info.CRC,
+                    'modified_at': _zip_datetime(info.date_time),
+                })
+        return members, False
+
+def _list_tar(path: str, limit: int) -> Tuple[List[Dict], bool]:
+    members = []
+    used = 0
+    # Headers are read one at a time; member data is skipped, never extracted
+    with tarfile.open(path, "r:*") as archive:
+        while True:
+            info = archive.next()
+            if info is None:
+                return members, False
+            # TarFile keeps every header it has read: drop them as we go
+            archive.members = []
+            if not info.isfile():
+                continue
+            used += _member_cost(info.name)
+            if used > limit:
+                logger.warning(f"Archive {path} exceeds the memory limit, listed its first {len(members)} members")
+                return members, True
+            members.append({
+                'member': info.name,
+                'size_bytes': info.size,
+                'compressed_bytes': None,
+                'crc32': None,
+                'modified_at': datetime.fromtimestamp(info.mtime),
+            })
+
+def list_members(ctx: dict) -> dict:
+    """
+    Archive pass: lists the files stored in an archive from its central
+    directory (zip, jar) or headers (tar, tar.gz) without extracting them.
+    Listing stops at settings.archive_memory_limit bytes per archive.
+    Unreadable archives get an empty listing.
+    """
+    path = ctx['path']
+    limit = settings.archive_memory_limit
+    try:
+        if path.lower().endswith(('.zip', '.jar')):
+            members, truncated = _list_zip(path, limit)
+        else:
+            members, truncated = _list_tar(path, limit)
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as e:
+        logger.debug(f"Cannot list archive {path}: {e}")
+        members, truncated = [], False
+
+    ctx['members'] = members
+    ctx['members_truncated'] = truncated
+    return ctx
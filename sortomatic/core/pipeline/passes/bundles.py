@@ -0,0 +1,78 @@
+import hashlib
+import os
+from typing import Optional, Tuple
+
+def _iter_dirs(root: str):
+    """Yields (dirpath, entries) for root and every real sub-directory (symlinks are not followed)."""
+    stack = [root]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            with os.scandir(dirpath) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        yield dirpath, entries
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+            except OSError:
+                continue
+
+def directory_signature(root: str) -> Optional[str]:
+    """
+    Digest of the mtime of every directory in the bundle.
+    Adding, removing or renaming anything changes it, without stat'ing a
+    single file. Files rewritten in place keep the same signature.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    found = False
+    for dirpath, _entries in _iter_dirs(root):
+        try:
+            mtime_ns = os.stat(dirpath, follow_symlinks=False).st_mtime_ns
+        except OSError:
+            continue
+        found = True
+        digest.update(os.fsencode(os.path.relpath(dirpath, root)))
+        digest.update(mtime_ns.to_bytes(8, "little", signed=True))
+    return digest.hexdigest() if found else None
+
+def measure_bundle(root: str) -> Tuple[int, int]:
+    """
+    Total apparent size and number of regular files below root.
+    Hard links inside the bundle are counted once.
+    """
+    total_bytes = 0
+    total_files = 0
+    seen_links = set()
+    for _dirpath, entries in _iter_dirs(root):
+        for entry in entries:
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if st.st_nlink > 1:
+                key = (st.st_dev, st.st_ino)
+                if key in seen_links:
+                    continue
+                seen_links.add(key)
+            total_bytes += st.st_size
+            total_files += 1
+    return total_bytes, total_files
+
+def size_bundle(ctx: dict) -> dict:
+    """
+    Bundle sizing pass: fills bundle_bytes/bundle_files, reusing the cached
+    values while the directory signature is unchanged.
+    """
+    signature = directory_signature(ctx['path'])
+    if signature is None:
+        return ctx
+
+    if signature != ctx.get('bundle_signature') or ctx.get('bundle_bytes') is None:
+        ctx['bundle_bytes'], ctx['bundle_files'] = measure_bundle(ctx['path'])
+    ctx['bundle_signature'] = signature
+    return ctx
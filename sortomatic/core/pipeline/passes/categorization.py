@@ -3,21 +3,40 @@ try:
 except ImportError:
     filetype = None
 
-import threading
 from pathlib import Path
 from ...config import settings
+from ..deadlines import DeadlineExceeded, get_supervisor
 from ....l8n import Strings
 
-def detect_type(ctx: dict):
+# Bytes filetype looks at to recognise a format
+SIGNATURE_BYTES = 8192
+
+def _guess_kind(path: Path):
     """
-    Pass 1: Detects category and mime type.
+    Magic-byte detection within settings.categorization_timeout.
+    The header is read here (not by filetype) so the deadline can be
+    checked once it arrives; a late header is not matched.
+    """
+    deadline = get_supervisor().watch(
+        settings.categorization_timeout,
+        warning=f"⚠️ Categorization is slow for: {path}. Reached 80% of timeout...",
+        message=f"Categorization timed out for: {path} (>{settings.categorization_timeout}s)",
+    )
+    try:
+        with deadline:
+            with open(path, 'rb') as f:
+                header = f.read(SIGNATURE_BYTES)
+            deadline.check()
+            return filetype.guess(header)
+    except (OSError, DeadlineExceeded):
+        return None
+
+def classify(path: Path, guess):
+    """
+    (extension, category, mime_type) of path. guess() returns the
+    filetype match of the file's header; it is only called when the
+    extension is not enough.
     """
-    import os
-    if not os.path.isfile(ctx['path']):
-        return ctx
-        
-    path = Path(ctx['path'])
-    
     # 1. Extension Strategy
     ext = path.suffix.lower()
     category = settings.get_category(ext)
@@ -25,26 +44,7 @@ def detect_type(ctx: dict):
     # 2. Magic Bytes Strategy (if unknown or suspicious)
     mime = Strings.DEFAULT_MIME
     if (category == Strings.CAT_OTHERS or category == Strings.CAT_UNSORTED) and filetype:
-        # Use a thread to enforce a 1-second timeout on magic byte detection
-        result_container = {"kind": None}
-        def target():
-            try:
-                result_container["kind"] = filetype.guess(str(path))
-            except:
-                pass
-
-        detect_thread = threading.Thread(target=target, daemon=True)
-        detect_thread.start()
-        
-        warning_timeout = settings.categorization_timeout * 0.8
-        detect_thread.join(timeout=warning_timeout)
-        
-        if detect_thread.is_alive():
-            from ....utils.logger import logger
-            logger.warning(f"⚠️ Categorization is slow for: {path}. Reached 80% of timeout...")
-            detect_thread.join(timeout=settings.categorization_timeout - warning_timeout)
-        
-        kind = result_container["kind"]
+        kind = guess()
         if kind:
             try:
                 mime = kind.mime
@@ -61,8 +61,33 @@ def detect_type(ctx: dict):
                     category = Strings.CAT_ARCHIVES
             except:
                 pass
-            
-    ctx['extension'] = ext
-    ctx['category'] = category
-    ctx['mime_type'] = mime
-    return ctx
\ No newline at end of file
+    return ext, category, mime
+
+def detect_type(ctx: dict):
+    """
+    Pass 1: Detects category and mime type.
+    """
+    import os
+    if not os.path.isfile(ctx['path']):
+        return ctx
+        
+    path = Path(ctx['path'])
+    ctx['extension'], ctx['category'], ctx['mime_type'] = classify(path, lambda: _guess_kind(path))
+    return ctx
+
+def categorize_batch(items):
+    """
+    Process-pool entry point: (id, path, filename, size_bytes) tuples in,
+    (id, category, mime_type, extension) tuples out.
+    """
+    results = []
+    for item_id, path, filename, size_bytes in items:
+        ctx = detect_type({
+            'path': path,
+            'filename': filename,
+            'size_bytes': size_bytes,
+            'category': None,
+            'mime_type': None
+        })
+        results.append((item_id, ctx.get('category'), ctx.get('mime_type'), ctx.get('extension')))
+    return results
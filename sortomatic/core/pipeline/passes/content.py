@@ -0,0 +1,81 @@
+import os
+from functools import partial
+from pathlib import Path
+from ...config import settings
+from ..control import check_interrupt
+from ..deadlines import DeadlineExceeded, get_supervisor
+from . import categorization, hashing
+
+def analyze(ctx: dict, media: bool = True):
+    """
+    Categorizes and hashes a file from a single read: the results of
+    detect_type() then compute_hashes() with one open instead of three.
+
+    The first block gives the magic bytes (when the extension is not
+    enough) and the head of the fast hash, the whole stream feeds the full
+    hash and its last bytes are the tail of the fast hash. Perceptual
+    hashes and audio fingerprints are still computed by their libraries,
+    unless media is false (the caller then runs hashing.media_hashes()
+    elsewhere, e.g. in a process pool).
+
+    The read runs within settings.hashing_timeout, magic bytes included;
+    a file that times out keeps its category but not its full hash.
+    """
+    import humanize
+    fpath = ctx['path']
+    if not os.path.isfile(fpath):
+        return ctx
+
+    file_size = ctx['size_bytes'] or 0
+    fast_size = settings.fast_hash_size
+    chunk_size = settings.hashing_chunk_size
+    xxhash = hashing.xxhash
+    header = None
+
+    def categorize():
+        guess = lambda: categorization.filetype.guess(header[:categorization.SIGNATURE_BYTES]) if header else None
+        ctx['extension'], ctx['category'], ctx['mime_type'] = categorization.classify(Path(fpath), guess)
+
+    deadline = get_supervisor().watch(
+        settings.hashing_timeout,
+        warning=f"⚠️ Hashing is slow for: {fpath} ({humanize.naturalsize(file_size, binary=True)}). Reached 80% of timeout...",
+        message=f"Hashing timed out for: {fpath} (>{settings.hashing_timeout}s)",
+    )
+    try:
+        with deadline:
+            try:
+                with open(fpath, 'rb') as f:
+                    header = f.read(max(chunk_size, categorization.SIGNATURE_BYTES, fast_size))
+                    if xxhash:
+                        full = xxhash.xxh64(header)
+                        # Last fast_size bytes read so far
+                        ending = header[-fast_size:]
+                        for chunk in iter(partial(f.read, chunk_size), b""):
+                            deadline.check()
+                            check_interrupt()
+                            full.update(chunk)
+                            ending = chunk[-fast_size:] if len(chunk) >= fast_size else (ending + chunk)[-fast_size:]
+                        ctx['full_hash'] = full.hexdigest()
+
+                        # 1. Fast Hash: the first and last fast_hash_size bytes, as compute_hashes() reads them
+                        if file_size > 0:
+                            fast = xxhash.xxh64(header[:fast_size])
+                            if file_size > fast_size:
+                                fast.update(ending[-min(fast_size, file_size - fast_size):])
+                            ctx['fast_hash'] = fast.hexdigest()
+            except OSError as e:
+                ctx['fast_hash'] = None
+                ctx['full_hash'] = None
+                ctx['error'] = type(e).__name__
+
+            categorize()
+            if media:
+                hashing.media_hashes(ctx, deadline)
+    except DeadlineExceeded:
+        ctx['full_hash'] = None
+        ctx['timed_out'] = True
+        ctx['error'] = 'Timeout'
+        if ctx.get('category') is None:
+            categorize()
+
+    return ctx
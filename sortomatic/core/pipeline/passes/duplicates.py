@@ -0,0 +1,81 @@
+from itertools import groupby
+from typing import Dict, Generator
+from peewee import fn
+from ...database import ArchiveMember, FileIndex
+
+def duplicate_groups(min_size: int = 1) -> Generator[Dict, None, None]:
+    """
+    Yields one report per set of files sharing a full hash.
+
+    Paths that share a (device, inode) are hard links to the same data:
+    they count as a single physical copy, and the later ones carry
+    'hardlink_of'. A group made only of hard links is already
+    deduplicated and has nothing to reclaim.
+    """
+    shared = (FileIndex
+              .select(FileIndex.full_hash)
+              .where((FileIndex.entry_type == 'file') &
+                     (FileIndex.full_hash.is_null(False)) &
+                     (FileIndex.size_bytes >= min_size))
+              .group_by(FileIndex.full_hash)
+              .having(fn.COUNT(FileIndex.id) > 1))
+
+    rows = (FileIndex
+            .select(FileIndex.path, FileIndex.size_bytes, FileIndex.device, FileIndex.inode, FileIndex.full_hash)
+            .where(FileIndex.full_hash.in_(shared))
+            .order_by(FileIndex.full_hash, FileIndex.id)
+            .iterator())
+
+    for full_hash, members in groupby(rows, key=lambda row: row.full_hash):
+        files = []
+        first_path_of_inode = {}
+        size = 0
+        for row in members:
+            size = row.size_bytes
+            key = (row.device, row.inode) if row.inode is not None else row.path
+            hardlink_of = first_path_of_inode.setdefault(key, row.path)
+            files.append({
+                'path': row.path,
+                'hardlink_of': hardlink_of if hardlink_of != row.path else None,
+            })
+
+        copies = len(first_path_of_inode)
+        yield {
+            'full_hash': full_hash,
+            'size_bytes': size,
+            'files': files,
+            'copies': copies,
+            'hardlinks': len(files) - copies,
+            'reclaimable_bytes': size * (copies - 1),
+            'already_deduplicated': copies == 1,
+        }
+
+def member_duplicate_groups(min_size: int = 1) -> Generator[Dict, None, None]:
+    """
+    Yields archive members stored more than once, matched on the size and
+    CRC-32 their containers record. Nothing is read or decompressed, so
+    this is a first-level match: a CRC collision is possible.
+    """
+    shared = (ArchiveMember
+              .select(ArchiveMember.size_bytes, ArchiveMember.crc32)
+              .where((ArchiveMember.crc32.is_null(False)) &
+                     (ArchiveMember.size_bytes >= min_size))
+              .group_by(ArchiveMember.size_bytes, ArchiveMember.crc32)
+              .having(fn.COUNT(ArchiveMember.id) > 1)
+              .alias('shared'))
+
+    rows = (ArchiveMember
+            .select(ArchiveMember.archive, ArchiveMember.member, ArchiveMember.size_bytes, ArchiveMember.crc32)
+            .join(shared, on=((ArchiveMember.size_bytes == shared.c.size_bytes) &
+                              (ArchiveMember.crc32 == shared.c.crc32)))
+            .order_by(ArchiveMember.size_bytes, ArchiveMember.crc32, ArchiveMember.id)
+            .iterator())
+
+    for (size, crc), members in groupby(rows, key=lambda row: (row.size_bytes, row.crc32)):
+        members = [{'archive': row.archive, 'member': row.member} for row in members]
+        yield {
+            'size_bytes': size,
+            'crc32': crc,
+            'members': members,
+            'reclaimable_bytes': size * (len(members) - 1),
+        }
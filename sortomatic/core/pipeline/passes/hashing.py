@@ -1,99 +1,182 @@
-import threading
+import importlib
+import importlib.util
 from functools import partial
 from ....l8n import Strings
 from ...config import settings
+from ..control import check_interrupt
+from ..deadlines import DeadlineExceeded, get_supervisor
 
 try:
     import xxhash
 except ImportError:
     xxhash = None
 
-try:
-    import imagehash
-    from PIL import Image
-except ImportError:
-    imagehash = None
-    Image = None
+# perceptual_hash of an image that could not be decoded: set, so the file is
+# not pending for the perceptual pass again until it changes
+UNDECODABLE = ""
 
-try:
-    import pyacoustid
-except ImportError:
-    pyacoustid = None
+# Image and audio libraries are heavy: they are imported by the first file that needs them
+_modules = {}
+_installed = {}
+
+def _optional(name: str):
+    """Module name, imported on first use; None when it is not installed."""
+    if name not in _modules:
+        try:
+            _modules[name] = importlib.import_module(name)
+        except ImportError:
+            _modules[name] = None
+    return _modules[name]
 
-# These are now backed by settings, but localized here for brevity if needed
-# though we'll use settings directly in the functions.
+def installed(*names: str) -> bool:
+    """True when every module can be imported (checked without importing it)."""
+    for name in names:
+        if name not in _installed:
+            try:
+                _installed[name] = importlib.util.find_spec(name) is not None
+            except (ImportError, ValueError):
+                _installed[name] = False
+        if not _installed[name]:
+            return False
+    return True
 
 def compute_hashes(ctx: dict):
-    """Computes standard and perceptual hashes with a safety timeout."""
+    """
+    Computes standard and perceptual hashes within settings.hashing_timeout.
+
+    The deadline is checked between chunk reads: a file that takes too long
+    is abandoned (full_hash stays None, ctx['timed_out'] is set) instead of
+    being read on in the background. Image decoding and audio fingerprints
+    cannot be interrupted and are only skipped once the deadline has passed.
+    A pause of the scan (check_interrupt) also ends the read at once.
+
+    A failed read sets ctx['error'] to the exception class ('Timeout' for
+    the deadline), which sends the file to the quarantine.
+    """
     import os
+    import humanize
     if not os.path.isfile(ctx['path']):
         return ctx
-    
-    def _worker():
-        fpath = ctx['path']
-        file_size = ctx['size_bytes']
-        
-        # 1. Fast Hash (First 4KB + Last 4KB)
-        if file_size > 0 and xxhash:
-            try:
-                with open(fpath, 'rb') as f:
-                    first_chunk = f.read(settings.fast_hash_size)
-                    last_chunk = b''
-                    if file_size > settings.fast_hash_size:
-                        f.seek(-min(settings.fast_hash_size, file_size - settings.fast_hash_size), 2)
-                        last_chunk = f.read(settings.fast_hash_size)
-                    
+
+    fpath = ctx['path']
+    file_size = ctx['size_bytes']
+    size_str = humanize.naturalsize(file_size or 0, binary=True)
+    deadline = get_supervisor().watch(
+        settings.hashing_timeout,
+        warning=f"⚠️ Hashing is slow for: {fpath} ({size_str}). Reached 80% of timeout...",
+        message=f"Hashing timed out for: {fpath} (>{settings.hashing_timeout}s)",
+    )
+    try:
+        with deadline:
+            # 1. Fast Hash (First 4KB + Last 4KB)
+            if file_size > 0 and xxhash:
+                try:
+                    with open(fpath, 'rb') as f:
+                        first_chunk = f.read(settings.fast_hash_size)
+                        last_chunk = b''
+                        if file_size > settings.fast_hash_size:
+                            f.seek(-min(settings.fast_hash_size, file_size - settings.fast_hash_size), 2)
+                            last_chunk = f.read(settings.fast_hash_size)
+
+                        hasher = xxhash.xxh64()
+                        hasher.update(first_chunk)
+                        hasher.update(last_chunk)
+                        ctx['fast_hash'] = hasher.hexdigest()
+                except OSError as e:
+                    ctx['fast_hash'] = None
+                    ctx['error'] = type(e).__name__
+
+            # 2-3. Perceptual hash (images) and audio fingerprint
+            media_hashes(ctx, deadline)
+
+            # 4. Full Hash (xxHash64)
+            if xxhash:
+                try:
                     hasher = xxhash.xxh64()
-                    hasher.update(first_chunk)
-                    hasher.update(last_chunk)
-                    ctx['fast_hash'] = hasher.hexdigest()
-            except Exception:
-                ctx['fast_hash'] = None
-        
-        # 2. Perceptual Hash (Only for images)
-        if ctx.get('category') == Strings.CAT_IMAGES and imagehash:
-            try:
-                with Image.open(fpath) as img:
-                    ctx['perceptual_hash'] = str(imagehash.average_hash(img))
-            except Exception:
-                pass
-                
-        # 3. Audio Fingerprint (Only for audio files)
-        if ctx.get('category') == Strings.CAT_AUDIO and pyacoustid:
-            try:
-                _, fp = pyacoustid.fingerprint_file(fpath)
-                ctx['fast_hash'] = fp.decode('utf-8') if isinstance(fp, bytes) else fp
-            except Exception:
-                pass
-                
-        # 4. Full Hash (xxHash64)
-        if xxhash:
-            try:
-                hasher = xxhash.xxh64()
-                with open(fpath, 'rb') as f:
-                    for chunk in iter(partial(f.read, settings.hashing_chunk_size), b""):
-                        hasher.update(chunk)
-                ctx['full_hash'] = hasher.hexdigest()
-            except Exception:
-                ctx['full_hash'] = None
-
-    t = threading.Thread(target=_worker, daemon=True)
-    t.start()
-    warning_timeout = settings.hashing_timeout * 0.8
-    t.join(timeout=warning_timeout)
-    
-    if t.is_alive():
-        # Reached 80% warning
-        import humanize
-        from ....utils.logger import logger
-        size_str = humanize.naturalsize(ctx.get('size_bytes', 0), binary=True)
-        logger.warning(f"⚠️ Hashing is slow for: {ctx['path']} ({size_str}). Reached 80% of timeout...")
-        
-        # Complete the remaining 20%
-        t.join(timeout=settings.hashing_timeout - warning_timeout)
-        
-        if t.is_alive():
-            # Final timeout
-            logger.warning(f"Hashing timed out for: {ctx['path']} (>{settings.hashing_timeout}s)")
-            
-    return ctx
\ No newline at end of file
+                    with open(fpath, 'rb') as f:
+                        for chunk in iter(partial(f.read, settings.hashing_chunk_size), b""):
+                            deadline.check()
+                            check_interrupt()
+                            hasher.update(chunk)
+                    ctx['full_hash'] = hasher.hexdigest()
+                except OSError as e:
+                    ctx['full_hash'] = None
+                    ctx['error'] = type(e).__name__
+    except DeadlineExceeded:
+        ctx['full_hash'] = None
+        ctx['timed_out'] = True
+        ctx['error'] = 'Timeout'
+
+    return ctx
+
+def media_hashes(ctx: dict, deadline):
+    """Perceptual hash of an image, fingerprint of an audio file (as its fast_hash)."""
+    fpath = ctx['path']
+    # 2. Perceptual Hash (Only for images)
+    if ctx.get('category') == Strings.CAT_IMAGES:
+        perceptual_hash(ctx, deadline)
+
+    # 3. Audio Fingerprint (Only for audio files)
+    if ctx.get('category') == Strings.CAT_AUDIO and installed('pyacoustid'):
+        deadline.check()
+        try:
+            _, fp = _optional('pyacoustid').fingerprint_file(fpath)
+            ctx['fast_hash'] = fp.decode('utf-8') if isinstance(fp, bytes) else fp
+        except Exception:
+            pass
+
+def perceptual_hash(ctx: dict, deadline=None):
+    """
+    Average hash of an image. PIL and imagehash are only imported here.
+    An image they cannot open or decode gets UNDECODABLE.
+    """
+    if not installed('imagehash', 'PIL'):
+        return ctx
+    if deadline is not None:
+        deadline.check()
+    try:
+        with _optional('PIL.Image').open(ctx['path']) as img:
+            ctx['perceptual_hash'] = str(_optional('imagehash').average_hash(img))
+    except Exception:
+        ctx['perceptual_hash'] = UNDECODABLE
+    return ctx
+
+def is_cpu_bound(category) -> bool:
+    """True when hashing a file of this category is dominated by decoding (perceptual hash, fingerprint)."""
+    return ((category == Strings.CAT_IMAGES and installed('imagehash', 'PIL')) or
+            (category == Strings.CAT_AUDIO and installed('pyacoustid')))
+
+def hash_batch(items):
+    """
+    Process-pool entry point: (id, path, size_bytes, category) tuples in,
+    (id, fast_hash, full_hash, perceptual_hash, error) tuples out.
+    """
+    results = []
+    for item_id, path, size_bytes, category in items:
+        ctx = compute_hashes({
+            'path': path,
+            'size_bytes': size_bytes,
+            'category': category,
+            'fast_hash': None,
+            'full_hash': None,
+            'perceptual_hash': None
+        })
+        results.append((item_id, ctx.get('fast_hash'), ctx.get('full_hash'), ctx.get('perceptual_hash'), ctx.get('error')))
+    return results
+
+def media_batch(items):
+    """
+    Process-pool entry point for media_hashes(): (path, category) tuples in,
+    (fast_hash, perceptual_hash) tuples out (None where nothing was computed).
+    """
+    results = []
+    for path, category in items:
+        ctx = {'path': path, 'category': category, 'fast_hash': None, 'perceptual_hash': None}
+        try:
+            with get_supervisor().watch(settings.hashing_timeout,
+                                        message=f"Hashing timed out for: {path} (>{settings.hashing_timeout}s)") as deadline:
+                media_hashes(ctx, deadline)
+        except DeadlineExceeded:
+            pass
+        results.append((ctx['fast_hash'], ctx['perceptual_hash']))
+    return results
@@ -0,0 +1,131 @@
+"""Pass registry: what each pass reads and fills, so a column can be computed with the fewest passes."""
+import importlib
+from typing import Callable, Dict, List, Optional, Sequence
+from ..database import FileIndex
+from ...l8n import Strings
+from ...utils.logger import logger
+
+# Columns the index pass (the walk) fills: always available to other passes
+INDEX_COLUMNS = ('path', 'filename', 'parent', 'entry_type', 'size_bytes', 'modified_at', 'device', 'inode')
+
+# Entry point group of passes installed by other packages
+ENTRY_POINT_GROUP = "sortomatic.passes"
+
+class Pass:
+    """
+    A pass over indexed files: fills `outputs` (FileIndex columns) from
+    `inputs`. The first output is always set once the pass has run on a
+    file, to a marker value when the file could not be processed (e.g.
+    hashing.UNDECODABLE): files where it is NULL are the ones still
+    pending, and a file that failed is only retried once it changed.
+
+    target is 'module:function', a function taking and returning a
+    ScanContext; the module (and whatever heavy library it needs) is only
+    imported when the pass runs. categories limits the pass to files of
+    those categories, which makes it depend on the category column too.
+    requires lists modules that must be installed for the pass to run at
+    all (checked without importing them).
+
+    runner names a PipelineManager method that runs the pass with its own
+    scheduling (e.g. run_hash); other passes go through run_pass().
+    """
+    def __init__(self, name: str, inputs: Sequence[str], outputs: Sequence[str], target: str,
+                 categories: Optional[Sequence[str]] = None, requires: Sequence[str] = (),
+                 runner: Optional[str] = None):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.target = target
+        self.categories = tuple(categories) if categories else None
+        self.requires = tuple(requires)
+        self.runner = runner
+        self._function: Optional[Callable] = None
+        for column in self.inputs + self.outputs:
+            if column not in FileIndex._meta.fields:
+                raise ValueError(f"Pass '{name}': unknown column '{column}'")
+
+    @property
+    def needs(self):
+        """Columns read by the pass, the category of its filter included."""
+        return self.inputs + (('category',) if self.categories and 'category' not in self.inputs else ())
+
+    def available(self) -> bool:
+        from .passes.hashing import installed
+        return installed(*self.requires)
+
+    def load(self) -> Callable:
+        if self._function is None:
+            module, _, function = self.target.partition(':')
+            self._function = getattr(importlib.import_module(module), function)
+        return self._function
+
+    def pending(self):
+        """Expression selecting the files this pass still has to fill (failed ones excluded, see above)."""
+        expression = (FileIndex.entry_type == 'file') & getattr(FileIndex, self.outputs[0]).is_null()
+        if self.categories:
+            expression &= FileIndex.category.in_(self.categories)
+        return expression
+
+    def __repr__(self):
+        return f"Pass({self.name!r}: {', '.join(self.needs)} -> {', '.join(self.outputs)})"
+
+_passes: Dict[str, Pass] = {}
+_entry_points_loaded = False
+
+def register(spec: Pass) -> Pass:
+    """Adds a pass (a later registration under the same name replaces the earlier one)."""
+    _passes[spec.name] = spec
+    return spec
+
+def passes() -> Dict[str, Pass]:
+    """Registered passes by name, those of installed plugins included."""
+    global _entry_points_loaded
+    if not _entry_points_loaded:
+        _entry_points_loaded = True
+        from importlib.metadata import entry_points
+        for entry in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                register(entry.load())
+            except Exception as e:
+                logger.warning(f"Could not load pass plugin '{entry.name}': {e}")
+    return _passes
+
+def producer(column: str) -> Optional[Pass]:
+    """The first registered pass filling column."""
+    return next((spec for spec in passes().values() if column in spec.outputs), None)
+
+def plan(column: str) -> List[Pass]:
+    """
+    The passes needed to fill column, dependencies first: the pass that
+    fills it and, recursively, the passes filling what it reads. Columns
+    of the index are always there.
+    """
+    ordered: List[Pass] = []
+    visiting = set()
+
+    def visit(column: str, wanted_by: str):
+        if column in INDEX_COLUMNS:
+            return
+        spec = producer(column)
+        if spec is None:
+            raise ValueError(f"No pass fills '{column}' (needed by {wanted_by})")
+        if spec in ordered:
+            return
+        if spec.name in visiting:
+            raise ValueError(f"Passes depend on each other through '{column}'")
+        visiting.add(spec.name)
+        for needed in spec.needs:
+            visit(needed, spec.name)
+        visiting.discard(spec.name)
+        ordered.append(spec)
+
+    visit(column, "the request")
+    return ordered
+
+register(Pass("categorize", inputs=('path',), outputs=('category', 'mime_type', 'extension'),
+              target="sortomatic.core.pipeline.passes.categorization:detect_type", runner="run_categorize"))
+register(Pass("hash", inputs=('path', 'size_bytes', 'category'), outputs=('full_hash', 'fast_hash'),
+              target="sortomatic.core.pipeline.passes.hashing:compute_hashes", runner="run_hash"))
+register(Pass("perceptual", inputs=('path',), outputs=('perceptual_hash',),
+              target="sortomatic.core.pipeline.passes.hashing:perceptual_hash",
+              categories=(Strings.CAT_IMAGES,), requires=('imagehash', 'PIL')))
@@ -0,0 +1,249 @@
+"""Staged (SEDA-style) pipeline: worker pools connected by bounded queues."""
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from ...utils.logger import logger
+
+# Marks the end of the stream in a queue
+_END = object()
+
+# How often blocked threads look at the stop flag
+_POLL = 0.1
+
+class Stage:
+    """
+    One step of a StagedPipeline: `workers` threads apply func to the items
+    of a bounded input queue and pass the results on. func returns the
+    item for the next stage, or None to drop it.
+
+    With a scheduler (a DeviceScheduler), a dispatcher thread sorts the
+    input into per-device queues and the workers only get items whose
+    device has a free slot: a worker is never held waiting for a busy disk
+    while items of other devices are queued. device(item) gives the item's
+    (st_dev, size) or None for items that read nothing, which go to the
+    workers in turn without taking a slot.
+    """
+    def __init__(self, name: str, func: Callable, workers: int = 1, maxsize: int = 1000,
+                 scheduler=None, device: Optional[Callable[[Any], Optional[Tuple]]] = None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=max(1, maxsize))
+        self.scheduler = scheduler
+        self.device = device
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0
+        self._lock = threading.Lock()
+        self._running = 0
+        # Dispatch state (with a scheduler), under _cond: items waiting without a device,
+        # and items handed to the workers (in `_ready` or being processed)
+        self._cond = threading.Condition(self._lock)
+        self._unscheduled = deque()
+        self._released = 0
+        self._ready: queue.Queue = self.queue
+
+    def waiting(self) -> int:
+        """Items taken from the input queue but not yet handed to a worker."""
+        if self.scheduler is None:
+            return 0
+        with self._lock:
+            return self.scheduler.pending() + len(self._unscheduled)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'queued': self.queue.qsize() + self.waiting(),
+            'capacity': self.queue.maxsize,
+            'workers': self.workers,
+            'busy': self.busy,
+            'processed': self.processed,
+            'errors': self.errors,
+        }
+
+class StagedPipeline:
+    """
+    Streams items from a source through a chain of stages.
+
+    Every stage has its own threads and a bounded input queue, so a slow
+    stage fills its queue and blocks the one before it (backpressure) and
+    throughput is set by the slowest stage alone. The results of the last
+    stage are yielded by run() on the calling thread, which can therefore
+    own the database connection and write them in batches.
+
+    depths() and stats() can be read from any thread while it runs.
+    """
+    def __init__(self, source: Iterable, stages: List[Stage], output_size: int = 1000):
+        self.source = source
+        self.stages = stages
+        self.output = queue.Queue(maxsize=max(1, output_size))
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._source_error: Optional[BaseException] = None
+
+    def depths(self) -> Dict[str, int]:
+        """Items waiting in front of each stage, and in front of the consumer ('output')."""
+        depths = {stage.name: stage.queue.qsize() + stage.waiting() for stage in self.stages}
+        depths['output'] = self.output.qsize()
+        return depths
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def stop(self):
+        """Stops every thread; run() returns at its next item."""
+        self._stop.set()
+
+    def run(self) -> Iterator:
+        queues = [stage.queue for stage in self.stages] + [self.output]
+        self._start(self._feed, "source", queues[0])
+        for i, stage in enumerate(self.stages):
+            stage._running = stage.workers
+            if stage.scheduler is not None:
+                stage._ready = queue.Queue()
+                self._start(self._dispatch, f"{stage.name}_dispatch", stage)
+            for n in range(stage.workers):
+                self._start(self._work, f"{stage.name}_{n}", stage, queues[i + 1])
+
+        try:
+            while True:
+                item = self._get(self.output)
+                if item is _END or item is None:
+                    break
+                yield item
+        finally:
+            self._stop.set()
+            for thread in self._threads:
+                thread.join()
+            self._threads = []
+        if self._source_error is not None:
+            raise self._source_error
+
+    # --- Threads ---
+
+    def _start(self, target, name, *args):
+        thread = threading.Thread(target=target, args=args, name=f"sortomatic_stage_{name}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _feed(self, out: queue.Queue):
+        try:
+            for item in self.source:
+                if not self._put(out, item):
+                    return
+        except BaseException as e:
+            logger.error(f"Pipeline source failed: {e}", exc_info=True)
+            self._source_error = e
+        self._put(out, _END)
+
+    def _dispatch(self, stage: Stage):
+        """Moves the input of stage into its scheduler, at most stage.queue.maxsize items at a time."""
+        scheduler = stage.scheduler
+        while True:
+            with stage._cond:
+                while scheduler.pending() + len(stage._unscheduled) >= stage.queue.maxsize:
+                    if self._stop.is_set():
+                        return
+                    stage._cond.wait(_POLL)
+            item = self._get(stage.queue)
+            if item is None:
+                return
+            if item is _END:
+                break
+            device = stage.device(item)
+            with stage._cond:
+                if device is None:
+                    stage._unscheduled.append((item, None))
+                else:
+                    scheduler.push((item, device), device[0])
+                self._release(stage)
+
+        # Everything waiting goes out before the end
+        with stage._cond:
+            while scheduler.pending() or stage._unscheduled:
+                if self._stop.is_set():
+                    return
+                stage._cond.wait(_POLL)
+        stage._ready.put(_END)
+
+    @staticmethod
+    def _release(stage: Stage):
+        """Hands waiting items to the idle workers, round-robin across devices. Called under stage._cond."""
+        free = stage.workers - stage._released
+        while free > 0 and stage._unscheduled:
+            stage._ready.put(stage._unscheduled.popleft())
+            stage._released += 1
+            free -= 1
+        for item in stage.scheduler.ready(free):
+            stage._ready.put(item)
+            stage._released += 1
+        stage._cond.notify_all()
+
+    def _work(self, stage: Stage, out: queue.Queue):
+        while True:
+            item = self._get(stage._ready)
+            if item is None:
+                return
+            if item is _END:
+                # Let the sibling workers see the end too; the last one forwards it
+                stage._ready.put(_END)
+                with stage._lock:
+                    stage._running -= 1
+                    last = stage._running == 0
+                if last:
+                    self._put(out, _END)
+                return
+            device = None
+            if stage.scheduler is not None:
+                item, device = item
+
+            with stage._lock:
+                stage.busy += 1
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                result = None
+                with stage._lock:
+                    stage.errors += 1
+                logger.error(f"Stage {stage.name} failed: {e}", exc_info=True)
+            finally:
+                with stage._lock:
+                    stage.busy -= 1
+                    stage.processed += 1
+                    if stage.scheduler is not None:
+                        if device is not None:
+                            stage.scheduler.done(*device)
+                        stage._released -= 1
+                        self._release(stage)
+
+            if result is not None and not self._put(out, result):
+                return
+
+    def _get(self, q: queue.Queue):
+        """Next item of q, or None once the pipeline is stopped."""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=_POLL)
+            except queue.Empty:
+                continue
+        return None
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Blocks while q is full (backpressure). False if the pipeline was stopped."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+def log_depths(pipeline: StagedPipeline, interval: float, last: float) -> float:
+    """Logs the queue depths at most every interval seconds; returns the time of the last log."""
+    now = time.monotonic()
+    if now - last < interval:
+        return last
+    depths = ", ".join(f"{name} {depth}" for name, depth in pipeline.depths().items())
+    logger.debug(f"Queue depths: {depths}")
+    return now
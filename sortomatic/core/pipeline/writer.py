@@ -0,0 +1,207 @@
+"""Single writer thread that owns the database writes of a pass."""
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from ..config import settings
+from ..database import db, shared_across_threads
+from ...utils.logger import logger
+
+# Rows handed to one flush call; a coalesced transaction makes several
+# calls so a statement stays under SQLite's bound-variable limit
+STATEMENT_ROWS = 500
+
+class DatabaseWriter:
+    """
+    Takes writes from a queue and applies them on its own thread.
+
+    Consecutive writes are coalesced into one transaction until
+    settings.writer_batch_rows rows are pending or settings.writer_max_delay
+    seconds have passed since the first one, so the coordinator keeps
+    dispatching work while SQLite commits. When more than
+    settings.writer_queue_rows rows are waiting, write() blocks: the
+    pipeline slows down to the writer's pace instead of buffering without
+    bound.
+
+    Operations are applied in submission order; call(fn) runs fn on the
+    writer thread after everything submitted before it (e.g. a checkpoint
+    that must follow its rows). flush() waits until everything submitted
+    is committed and re-raises a failed write.
+
+    An in-memory database belongs to the connection that created it, so
+    for ':memory:' writes run inline on the calling thread.
+    """
+    _STOP = object()
+
+    def __init__(self, name: str = "writer"):
+        self.name = name
+        self.inline = not shared_across_threads()
+        self.max_rows = settings.writer_batch_rows
+        self.max_delay = settings.writer_max_delay
+        self.max_pending = settings.writer_queue_rows
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = time.monotonic()
+        self.rows = 0
+        self.commits = 0
+        self.commit_seconds = 0.0
+        self.max_commit_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    # --- Coordinator side ---
+
+    def write(self, func: Callable[[List], None], rows: List):
+        """Queue rows for func (e.g. a bulk upsert)."""
+        if not rows:
+            return
+        if self.inline:
+            self._timed_commit([('rows', func, rows)])
+            return
+        self._raise_error()
+        with self._cond:
+            if self._pending >= self.max_pending:
+                start = time.monotonic()
+                while self._pending >= self.max_pending and self._error is None:
+                    self._cond.wait(0.1)
+                self.blocked_seconds += time.monotonic() - start
+            self._pending += len(rows)
+        self._ensure_thread()
+        self._queue.put(('rows', func, rows))
+
+    def call(self, fn: Callable[[], None]):
+        """Run fn on the writer thread, after every write submitted so far."""
+        if self.inline:
+            self._timed_commit([('call', fn, None)])
+            return
+        self._raise_error()
+        self._ensure_thread()
+        self._queue.put(('call', fn, None))
+
+    def flush(self):
+        """Blocks until everything submitted is committed."""
+        if self.inline or self._thread is None:
+            self._raise_error()
+            return
+        done = threading.Event()
+        self._queue.put(('barrier', done, None))
+        while not done.wait(0.1):
+            if not self._thread.is_alive():
+                break
+        self._raise_error()
+
+    def close(self):
+        """Flushes, stops the thread and logs the writer's statistics."""
+        try:
+            self.flush()
+        finally:
+            if self._thread is not None:
+                self._queue.put((self._STOP, None, None))
+                self._thread.join()
+                self._thread = None
+        if self.rows:
+            stats = self.stats()
+            logger.info(
+                f"DB {self.name}: {stats['rows']} rows in {stats['commits']} commits, "
+                f"{stats['rows_per_s']:.0f} rows/s, commit latency {stats['avg_commit_ms']:.1f} ms avg / "
+                f"{stats['max_commit_ms']:.1f} ms max, producers blocked {stats['blocked_seconds']:.1f}s"
+            )
+
+    def pending(self) -> int:
+        """Rows queued and not committed yet."""
+        return self._pending
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = max(time.monotonic() - self._started, 1e-6)
+        return {
+            'rows': self.rows,
+            'commits': self.commits,
+            'pending': self._pending,
+            'rows_per_s': self.rows / elapsed,
+            'avg_commit_ms': 1000 * self.commit_seconds / self.commits if self.commits else 0.0,
+            'max_commit_ms': 1000 * self.max_commit_seconds,
+            'blocked_seconds': self.blocked_seconds,
+        }
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"sortomatic_{self.name}", daemon=True)
+            self._thread.start()
+
+    # --- Writer thread ---
+
+    def _run(self):
+        try:
+            while True:
+                batch, stop = self._collect()
+                if batch:
+                    try:
+                        self._timed_commit(batch)
+                    except BaseException as e:
+                        # Raised again on the coordinator, with its traceback
+                        logger.error(f"DB {self.name} failed: {e}")
+                        self._error = e
+                    finally:
+                        rows = sum(len(payload) for kind, _, payload in batch if kind == 'rows')
+                        with self._cond:
+                            self._pending -= rows
+                            self._cond.notify_all()
+                        for kind, done, _ in batch:
+                            if kind == 'barrier':
+                                done.set()
+                if stop:
+                    return
+        finally:
+            if not db.is_closed():
+                db.close()
+
+    def _collect(self):
+        """Operations for one transaction: waits for the first, then gathers more for up to max_delay."""
+        batch = [self._queue.get()]
+        if batch[0][0] is self._STOP:
+            return [], True
+        rows = len(batch[0][2] or ())
+        deadline = time.monotonic() + self.max_delay
+        while rows < self.max_rows and batch[-1][0] != 'barrier':
+            timeout = deadline - time.monotonic()
+            try:
+                op = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if op[0] is self._STOP:
+                return batch, True
+            batch.append(op)
+            rows += len(op[2] or ())
+        return batch, False
+
+    def _timed_commit(self, batch):
+        """Applies a batch in one transaction, merging consecutive rows for the same function."""
+        start = time.perf_counter()
+        with db.atomic():
+            pending_func, pending_rows = None, []
+            for kind, func, payload in batch:
+                if kind == 'rows' and func == pending_func:
+                    pending_rows.extend(payload)
+                    continue
+                self._apply(pending_func, pending_rows)
+                pending_func, pending_rows = (func, list(payload)) if kind == 'rows' else (None, [])
+                if kind == 'call':
+                    func()
+            self._apply(pending_func, pending_rows)
+        elapsed = time.perf_counter() - start
+        self.commits += 1
+        self.rows += sum(len(payload) for kind, _, payload in batch if kind == 'rows')
+        self.commit_seconds += elapsed
+        self.max_commit_seconds = max(self.max_commit_seconds, elapsed)
+
+    @staticmethod
+    def _apply(func, rows):
+        for i in range(0, len(rows), STATEMENT_ROWS):
+            func(rows[i:i + STATEMENT_ROWS])
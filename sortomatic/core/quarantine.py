@@ -0,0 +1,72 @@
+"""Quarantine of files that failed to hash, so they are not retried on every run."""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from peewee import fn
+from .config import settings
+from .database import FileIndex, HashFailure, db
+
+def backoff(attempts: int) -> timedelta:
+    """Wait before the next attempt after `attempts` failures: quarantine_backoff, doubled per failure."""
+    seconds = settings.quarantine_backoff * 2 ** max(0, attempts - 1)
+    return timedelta(seconds=min(seconds, settings.quarantine_max_backoff))
+
+def is_quarantined(now: Optional[datetime] = None):
+    """
+    Expression true for FileIndex rows waiting in quarantine: a failure of
+    the same path, size and mtime whose retry time has not come yet.
+    """
+    return fn.EXISTS(HashFailure.select().where(
+        (HashFailure.path == FileIndex.path) &
+        (HashFailure.size_bytes == FileIndex.size_bytes) &
+        (HashFailure.modified_at == FileIndex.modified_at) &
+        (HashFailure.retry_after > (now or datetime.now()))
+    ))
+
+def record(errors: Dict[str, str]):
+    """
+    Quarantines files by path ({path: error}). A file failing again with
+    the same size and mtime gets one more attempt on its count and twice
+    the wait; a file that changed starts over.
+    """
+    if not errors:
+        return
+    now = datetime.now()
+    paths = list(errors)
+    with db.atomic():
+        for i in range(0, len(paths), 500):
+            chunk = paths[i:i + 500]
+            previous = {row.path: row for row in HashFailure.select().where(HashFailure.path.in_(chunk))}
+            rows = []
+            for path, size_bytes, modified_at in (FileIndex
+                                                  .select(FileIndex.path, FileIndex.size_bytes, FileIndex.modified_at)
+                                                  .where(FileIndex.path.in_(chunk))
+                                                  .tuples()):
+                last = previous.get(path)
+                same = last is not None and (last.size_bytes, last.modified_at) == (size_bytes, modified_at)
+                attempts = last.attempts + 1 if same else 1
+                rows.append({
+                    'path': path,
+                    'size_bytes': size_bytes,
+                    'modified_at': modified_at,
+                    'error': errors[path],
+                    'attempts': attempts,
+                    'last_attempt': now,
+                    'retry_after': now + backoff(attempts),
+                })
+            if rows:
+                update = [getattr(HashFailure, name) for name in rows[0] if name != 'path']
+                HashFailure.insert_many(rows).on_conflict(conflict_target=[HashFailure.path], preserve=update).execute()
+
+def release(paths: Iterable[str]):
+    """Ends the quarantine of files that hashed fine."""
+    paths = list(paths)
+    for i in range(0, len(paths), 500):
+        HashFailure.delete().where(HashFailure.path.in_(paths[i:i + 500])).execute()
+
+def entries() -> List[HashFailure]:
+    """Quarantined files still in the index and still unhashed, next retry first."""
+    return list(HashFailure
+                .select()
+                .join(FileIndex, on=(FileIndex.path == HashFailure.path))
+                .where(FileIndex.full_hash.is_null())
+                .order_by(HashFailure.retry_after))
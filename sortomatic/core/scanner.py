@@ -1,43 +1,303 @@
 import os
+import queue
+import stat
+import threading
+from collections import deque
 from pathlib import Path
-from typing import Generator, Tuple
+from typing import Generator, List, Optional, Tuple
 from .config import settings
+from .ignore import IgnoreMatcher, compile_ignore
+from .types import WalkEntry
 
-def smart_walk(root: Path) -> Generator[Tuple[str, str], None, None]:
+def _bundle_entry(dirpath: str) -> WalkEntry:
+    """Builds the record for an atomic folder from a single stat of the directory."""
+    st = os.stat(dirpath)
+    return WalkEntry(dirpath, 'bundle', st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
+
+def scan_directory(dirpath: str, atomic_markers: set, ignore: IgnoreMatcher) -> Tuple[List[WalkEntry], List[str]]:
+    """
+    Lists a single directory with os.scandir.
+    Returns (records, subdirs): the records to yield for this directory and
+    the child directories that still need to be visited.
+    A directory containing an atomic marker yields itself as a 'bundle'
+    and returns no subdirs.
+    """
+    try:
+        with os.scandir(dirpath) as it:
+            entries = list(it)
+    except OSError:
+        # Same as os.walk: unreadable directories are silently skipped
+        return [], []
+
+    # 1. Check for Atomic Markers (BEFORE filtering ignore_patterns)
+    # We check the raw names from the OS
+    if any(entry.name in atomic_markers for entry in entries):
+        try:
+            return [_bundle_entry(dirpath)], []
+        except OSError:
+            return [], []
+
+    records = []
+    subdirs = []
+    for entry in entries:
+        # 2. Respect Ignore Patterns for both recursion and files
+        if ignore.match(entry.name, entry.path):
+            continue
+
+        try:
+            # d_type based, no syscall on Linux for non-symlinks
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+
+        if is_dir:
+            # Like os.walk(followlinks=False): symlinked dirs are not descended into
+            if not entry.is_symlink():
+                subdirs.append(entry.path)
+            continue
+
+        # 3. Normal File Processing
+        # The single stat for this file. It follows symlinks, which is what
+        # os.path.isfile did: a link to a regular file is indexed, a broken link is not.
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+
+        # Only index regular files (ignore pipes, sockets, devices, etc.)
+        if not stat.S_ISREG(st.st_mode):
+            continue
+
+        records.append(WalkEntry(entry.path, 'file', st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev))
+
+    return records, subdirs
+
+def scan_root(root) -> str:
+    """
+    root as the walkers list it: indexed paths start with it, relative or
+    not, so anything matching events to rows (the watcher) must use it too.
+    """
+    return os.fspath(Path(root))
+
+def smart_walk(root: Path) -> Generator[WalkEntry, None, None]:
     """
-    Yields tuples of (path, type).
-    type is 'file' or 'bundle'.
+    Yields a WalkEntry for every indexable entry under root.
+    entry_type is 'file' or 'bundle'.
+    Each file costs exactly one stat (taken through its DirEntry).
     """
     # Convert list to set for O(1) lookup
     atomic_markers = set(settings.atomic_markers)
-    
-    for dirpath, dirnames, filenames in os.walk(root):
-        # 1. Check for Atomic Markers (BEFORE filtering ignore_patterns)
-        # We check the raw dirnames/filenames from the OS
-        full_contents = set(dirnames) | set(filenames)
-        if not full_contents.isdisjoint(atomic_markers):
-            # FOUND ATOMIC FOLDER (e.g., a Git Repo)
-            # Yield the folder itself as a 'bundle'
-            yield (dirpath, 'bundle')
-            
-            # CRITICAL: Modify dirnames in-place to PREVENT recursion
-            dirnames[:] = [] 
+    ignore = compile_ignore(settings.ignore_patterns)
+
+    # Explicit stack instead of recursion: deep trees don't hit the recursion limit
+    stack = [os.fspath(root)]
+    while stack:
+        dirpath = stack.pop()
+        records, subdirs = scan_directory(dirpath, atomic_markers, ignore)
+        yield from records
+        # Reversed so siblings are visited in listing order
+        stack.extend(reversed(subdirs))
+
+def iter_directories(root: Path) -> Generator[Tuple[str, bool], None, None]:
+    """
+    Yields (dirpath, is_bundle) for every directory smart_walk would list,
+    plus the atomic folders themselves. Files are never stat'ed.
+    """
+    atomic_markers = set(settings.atomic_markers)
+    ignore = compile_ignore(settings.ignore_patterns)
+
+    stack = [os.fspath(root)]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            with os.scandir(dirpath) as it:
+                entries = list(it)
+        except OSError:
             continue
 
-        # 2. Respect Ignore Patterns for normal recursion
-        import fnmatch
-        dirnames[:] = [d for d in dirnames if not any(fnmatch.fnmatch(d, p) for p in settings.ignore_patterns)]
-            
-        # 3. Normal File Processing
-        for f in filenames:
-            if any(fnmatch.fnmatch(f, p) for p in settings.ignore_patterns):
+        if any(entry.name in atomic_markers for entry in entries):
+            yield dirpath, True
+            continue
+        yield dirpath, False
+
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir() and not entry.is_symlink() and not ignore.match(entry.name, entry.path):
+                    subdirs.append(entry.path)
+            except OSError:
                 continue
-            
-            full_path = os.path.join(dirpath, f)
-            # Only index regular files (ignore pipes, sockets, devices, etc.)
-            # os.path.isfile follows symlinks, which is generally what we want 
-            # as long as the target is a regular file.
-            if not os.path.isfile(full_path):
+        stack.extend(reversed(subdirs))
+
+class _WorkStealingFrontier:
+    """
+    Pending directories shared by the parallel walker threads.
+    Each worker owns a deque: it pushes and pops its own work at the tail
+    (depth-first, which keeps the frontier small) and steals from the head
+    of the fullest other deque (the shallowest, usually biggest subtrees).
+
+    At most `limit` directories are queued in the deques. A worker keeps
+    the ones that do not fit on its own stack and lists them itself,
+    depth-first like smart_walk, handing them back with offer() as room
+    frees up; they count as outstanding all along, so the walk cannot
+    look finished while a worker still holds some.
+    """
+    def __init__(self, workers: int, limit: int):
+        self._deques = [deque() for _ in range(workers)]
+        self._cond = threading.Condition()
+        self._outstanding = 0  # pushed but not yet fully listed
+        self._queued = 0  # in the deques
+        self.limit = limit
+        self.closed = False
+
+    def push(self, worker_id: int, paths: List[str]) -> List[str]:
+        """Adds paths to the walk; returns those the caller keeps (the frontier is full)."""
+        if not paths:
+            return []
+        with self._cond:
+            self._outstanding += len(paths)
+            return self._share(worker_id, paths)
+
+    def offer(self, worker_id: int, paths: List[str]) -> List[str]:
+        """Moves kept paths (see push) to the deques while there is room; returns those still kept."""
+        if not paths or self._queued >= self.limit:
+            return paths
+        with self._cond:
+            return self._share(worker_id, paths)
+
+    def _share(self, worker_id: int, paths: List[str]) -> List[str]:
+        # The head of paths goes first: for a worker's stack, the shallowest entries
+        room = max(0, self.limit - self._queued)
+        shared, kept = paths[:room], paths[room:]
+        if shared:
+            self._deques[worker_id].extend(shared)
+            self._queued += len(shared)
+            self._cond.notify(len(shared))
+        return kept
+
+    def pop(self, worker_id: int) -> Optional[str]:
+        """Returns the next directory to list, or None once the walk is over."""
+        with self._cond:
+            while True:
+                if self.closed:
+                    return None
+                own = self._deques[worker_id]
+                if own:
+                    self._queued -= 1
+                    return own.pop()
+                victim = max(self._deques, key=len)
+                if victim:
+                    self._queued -= 1
+                    return victim.popleft()
+                if self._outstanding == 0:
+                    return None
+                self._cond.wait()
+
+    def task_done(self):
+        with self._cond:
+            self._outstanding -= 1
+            if self._outstanding == 0:
+                self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+class _WorkerFailed:
+    """Sent by a walker thread that died, so the consumer raises its exception."""
+    def __init__(self, error: BaseException):
+        self.error = error
+
+def parallel_walk(root: Path, workers: Optional[int] = None, max_buffered: Optional[int] = None,
+                  max_pending: Optional[int] = None) -> Generator[WalkEntry, None, None]:
+    """
+    Same records as smart_walk, but directories are listed by several threads.
+    Meant for high-latency filesystems (NFS/SMB) where a single thread spends
+    most of its time waiting on readdir/stat round-trips.
+    Records come out in no particular order.
+
+    Memory stays flat: workers go depth-first, at most `max_pending`
+    directories are queued for stealing (the rest stay on the stack of the
+    worker that found them), and at most `max_buffered` directory listings
+    wait for the consumer before the workers block.
+
+    An unexpected error in a walker thread is raised by the generator:
+    the subtrees it held would otherwise be missing from a walk that
+    looks complete.
+    """
+    workers = workers or settings.walk_workers or settings.max_workers
+    max_buffered = max_buffered or max(workers * 4, 16)
+    max_pending = max_pending or max(workers * 64, 1024)
+    atomic_markers = set(settings.atomic_markers)
+    ignore = compile_ignore(settings.ignore_patterns)
+
+    frontier = _WorkStealingFrontier(workers, max_pending)
+    results = queue.Queue(maxsize=max_buffered)
+    done_marker = object()
+
+    def _put(item) -> bool:
+        # Bounded put that gives up when the consumer went away
+        while not frontier.closed:
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
                 continue
-                
-            yield (full_path, 'file')
\ No newline at end of file
+        return False
+
+    def _worker(worker_id: int):
+        kept: List[str] = []  # Stack of directories the frontier had no room for
+        try:
+            while True:
+                kept = frontier.offer(worker_id, kept)
+                dirpath = kept.pop() if kept and not frontier.closed else frontier.pop(worker_id)
+                if dirpath is None:
+                    return
+                try:
+                    records, subdirs = scan_directory(dirpath, atomic_markers, ignore)
+                    # Children first so the walk can never look finished while they wait
+                    kept.extend(frontier.push(worker_id, list(reversed(subdirs))))
+                    if records and not _put(records):
+                        return
+                finally:
+                    frontier.task_done()
+        except BaseException as e:
+            _put(_WorkerFailed(e))
+        finally:
+            _put(done_marker)
+
+    frontier.push(0, [os.fspath(root)])
+    threads = [
+        threading.Thread(target=_worker, args=(i,), name=f"sortomatic_walker_{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+
+    try:
+        finished = 0
+        while finished < workers:
+            item = results.get()
+            if item is done_marker:
+                finished += 1
+                continue
+            if isinstance(item, _WorkerFailed):
+                raise item.error
+            yield from item
+    finally:
+        # Stops the workers if the consumer closed the generator early
+        frontier.close()
+
+WALKERS = {
+    'sequential': smart_walk,
+    'parallel': parallel_walk,
+}
+
+def get_walker(name: Optional[str] = None):
+    """Returns the walker function registered under name (default: settings.walker)."""
+    name = name or settings.walker
+    try:
+        return WALKERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown walker '{name}'. Available: {', '.join(WALKERS)}")
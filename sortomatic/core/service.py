@@ -1,4 +1,5 @@
 import logging
+import threading
 from sortomatic.core.bridge import bridge
 from sortomatic.core.database import get_children
 from sortomatic.core.metrics import metrics_monitor
@@ -30,6 +31,110 @@ class BridgeLogHandler(logging.Handler):
         except Exception:
             self.handleError(record)
 
+# Background watcher hosted by the GUI process
+_watcher = None
+_watcher_thread = None
+
+def start_watch(path: str):
+    """Starts watching path in a background thread (one watcher per process)."""
+    global _watcher, _watcher_thread
+    from pathlib import Path
+    from sortomatic.core.watcher import Watcher
+
+    if _watcher_thread is not None and _watcher_thread.is_alive():
+        logger.warning(f"Service: Already watching {_watcher.root}")
+        return False
+    _watcher = Watcher(Path(path))
+    _watcher_thread = threading.Thread(target=_watcher.run, name="sortomatic_watcher", daemon=True)
+    _watcher_thread.start()
+    return True
+
+def stop_watch():
+    """Stops the background watcher, if any."""
+    global _watcher, _watcher_thread
+    if _watcher is None:
+        return False
+    _watcher.stop()
+    _watcher_thread.join(timeout=5)
+    _watcher = None
+    _watcher_thread = None
+    return True
+
+# Scan started from the GUI, controlled through its PipelineManager
+_scan_manager = None
+_scan_thread = None
+
+def _cancelling() -> bool:
+    """The scan was cancelled but its thread has not unwound yet."""
+    return (_scan_manager is not None and _scan_manager.control.cancelled and
+            _scan_thread is not None and _scan_thread.is_alive())
+
+def start_scan(path: str):
+    """Runs a full scan of path in a background thread (one scan per process)."""
+    global _scan_manager, _scan_thread
+    from sortomatic.core.pipeline.manager import PipelineManager
+
+    if _scan_thread is not None and _scan_thread.is_alive():
+        if _cancelling():
+            logger.warning("Service: The cancelled scan is still stopping, start again once it has")
+        else:
+            logger.warning("Service: A scan is already running")
+        return False
+    manager = PipelineManager()
+
+    def run():
+        try:
+            manager.run_all(path)
+        except Exception as e:
+            logger.error(f"Service: Scan failed: {e}", exc_info=True)
+            manager.control.state = 'error'
+
+    _scan_manager = manager
+    _scan_thread = threading.Thread(target=run, name="sortomatic_scan", daemon=True)
+    _scan_thread.start()
+    return True
+
+def pause_scan():
+    if _scan_manager is None:
+        return False
+    _scan_manager.pause()
+    return True
+
+def resume_scan():
+    if _scan_manager is None:
+        return False
+    _scan_manager.resume()
+    return True
+
+def cancel_scan(wait: float = 10.0):
+    """
+    Cancels the running scan and waits up to `wait` seconds for it to wind down.
+    Returns True once it has stopped; until then scan_status() reports
+    'cancelling' and start_scan() refuses to start another one.
+    """
+    if _scan_manager is None:
+        return False
+    _scan_manager.cancel()
+    if _scan_thread is not None:
+        _scan_thread.join(timeout=wait)
+        return not _scan_thread.is_alive()
+    return True
+
+def throttle_scan(workers):
+    """Caps the busy workers of the running scan (None lifts the cap)."""
+    if _scan_manager is None:
+        return False
+    _scan_manager.throttle(workers)
+    return True
+
+def scan_status():
+    if _scan_manager is None:
+        return {'state': 'idle'}
+    status = _scan_manager.status()
+    if _cancelling():
+        status['state'] = 'cancelling'
+    return status
+
 def init_bridge_handlers():
     """
     Registers backend handlers for the bridge.
@@ -87,9 +192,9 @@ def init_bridge_handlers():
         if not db.obj or db.is_closed():
              db_state = "error"
              
-        # TODO: Connect to ScanManager to get real scan state
-        # For now, we assume idle or check a global flag if available
-        scan_state = "idle" 
+        scan_state = scan_status()['state']
+        if scan_state in ("idle", "completed", "cancelled") and _watcher is not None and _watcher.mode != "idle":
+            scan_state = "watching"
         
         return {
             "backend": "ready",
@@ -105,4 +210,50 @@ def init_bridge_handlers():
         """
         return metrics_monitor.get_all_metrics()
 
+    # 4. Watch Mode
+    @bridge.handle_request("start_watch")
+    async def handle_start_watch(payload):
+        """
+        Payload: { 'path': str }
+        """
+        return {"watching": start_watch(payload.get('path'))}
+
+    @bridge.handle_request("stop_watch")
+    async def handle_stop_watch(payload):
+        return {"stopped": stop_watch()}
+
+    # 5. Scan control
+    @bridge.handle_request("start_scan")
+    async def handle_start_scan(payload):
+        """
+        Payload: { 'path': str }
+        """
+        started = start_scan(payload.get('path'))
+        return {"started": started, "state": scan_status()['state']}
+
+    @bridge.handle_request("pause_scan")
+    async def handle_pause_scan(payload):
+        return {"paused": pause_scan()}
+
+    @bridge.handle_request("resume_scan")
+    async def handle_resume_scan(payload):
+        return {"resumed": resume_scan()}
+
+    @bridge.handle_request("cancel_scan")
+    async def handle_cancel_scan(payload):
+        import asyncio
+        # Joining the scan thread must not block the event loop
+        return {"cancelled": await asyncio.to_thread(cancel_scan)}
+
+    @bridge.handle_request("throttle_scan")
+    async def handle_throttle_scan(payload):
+        """
+        Payload: { 'workers': Optional[int] } (None lifts the cap)
+        """
+        return {"throttled": throttle_scan((payload or {}).get('workers'))}
+
+    @bridge.handle_request("get_scan_status")
+    async def handle_get_scan_status(payload):
+        return scan_status()
+
     logger.info("Bridge handlers initialized.")
@@ -1,5 +1,5 @@
 """Type definitions for the scanning pipeline."""
-from typing import TypedDict, Optional
+from typing import TypedDict, NamedTuple, Optional
 from datetime import datetime
 
 
@@ -40,3 +40,28 @@ class ScanContext(dict):
 class UpdateContext(TypedDict):
     """Context for database updates with ID."""
     id: int
+
+
+class WalkEntry(NamedTuple):
+    """A single record yielded by the scanner.
+
+    Carries the stat results gathered during traversal so later passes
+    never have to touch the filesystem again for metadata.
+    """
+    path: str
+    entry_type: str  # 'file' or 'bundle'
+    size_bytes: int
+    mtime_ns: int
+    inode: int
+    device: int
+
+    @property
+    def modified_at(self) -> datetime:
+        """The mtime as a datetime, equal to datetime.fromtimestamp(st.st_mtime).
+
+        st_mtime is built as seconds + nanoseconds * 1e-9; mtime_ns / 1e9
+        can round a microsecond apart, which would make rows indexed from
+        st_mtime look modified.
+        """
+        seconds, nanoseconds = divmod(self.mtime_ns, 1_000_000_000)
+        return datetime.fromtimestamp(seconds + nanoseconds * 1e-9)
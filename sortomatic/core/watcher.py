@@ -0,0 +1,338 @@
+"""Live watch mode: keeps the index current from inotify events."""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import stat
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from .config import settings
+from .database import FileIndex, db
+from .ignore import compile_ignore
+from .incremental import forget_tree
+from .scanner import iter_directories, scan_root
+from .types import WalkEntry
+from ..utils.logger import logger
+
+# inotify(7) constants
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+
+_EVENT = struct.Struct("iIII")
+
+class WatchLimitReached(OSError):
+    """The kernel refused a new watch (fs.inotify.max_user_watches)."""
+
+class Inotify:
+    """Minimal ctypes binding to the Linux inotify API."""
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError(errno.ENOSYS, "libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise WatchLimitReached(err, "inotify watch limit reached", path)
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: float):
+        """Yields (wd, mask, cookie, name) tuples, waiting up to timeout seconds for the first one."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(buf):
+            wd, mask, cookie, length = _EVENT.unpack_from(buf, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(buf[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            yield wd, mask, cookie, name
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class Watcher:
+    """
+    Watches a scanned root and pushes changes through index -> categorize -> hash.
+
+    Events are coalesced per path (the last event wins) and flushed as one
+    batch once the tree has been quiet for `watch_debounce` seconds, at the
+    latest `watch_max_delay` seconds after the first pending event, or when
+    `watch_batch_size` paths are pending. An rsync of 100k files therefore
+    becomes a handful of batches instead of 100k tiny passes.
+
+    - File events upsert or delete single rows.
+    - Directory events (new, moved, marker added or removed) re-walk that
+      subtree with the incremental walker.
+    - A kernel queue overflow re-walks the whole root incrementally.
+
+    If the kernel watch limit is hit (or inotify is unavailable), the watcher
+    falls back to an incremental rescan every `watch_rescan_interval` seconds.
+    """
+    # Pending operations, keyed by path
+    FILE, DELETE, DIR, FORGET_DIR = "file", "delete", "dir", "forget_dir"
+
+    def __init__(self, root: Path, manager=None):
+        from .pipeline.manager import PipelineManager
+        self.root = scan_root(root)
+        self.manager = manager or PipelineManager()
+        self.mode = "idle"  # 'inotify', 'polling' or 'idle'
+        self._stop = threading.Event()
+        self._inotify: Optional[Inotify] = None
+        self._watches: Dict[int, str] = {}
+        self._bundles = set()
+        self._pending: Dict[str, str] = {}
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._atomic_markers = set(settings.atomic_markers)
+        self._ignore = compile_ignore(settings.ignore_patterns)
+
+    def stop(self):
+        """Asks run() to return after the current batch."""
+        self._stop.set()
+
+    def run(self, catch_up: bool = True):
+        """Blocks until stop() is called."""
+        try:
+            self._inotify = Inotify()
+            self._watch_tree(self.root)
+        except OSError as e:
+            self._close_inotify()
+            if isinstance(e, WatchLimitReached):
+                logger.warning(f"inotify watch limit reached ({e.filename}). Raise fs.inotify.max_user_watches; "
+                               f"falling back to a rescan every {settings.watch_rescan_interval}s")
+            else:
+                logger.warning(f"Live watching unavailable ({e}); falling back to periodic rescans")
+
+        if catch_up:
+            self._refresh(self.root)
+
+        try:
+            if self._inotify:
+                self.mode = "inotify"
+                logger.info(f"👀 Watching {self.root} ({len(self._watches)} directories)")
+                self._event_loop()
+            if not self._stop.is_set():
+                self.mode = "polling"
+                self._poll_loop()
+        finally:
+            self.mode = "idle"
+            self._close_inotify()
+
+    # --- Event handling ---
+
+    def _event_loop(self):
+        while not self._stop.is_set():
+            timeout = self._flush_timeout()
+            for wd, mask, _cookie, name in self._inotify.read_events(timeout):
+                try:
+                    self._on_event(wd, mask, name)
+                except WatchLimitReached as e:
+                    logger.warning(f"inotify watch limit reached ({e.filename}); "
+                                   f"falling back to a rescan every {settings.watch_rescan_interval}s")
+                    self._close_inotify()
+                    self._flush()
+                    return
+            if self._should_flush():
+                self._flush()
+        self._flush()
+
+    def _on_event(self, wd: int, mask: int, name: str):
+        if mask & IN_Q_OVERFLOW:
+            logger.warning("inotify queue overflow, rescanning the whole tree")
+            self._queue(self.root, self.DIR)
+            return
+
+        dirpath = self._watches.get(wd)
+        if dirpath is None:
+            return
+        if mask & IN_IGNORED:
+            # Watch removed by the kernel (directory deleted or moved away)
+            self._watches.pop(wd, None)
+            self._bundles.discard(dirpath)
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF) or not name:
+            return
+
+        path = os.path.join(dirpath, name)
+        if name in self._atomic_markers:
+            # May turn the folder into a bundle (or back)
+            self._queue(dirpath, self.DIR)
+            return
+        if dirpath in self._bundles or self._ignore.match(name, path):
+            return
+
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(path)
+                self._queue(path, self.DIR)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._unwatch_tree(path)
+                self._queue(path, self.FORGET_DIR)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self._queue(path, self.DELETE)
+        else:
+            self._queue(path, self.FILE)
+
+    def _queue(self, path: str, op: str):
+        now = time.monotonic()
+        if not self._pending:
+            self._first_event = now
+        self._last_event = now
+        self._pending[path] = op
+
+    def _flush_timeout(self) -> float:
+        """How long to wait for events before the pending batch is due (capped to stay responsive to stop())."""
+        if not self._pending:
+            return 1.0
+        now = time.monotonic()
+        due = min(self._last_event + settings.watch_debounce, self._first_event + settings.watch_max_delay)
+        return max(0.0, min(1.0, due - now))
+
+    def _should_flush(self) -> bool:
+        if not self._pending:
+            return False
+        now = time.monotonic()
+        return (now - self._last_event >= settings.watch_debounce
+                or now - self._first_event >= settings.watch_max_delay
+                or len(self._pending) >= settings.watch_batch_size)
+
+    # --- Batch processing ---
+
+    def _flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        start = time.time()
+
+        removed = 0
+        entries = []
+        deleted = []
+        for path, op in batch.items():
+            if op == self.FORGET_DIR:
+                removed += forget_tree(path)
+            elif op == self.DELETE:
+                deleted.append(path)
+            elif op == self.FILE:
+                entry = self._stat_file(path)
+                if entry:
+                    entries.append(entry)
+                else:
+                    deleted.append(path)
+
+        with db.atomic():
+            for i in range(0, len(deleted), 500):
+                removed += FileIndex.delete().where(FileIndex.path.in_(deleted[i:i + 500])).execute()
+
+        indexed = self.manager.index_entries(entries)['count'] if entries else 0
+        dirs = [path for path, op in batch.items() if op == self.DIR]
+        # A refresh of the root covers every other directory
+        if self.root in dirs:
+            dirs = [self.root]
+        for dirpath in dirs:
+            result = self.manager.run_index(dirpath, incremental=True)
+            indexed += result['count']
+            removed += result.get('removed', 0)
+
+        categorized = self.manager.run_categorize()
+        hashed = self.manager.run_hash()
+        logger.info(f"Watch: {len(batch)} changes -> {indexed} indexed, {removed} removed, "
+                    f"{categorized} categorized, {hashed} hashed in {time.time() - start:.1f}s")
+
+    def _stat_file(self, path: str) -> Optional[WalkEntry]:
+        """Same rules as the scanner: regular files only, following symlinks."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return WalkEntry(path, 'file', st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
+
+    def _refresh(self, path: str):
+        """Incremental rescan of path followed by the categorize and hash passes."""
+        result = self.manager.run_index(path, incremental=True)
+        self.manager.run_categorize()
+        self.manager.run_hash()
+        return result
+
+    # --- Watches ---
+
+    def _watch_tree(self, root: str):
+        """Adds a watch on every directory the scanner would visit (bundles: the folder only)."""
+        for dirpath, is_bundle in iter_directories(Path(root)):
+            try:
+                wd = self._inotify.add_watch(dirpath)
+            except WatchLimitReached:
+                raise
+            except OSError:
+                # Vanished or unreadable: the next listing will tell
+                continue
+            self._watches[wd] = dirpath
+            if is_bundle:
+                self._bundles.add(dirpath)
+
+    def _unwatch_tree(self, root: str):
+        prefix = root + os.sep
+        for wd, dirpath in list(self._watches.items()):
+            if dirpath == root or dirpath.startswith(prefix):
+                self._inotify.rm_watch(wd)
+                self._watches.pop(wd, None)
+                self._bundles.discard(dirpath)
+
+    def _close_inotify(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+        self._watches.clear()
+        self._bundles.clear()
+
+    # --- Fallback ---
+
+    def _poll_loop(self):
+        logger.info(f"Rescanning {self.root} every {settings.watch_rescan_interval}s")
+        while not self._stop.wait(settings.watch_rescan_interval):
+            result = self._refresh(self.root)
+            logger.info(f"Rescan: {result['count']} indexed, {result.get('removed', 0)} removed")
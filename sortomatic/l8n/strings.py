@@ -4,16 +4,86 @@ class Strings:
     SCAN_PATH_HELP = "The folder to scan"
     SCAN_RESET_HELP = "Clear database before scanning"
     SCAN_DOC = "Scanning pipeline commands."
-    SCAN_ALL_DOC = "Run the full indexing pipeline (Index -> Categorize -> Hash)."
+    SCAN_ALL_DOC = "Run the full indexing pipeline (Index -> Categorize -> Hash), reading each file once."
     SCAN_INDEX_DOC = "Pass 1: Just index file paths and metadata (Fastest)."
     SCAN_CAT_DOC = "Pass 2: Categorize files that were just indexed."
     SCAN_HASH_DOC = "Pass 3: Compute hashes for deduplication."
+    SCAN_ARCHIVES_DOC = "List the files inside archives (zip, jar, tar) without extracting them."
+    SCAN_ESTIMATE_HELP = "Estimate the number of files first to show a progress bar with an ETA"
+    ESTIMATE_DOC = "Quickly estimate the size and content of a folder by sampling it."
+    ESTIMATE_SECONDS_HELP = "Time budget in seconds"
+    ESTIMATE_TITLE = "Estimate (95% range)"
+    ESTIMATE_CATEGORIES_TITLE = "Estimated Category Mix"
+    ESTIMATE_METRIC_LABEL = "Metric"
+    ESTIMATE_VALUE_LABEL = "Estimate"
+    ESTIMATE_RANGE_LABEL = "Range"
+    ESTIMATE_SHARE_LABEL = "Share"
+    ESTIMATE_FILES = "Files"
+    ESTIMATE_BYTES = "Size"
+    ESTIMATE_DIRS = "Directories"
+    ESTIMATE_BUNDLES = "Project bundles"
+    ESTIMATE_HASH_TIME = "Hash time"
+    ESTIMATE_SUMMARY = "Based on {probes} random probes ({listed} directories listed)."
+    ESTIMATE_EXACT = "The whole tree was listed: numbers are exact."
+    ESTIMATE_TOTAL = "Estimated {count} files to index."
+    SCAN_INCREMENTAL_HELP = "Only re-list directories that changed since the last scan"
+    SCAN_TIME_BUDGET_HELP = "Stop hashing cleanly after this long, e.g. 90m or 2h (plain numbers are seconds)"
+    SCAN_HASH_ORDER_HELP = "Hash order: index, or reclaim to hash likely duplicates first, largest first"
+    SCAN_TARGET_DOC = "Fill one column (e.g. full_hash, perceptual_hash) with only the passes it needs."
+    SCAN_TARGET_HELP = "Column of the index to fill"
+    TARGET_PLAN = "Passes for {column}: {passes}"
+    TARGET_DONE = "{column} is up to date ({counts})."
+    TARGET_INCOMPLETE = "{column} is incomplete: the {passes} pass could not run (missing libraries). Done: {counts}."
+    HASH_UNVERIFIED = "{size} in {count} files sharing a size still need verification."
+    HASH_QUARANTINED = "{count} files that failed to hash are quarantined (see 'sortomatic quarantine')."
+    QUARANTINE_DOC = "List the files that failed to hash and when they will be tried again."
+    QUARANTINE_RETRY_HELP = "Hash the quarantined files now instead of waiting for their retry time"
+    QUARANTINE_TITLE = "Quarantined files"
+    QUARANTINE_EMPTY = "No file in quarantine."
+    ERROR_LABEL = "Error"
+    ATTEMPTS_LABEL = "Attempts"
+    LAST_ATTEMPT_LABEL = "Last attempt"
+    RETRY_AFTER_LABEL = "Next retry"
+    MERGE_DOC = "Merge the databases of several scanned folders into one catalog for cross-volume duplicates."
+    MERGE_CATALOG_HELP = "Catalog database file (created if missing)"
+    MERGE_SOURCES_HELP = "Scanned folders or database files, optionally named as NAME=PATH (default name: the folder's path)"
+    MERGE_SOURCE_MISSING = "No database found for {source}"
+    MERGE_SUMMARY = "Catalog {catalog}: {volumes} volumes, {files} files."
     WIPE_CONFIRM = "Are you sure you want to wipe the database?"
     WIPE_SUCCESS = "Database wiped."
     STATS_DOC = "Show insights about your files."
+    WATCH_DOC = "Keep the index current by watching a scanned folder for changes."
+    WATCH_HELP = "Watch the folder for changes while the GUI runs"
+    WATCH_STOPPED = "Stopped watching."
     STATS_TITLE = "File Distribution"
     CATEGORY_LABEL = "Category"
     COUNT_LABEL = "Count"
+    STATS_DUPLICATES_HELP = "List duplicate files and the space they waste"
+    STATS_RUNS_HELP = "Show the history of scan passes and how their speed evolves"
+    RUNS_TITLE = "Scan runs"
+    RUNS_EMPTY = "No scan recorded yet."
+    STARTED_LABEL = "Started"
+    PASS_LABEL = "Pass"
+    STATE_LABEL = "State"
+    FILES_LABEL = "Files"
+    DURATION_LABEL = "Duration"
+    FILES_RATE_LABEL = "Files/s"
+    MB_RATE_LABEL = "MB/s"
+    TREND_LABEL = "vs previous"
+    ERRORS_LABEL = "Errors (timeouts)"
+    WORKERS_LABEL = "Workers"
+    THROUGHPUT_LABEL = "Throughput"
+    VERSION_LABEL = "Version"
+    DUPLICATES_TITLE = "Duplicates"
+    DUPLICATES_FILE_LABEL = "File"
+    SIZE_LABEL = "Size"
+    RECLAIMABLE_LABEL = "Reclaimable"
+    NOTE_LABEL = "Note"
+    ALREADY_DEDUPLICATED = "Hard links: already deduplicated, 0 bytes reclaimable"
+    HARDLINKS_NOTE = "{count} hard link(s) not counted"
+    DUPLICATES_SUMMARY = "{groups} duplicate groups, {size} reclaimable."
+    MEMBER_DUPLICATES_TITLE = "Duplicate archive members (stored CRC)"
+    MEMBER_DUPLICATES_SUMMARY = "{groups} archive members stored more than once (matched by size and CRC, not verified)."
     USER_ABORT = "Operation cancelled by user."
 
     # Engine messages
@@ -21,9 +91,12 @@ class Strings:
     INDEXING_MSG = "Indexing ..."
     CATEGORIZING_MSG = "Categorizing ..."
     HASHING_MSG = "Hashing ..."
+    ARCHIVES_MSG = "Listing archives ..."
     SCAN_COMPLETE = "✨ Scan Complete! Indexed {total_files} files."
     SCAN_INTERRUPTED = "⚠️  Scan interrupted! Progress saved. Run the same command again to resume."
     SCAN_ERROR = "❌ Scan failed with error. Check logs for details."
+    BUNDLES_SIZED = "Measured {count} project bundles."
+    INCREMENTAL_SUMMARY = "Incremental: {relisted_dirs} directories re-listed, {skipped_dirs} unchanged ({rewritten} files rewritten in place), {removed} entries removed."
 
     # Categories
     CAT_IMAGE = "Image"
@@ -36,6 +109,14 @@ class Strings:
     CAT_SOFTWARE = "Software"
     CAT_OTHER = "Other"
     CAT_UNSORTED = "Unsorted"
+
+    # Aliases used by the pipeline passes
+    CAT_IMAGES = CAT_IMAGE
+    CAT_VIDEOS = CAT_VIDEO
+    CAT_DOCUMENTS = CAT_DOCUMENT
+    CAT_AUDIO = CAT_MUSIC
+    CAT_ARCHIVES = CAT_ARCHIVE
+    CAT_OTHERS = CAT_OTHER
     
     DEFAULT_MIME = "application/octet-stream"
 
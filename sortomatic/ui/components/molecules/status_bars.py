@@ -39,6 +39,7 @@ def StatusBar(theme: Theme, on_theme_change: Optional[Callable] = None):
                 'ready': 'mdi-progress-check',
                 'error': 'mdi-progress-alert',
                 'pending': 'mdi-progress-helper',
+                'watching': 'mdi-eye-outline',
                 'default': 'mdi-progress-clock'
             }
 
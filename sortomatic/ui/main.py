@@ -2,7 +2,7 @@ from nicegui import ui
 from .styles import load_global_styles
 from .themes.solarized import SOLARIZED_DARK, SOLARIZED_LIGHT
 
-def start_app(port: int, theme: str, dark: bool, path: str = None):
+def start_app(port: int, theme: str, dark: bool, path: str = None, watch: bool = False):
     """Entry point for the NiceGUI application."""
     print(f"DEBUG: Starting app on port {port} with path {path}")
     
@@ -15,8 +15,10 @@ def start_app(port: int, theme: str, dark: bool, path: str = None):
 
     # Initialize Backend Bridge
     from sortomatic.core.bridge import bridge
-    from sortomatic.core.service import init_bridge_handlers
+    from sortomatic.core.service import init_bridge_handlers, start_watch
     init_bridge_handlers()
+    if watch and path:
+        start_watch(path)
 
     @ui.page('/')
     def main_page():
@@ -130,6 +132,35 @@ def start_app(port: int, theme: str, dark: bool, path: str = None):
         active_terminals = []
         active_scancards = []
         
+        def set_scan_state(state):
+            for card in active_scancards:
+                card.update_state(state)
+
+        async def start_scan():
+            if not path:
+                ui.notify("No folder to scan: start the GUI with a path", type='warning')
+                return
+            result = await bridge.request("start_scan", {'path': path})
+            if result and result.get("started"):
+                ui.notify("Starting scan...", type='info')
+                set_scan_state("running")
+            elif result and result.get("state") == "cancelling":
+                ui.notify("The previous scan is still stopping, try again in a moment", type='warning')
+
+        async def pause_scan():
+            await bridge.request("pause_scan")
+            set_scan_state("paused")
+
+        async def resume_scan():
+            await bridge.request("resume_scan")
+            set_scan_state("running")
+
+        async def restart_scan():
+            ui.notify("Restarting scan...", type='warning')
+            # A scan still unwinding after the wait is reported by start_scan
+            await bridge.request("cancel_scan")
+            await start_scan()
+
         def create_scan_card():
             # Create a ScanCard and track it
             card = ScanCard(
@@ -139,8 +170,10 @@ def start_app(port: int, theme: str, dark: bool, path: str = None):
                 eta="--:--",
                 unit="file/s",
                 theme=app_theme,
-                on_play=lambda: ui.notify("Starting scan...", type='info'),
-                on_restart=lambda: ui.notify("Restarting scan...", type='warning'),
+                on_play=start_scan,
+                on_pause=pause_scan,
+                on_resume=resume_scan,
+                on_restart=restart_scan,
             )
             # Layout is handled by CSS grid now
             card.classes('w-full h-full') 
@@ -164,6 +197,25 @@ def start_app(port: int, theme: str, dark: bool, path: str = None):
                 separator=True
             )
 
+        # Follow the running scan (it may also finish or fail on its own)
+        async def update_scan_cards():
+            if not client.has_socket_connection or not active_scancards:
+                return
+            status = await bridge.request("get_scan_status")
+            if not status or status.get('state') == 'idle':
+                return
+            for card in active_scancards:
+                card.update_progress(100.0 if status['state'] == 'completed' else 0.0, "--:--",
+                                     f"{status.get('rate', 0.0):.0f}", "file/s")
+                if status['state'] == 'cancelling':
+                    card.update_status("Cancelling...")
+                else:
+                    card.update_status(f"{status.get('pass') or ''}: {status.get('done', 0)} files",
+                                       is_error=status['state'] == 'error')
+                card.update_state({'cancelled': 'idle', 'cancelling': 'running'}.get(status['state'], status['state']))
+
+        ui.timer(1.0, update_scan_cards)
+
         # 3. Bridge Listeners for Updates
         def handle_log_record(record):
             if not client.has_socket_connection:
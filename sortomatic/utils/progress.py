@@ -6,7 +6,8 @@ from rich.progress import (
     BarColumn,
     TaskProgressColumn,
     MofNCompleteColumn,
-    ProgressColumn
+    ProgressColumn,
+    TimeRemainingColumn
 )
 from rich.text import Text
 from rich.table import Column
@@ -32,7 +33,7 @@ def create_scan_progress(console, mode: str, total=None):
     Args:
         console: Rich console instance
         mode: Scan mode ('index', 'category', 'hash', 'all')
-        total: Total items if known (for determinate progress)
+        total: Total items if known or estimated (for determinate progress)
         
     Returns:
         Configured Progress instance
@@ -43,9 +44,10 @@ def create_scan_progress(console, mode: str, total=None):
         BarColumn(),
     ]
     
-    # Add percentage or count based on whether we have a total
+    # Add percentage and ETA, or count, based on whether we have a total
     if total is not None:
         progress_columns.append(TaskProgressColumn())
+        progress_columns.append(TimeRemainingColumn())
     else:
         progress_columns.append(MofNCompleteColumn())
     
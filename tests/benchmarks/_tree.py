@@ -0,0 +1,36 @@
+"""Shared helpers for the benchmark scripts in this folder."""
+import time
+from pathlib import Path
+
+
+def make_tree(root: Path, depth: int = 3, fanout: int = 6, files_per_dir: int = 40, size: int = 0) -> int:
+    """
+    Generates a synthetic tree under root and returns the number of files created.
+    Every level has `fanout` sub-directories and `files_per_dir` files of `size` bytes.
+    """
+    payload = b"x" * size
+    count = 0
+    stack = [(Path(root), 0)]
+    while stack:
+        folder, level = stack.pop()
+        folder.mkdir(parents=True, exist_ok=True)
+        for i in range(files_per_dir):
+            with open(folder / f"file_{i:04d}.dat", "wb") as f:
+                f.write(payload)
+            count += 1
+        if level < depth:
+            for d in range(fanout):
+                stack.append((folder / f"dir_{d:02d}", level + 1))
+    return count
+
+
+def timed(func, *args, repeat: int = 3, **kwargs):
+    """Runs func several times and returns (best_seconds, last_result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
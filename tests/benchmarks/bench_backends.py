@@ -0,0 +1,100 @@
+"""
+Benchmark: hash pass on images with the thread backend vs the process backend.
+
+Copies the sample/ images into a temporary tree and hashes them with 1, 2, 4...
+workers on each backend, reporting files/s and the speed-up per worker.
+Perceptual hashing (PIL + imagehash) is what the process backend is for: without
+those packages only xxHash runs and the numbers show the dispatch overhead.
+
+    python tests/benchmarks/bench_backends.py [--copies 40] [--max-workers 8]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from sortomatic.core import database
+from sortomatic.core.config import settings
+from sortomatic.core.database import FileIndex
+from sortomatic.core.pipeline import backends, manager as pipeline
+from sortomatic.core.pipeline.passes import hashing
+
+SAMPLE = Path(__file__).resolve().parents[2] / "sample"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".tiff", ".bmp", ".gif", ".heic", ".heif"}
+
+
+def make_images(root: Path, copies: int) -> int:
+    images = [p for p in SAMPLE.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES]
+    count = 0
+    for i in range(copies):
+        folder = root / f"copy_{i:03d}"
+        folder.mkdir(parents=True)
+        for image in images:
+            shutil.copy(image, folder / image.name)
+            count += 1
+    return count
+
+
+def run_hash(manager, backend: str, workers: int) -> float:
+    FileIndex.update(fast_hash=None, full_hash=None, perceptual_hash=None).execute()
+    settings.pass_backends['hash'] = backend
+    settings.max_workers = workers
+    settings.adaptive_concurrency = False
+    settings.process_workers = workers
+    pipeline._shutdown_executor(wait=True)
+    if backend == 'process':
+        # Start the pool outside the timing: spawn costs a fixed ~0.1s per worker
+        pool = backends.get_process_pool()
+        list(pool.map(abs, range(workers * 4)))
+    start = time.perf_counter()
+    manager.run_hash()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=40)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args()
+
+    if not hashing.installed('imagehash', 'PIL'):
+        print("PIL/imagehash not installed: perceptual hashing is skipped, routing all files to the processes anyway")
+        hashing.is_cpu_bound = lambda category: True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "tree"
+        files = make_images(root, args.copies)
+        database.init_db(str(Path(tmp) / "bench.db"))
+        manager = pipeline.PipelineManager()
+        manager.run_index(str(root))
+        manager.run_categorize()
+        print(f"{files} images, {sum(p.stat().st_size for p in root.rglob('*')) / 2**20:.1f} MiB\n")
+
+        counts = []
+        n = 1
+        while n <= args.max_workers:
+            counts.append(n)
+            n *= 2
+
+        print(f"{'workers':>8} {'threads f/s':>12} {'processes f/s':>14} {'thread x':>9} {'process x':>10}")
+        base = {}
+        for workers in counts:
+            row = {}
+            for backend in ('thread', 'process'):
+                elapsed = run_hash(manager, backend, workers)
+                row[backend] = files / elapsed
+                base.setdefault(backend, row[backend])
+            print(f"{workers:>8} {row['thread']:>12.1f} {row['process']:>14.1f} "
+                  f"{row['thread'] / base['thread']:>8.2f}x {row['process'] / base['process']:>9.2f}x")
+
+        pipeline._shutdown_executor(wait=True)
+        database.close_db()
+
+
+if __name__ == "__main__":
+    main()
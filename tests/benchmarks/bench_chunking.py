@@ -0,0 +1,81 @@
+"""
+Benchmark: one future per file vs adaptive chunked submission in the index pass.
+
+Builds a tree of zero-byte files and reports files/s for
+  - dispatch only: the walk records pushed through _run_fs_pipeline, writes disabled
+  - run_index: the full index pass into a fresh SQLite database
+
+    python tests/benchmarks/bench_chunking.py [--files 1000000] [--threads 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from _tree import make_tree, timed
+from sortomatic.core import database
+from sortomatic.core.config import settings
+from sortomatic.core.pipeline import manager as pipeline
+from sortomatic.core.scanner import smart_walk
+
+
+def dispatch_only(manager, entries):
+    # Writes are disabled, but the pass still commits its (empty) batches:
+    # an in-memory database keeps them inline and next to free
+    database.close_db()
+    database.init_db(":memory:")
+    return manager._run_fs_pipeline(iter(entries), manager._index_pass, None, record=False)['count']
+
+
+def full_index(manager, root, db_path):
+    database.close_db()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    database.init_db(db_path)
+    return manager.run_index(str(root))['count']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--threads", type=int, default=settings.max_workers)
+    args = parser.parse_args()
+
+    settings.max_workers = args.threads
+    settings.adaptive_concurrency = False
+    settings.checkpoint_interval = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "tree"
+        per_dir = 1000
+        count = make_tree(root, depth=1, fanout=max(0, args.files // per_dir - 1), files_per_dir=per_dir, size=0)
+        entries = list(smart_walk(root))
+        db_path = str(Path(tmp) / "bench.db")
+        print(f"{count} zero-byte files, {args.threads} threads\n")
+
+        manager = pipeline.PipelineManager()
+        real_flush = manager._flush_insert
+        print(f"{'mode':<14} {'per file f/s':>14} {'chunked f/s':>14} {'speed-up':>9}")
+        for name in ("dispatch only", "run_index"):
+            rates = {}
+            for chunked in (False, True):
+                settings.chunked_submission = chunked
+                if name == "dispatch only":
+                    manager._flush_insert = lambda data: None
+                    best, n = timed(dispatch_only, manager, entries)
+                else:
+                    manager._flush_insert = real_flush
+                    best, n = timed(full_index, manager, root, db_path, repeat=1)
+                rates[chunked] = n / best
+            print(f"{name:<14} {rates[False]:>14,.0f} {rates[True]:>14,.0f} {rates[True] / rates[False]:>8.2f}x")
+
+        pipeline._shutdown_executor(wait=True)
+        database.close_db()
+
+
+if __name__ == "__main__":
+    main()
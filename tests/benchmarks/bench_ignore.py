@@ -0,0 +1,73 @@
+"""
+Micro-benchmark: per-pattern fnmatch loop vs the compiled IgnoreMatcher.
+
+    python tests/benchmarks/bench_ignore.py [--patterns 60] [--names 200000]
+"""
+import argparse
+import fnmatch
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from _tree import timed
+from sortomatic.core.ignore import IgnoreMatcher
+
+
+def build_patterns(count: int):
+    """A realistic mix: mostly literal names plus a tail of globs."""
+    literals = [".git", "__pycache__", ".DS_Store", "node_modules", ".venv", "venv", ".sortomatic",
+                "Thumbs.db", "desktop.ini", ".idea", ".vscode", ".tox", ".mypy_cache", ".cache"]
+    globs = ["*.tmp", "*.swp", "*.swo", "~$*", "*.part", "*.crdownload", "._*", "*.pyc", "*~", "*.bak"]
+    patterns = literals + globs
+    i = 0
+    while len(patterns) < count:
+        patterns.append(f"build{i}" if i % 2 else f"*.ext{i}")
+        i += 1
+    return patterns[:count]
+
+
+def build_names(count: int):
+    rng = random.Random(42)
+    stems = ["report", "IMG_", "notes", "index", "main", "data", "backup", "video"]
+    exts = [".jpg", ".txt", ".py", ".tmp", ".pdf", ".mp4", ".pyc", ""]
+    specials = [".git", "node_modules", "Thumbs.db", "~$doc.docx", "._photo.jpg"]
+    names = []
+    for _ in range(count):
+        if rng.random() < 0.05:
+            names.append(rng.choice(specials))
+        else:
+            names.append(f"{rng.choice(stems)}{rng.randint(0, 9999)}{rng.choice(exts)}")
+    return names
+
+
+def fnmatch_loop(names, patterns):
+    return sum(1 for n in names if any(fnmatch.fnmatch(n, p) for p in patterns))
+
+
+def compiled(names, matcher):
+    return sum(1 for n in names if matcher.match_name(n))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--patterns", type=int, default=60)
+    parser.add_argument("--names", type=int, default=200_000)
+    args = parser.parse_args()
+
+    patterns = build_patterns(args.patterns)
+    names = build_names(args.names)
+    matcher = IgnoreMatcher(patterns)
+
+    loop_time, loop_hits = timed(fnmatch_loop, names, patterns)
+    fast_time, fast_hits = timed(compiled, names, matcher)
+    assert loop_hits == fast_hits, (loop_hits, fast_hits)
+
+    print(f"{len(patterns)} patterns, {len(names):,} names, {loop_hits:,} ignored")
+    print(f"fnmatch loop   {len(names) / loop_time:>14,.0f} names/s")
+    print(f"IgnoreMatcher  {len(names) / fast_time:>14,.0f} names/s  ({loop_time / fast_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
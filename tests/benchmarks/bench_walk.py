@@ -0,0 +1,147 @@
+"""
+Benchmark: os.walk based walker (+ stat in the index pass) vs the scandir walker.
+
+Counts metadata syscalls (stat/lstat, scandir) at the Python level and reports files/s.
+
+    python tests/benchmarks/bench_walk.py [--depth 3] [--fanout 6] [--files 40]
+"""
+import argparse
+import fnmatch
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from _tree import make_tree, timed
+from sortomatic.core.config import settings
+from sortomatic.core.scanner import smart_walk
+
+
+def legacy_smart_walk(root):
+    """The previous os.walk + os.path.isfile walker, kept verbatim for comparison."""
+    atomic_markers = set(settings.atomic_markers)
+    for dirpath, dirnames, filenames in os.walk(root):
+        full_contents = set(dirnames) | set(filenames)
+        if not full_contents.isdisjoint(atomic_markers):
+            yield (dirpath, 'bundle')
+            dirnames[:] = []
+            continue
+        dirnames[:] = [d for d in dirnames if not any(fnmatch.fnmatch(d, p) for p in settings.ignore_patterns)]
+        for f in filenames:
+            if any(fnmatch.fnmatch(f, p) for p in settings.ignore_patterns):
+                continue
+            full_path = os.path.join(dirpath, f)
+            if not os.path.isfile(full_path):
+                continue
+            yield (full_path, 'file')
+
+
+def legacy_index(root):
+    """Legacy walk followed by the os.stat the old _index_pass performed."""
+    count = 0
+    for path, _ in legacy_smart_walk(root):
+        os.stat(path)
+        count += 1
+    return count
+
+
+def scandir_index(root):
+    """New walk: the record already holds the stat result."""
+    count = 0
+    for entry in smart_walk(root):
+        _ = entry.size_bytes
+        count += 1
+    return count
+
+
+class SyscallCounter:
+    """Wraps os.stat / os.lstat / os.scandir and DirEntry.stat to count metadata lookups."""
+
+    def __init__(self):
+        self.counts = {"stat": 0, "lstat": 0, "scandir": 0}
+
+    def __enter__(self):
+        self._orig = (os.stat, os.lstat, os.scandir)
+        orig_stat, orig_lstat, orig_scandir = self._orig
+        counts = self.counts
+
+        def stat(*a, **kw):
+            counts["lstat" if kw.get("follow_symlinks") is False else "stat"] += 1
+            return orig_stat(*a, **kw)
+
+        def lstat(*a, **kw):
+            counts["lstat"] += 1
+            return orig_lstat(*a, **kw)
+
+        class Entry:
+            __slots__ = ("_e",)
+
+            def __init__(self, e):
+                self._e = e
+
+            def stat(self, *, follow_symlinks=True):
+                counts["stat" if follow_symlinks else "lstat"] += 1
+                return self._e.stat(follow_symlinks=follow_symlinks)
+
+            def __getattr__(self, name):
+                return getattr(self._e, name)
+
+            def __fspath__(self):
+                return self._e.path
+
+        class Scandir:
+            def __init__(self, path):
+                counts["scandir"] += 1
+                self._it = orig_scandir(path)
+
+            def __iter__(self):
+                return (Entry(e) for e in self._it)
+
+            def __next__(self):
+                return Entry(next(self._it))
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self._it.close()
+
+            def close(self):
+                self._it.close()
+
+        os.stat, os.lstat, os.scandir = stat, lstat, Scandir
+        return self
+
+    def __exit__(self, *exc):
+        os.stat, os.lstat, os.scandir = self._orig
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=6)
+    parser.add_argument("--files", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        n = make_tree(root, depth=args.depth, fanout=args.fanout, files_per_dir=args.files)
+        print(f"Generated {n} files")
+
+        for name, func in (("os.walk + stat", legacy_index), ("scandir", scandir_index)):
+            with SyscallCounter() as counter:
+                func(root)
+            elapsed, count = timed(func, root)
+            calls = counter.counts
+            per_file = (calls["stat"] + calls["lstat"]) / max(count, 1)
+            print(
+                f"{name:<16} {count / elapsed:>12,.0f} files/s   "
+                f"stat={calls['stat']} lstat={calls['lstat']} scandir={calls['scandir']} "
+                f"({per_file:.2f} stat calls/file)"
+            )
+
+
+if __name__ == "__main__":
+    main()
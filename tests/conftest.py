@@ -4,7 +4,7 @@ import os
 import shutil
 import tempfile
 from pathlib import Path
-from sortomatic.core.database import db, FileIndex, init_db
+from sortomatic.core.database import db, FileIndex, MODELS, init_db
 from sortomatic.core.config import settings
 
 @pytest.fixture
@@ -27,7 +27,7 @@ def test_db():
     db.initialize(database)
     
     db.connect()
-    db.create_tables([FileIndex])
+    db.create_tables(MODELS)
     
     yield db
     
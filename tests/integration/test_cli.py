@@ -32,3 +32,18 @@ def test_cli_stats_no_db(temp_workspace):
     result = runner.invoke(app, ["stats", str(temp_workspace)])
     assert result.exit_code == 1
     assert "No database found" in result.stdout
+
+def test_cli_scan_hash_time_budget(mocker, monkeypatch):
+    """'scan hash --time-budget' accepts human durations."""
+    from sortomatic.core.config import settings
+    monkeypatch.setattr(settings, "hash_time_budget", None)
+    monkeypatch.setattr(settings, "hash_order", "index")
+    mock_run = mocker.patch("sortomatic.cli._run_pipeline")
+
+    result = runner.invoke(app, ["scan", "hash", "--time-budget", "1h30m", "--order", "reclaim"])
+
+    assert result.exit_code == 0
+    mock_run.assert_called_once_with(None, mode="hash")
+    assert settings.hash_time_budget == 5400
+    assert settings.hash_order == "reclaim"
+    assert runner.invoke(app, ["scan", "hash", "--time-budget", "soon"]).exit_code != 0
@@ -0,0 +1,48 @@
+import os
+from sortomatic.core.pipeline.manager import PipelineManager
+from sortomatic.core.pipeline.passes import bundles
+from sortomatic.core.database import FileIndex
+
+def _make_repo(root):
+    repo = root / "repo"
+    (repo / "src" / "pkg").mkdir(parents=True)
+    (repo / "package.json").write_text("{}")
+    (repo / "src" / "a.js").write_bytes(b"a" * 1000)
+    (repo / "src" / "pkg" / "b.js").write_bytes(b"b" * 500)
+    os.link(repo / "src" / "a.js", repo / "src" / "a_link.js")
+    return repo
+
+def test_bundle_sizes(temp_workspace, test_db):
+    """Bundles get their real content size and file count."""
+    repo = _make_repo(temp_workspace)
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+
+    assert manager.run_bundle_sizes() == 1
+
+    row = FileIndex.get(FileIndex.path == str(repo))
+    assert row.entry_type == 'bundle'
+    assert row.bundle_files == 3
+    assert row.bundle_bytes == 1502
+    assert row.size_bytes == 1502
+
+def test_bundle_sizes_cached(temp_workspace, test_db, mocker):
+    """Unchanged bundles are not re-measured; a new file invalidates the cache."""
+    repo = _make_repo(temp_workspace)
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+    manager.run_bundle_sizes()
+    spy = mocker.spy(bundles, "measure_bundle")
+
+    # Rescan: the upsert keeps the measured size of unchanged bundles
+    manager.run_index(str(temp_workspace))
+    assert manager.run_bundle_sizes() == 0
+    assert spy.call_count == 0
+
+    (repo / "src" / "pkg" / "c.js").write_bytes(b"c" * 10)
+    st = os.stat(repo / "src" / "pkg")
+    os.utime(repo / "src" / "pkg", ns=(st.st_atime_ns, st.st_mtime_ns + 2_000_000_000))
+
+    assert manager.run_bundle_sizes() == 1
+    assert spy.call_count == 1
+    assert FileIndex.get(FileIndex.path == str(repo)).bundle_bytes == 1512
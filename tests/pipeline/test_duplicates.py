@@ -0,0 +1,26 @@
+from datetime import datetime
+from sortomatic.core.database import FileIndex
+from sortomatic.core.pipeline.passes.duplicates import duplicate_groups
+
+def _row(path, full_hash, inode, size=100):
+    FileIndex.create(path=path, filename=path.rsplit("/", 1)[-1], size_bytes=size, entry_type='file',
+                     modified_at=datetime.now(), full_hash=full_hash, device=1, inode=inode)
+
+def test_duplicate_groups_hardlinks(test_db):
+    """Hard links count as one physical copy."""
+    _row("/a/one", "h1", inode=10)
+    _row("/b/one", "h1", inode=11)
+    _row("/c/one", "h1", inode=10)
+    _row("/a/two", "h2", inode=20)
+    _row("/b/two", "h2", inode=20)
+    _row("/a/unique", "h3", inode=30)
+
+    groups = {g['full_hash']: g for g in duplicate_groups()}
+
+    assert set(groups) == {"h1", "h2"}
+    assert groups["h1"]['copies'] == 2
+    assert groups["h1"]['reclaimable_bytes'] == 100
+    assert [f['hardlink_of'] for f in groups["h1"]['files']] == [None, None, "/a/one"]
+
+    assert groups["h2"]['already_deduplicated']
+    assert groups["h2"]['reclaimable_bytes'] == 0
@@ -0,0 +1,63 @@
+import tarfile
+import zipfile
+import pytest
+from sortomatic.core.config import settings
+from sortomatic.core.database import ArchiveMember, FileIndex
+from sortomatic.core.pipeline.manager import PipelineManager
+from sortomatic.core.pipeline.passes.duplicates import member_duplicate_groups
+
+@pytest.fixture
+def archives(tmp_path):
+    with zipfile.ZipFile(tmp_path / "a.zip", "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("docs/readme.txt", "shared content")
+        z.writestr("only_a.txt", "a" * 100)
+    with zipfile.ZipFile(tmp_path / "b.jar", "w") as z:
+        z.writestr("META-INF/", "")
+        z.writestr("copy/readme.txt", "shared content")
+    src = tmp_path / "member.bin"
+    src.write_bytes(b"\0" * 2048)
+    with tarfile.open(tmp_path / "c.tar.gz", "w:gz") as t:
+        t.add(src, arcname="data/member.bin")
+    src.unlink()
+    (tmp_path / "broken.zip").write_bytes(b"not a zip")
+    return tmp_path
+
+def test_archive_members_indexed(archives, test_db):
+    manager = PipelineManager()
+    manager.run_index(str(archives))
+
+    assert manager.run_archives() == 4
+
+    members = {(m.archive, m.member): m for m in ArchiveMember.select()}
+    assert set(members) == {
+        (str(archives / "a.zip"), "docs/readme.txt"),
+        (str(archives / "a.zip"), "only_a.txt"),
+        (str(archives / "b.jar"), "copy/readme.txt"),
+        (str(archives / "c.tar.gz"), "data/member.bin"),
+    }
+    assert members[(str(archives / "c.tar.gz"), "data/member.bin")].size_bytes == 2048
+    assert members[(str(archives / "c.tar.gz"), "data/member.bin")].crc32 is None
+    assert FileIndex.get(FileIndex.path == str(archives / "broken.zip")).archive_members == 0
+    # Nothing was extracted next to the archives
+    assert not (archives / "data").exists()
+
+    # Already listed: nothing to do until an archive changes
+    assert manager.run_archives() == 0
+
+def test_member_duplicates_by_crc(archives, test_db):
+    manager = PipelineManager()
+    manager.run_index(str(archives))
+    manager.run_archives()
+
+    groups = list(member_duplicate_groups())
+    assert len(groups) == 1
+    assert groups[0]['size_bytes'] == len("shared content")
+    assert {m['member'] for m in groups[0]['members']} == {"docs/readme.txt", "copy/readme.txt"}
+
+def test_archive_memory_limit(archives, test_db, monkeypatch):
+    monkeypatch.setattr(settings, "archive_memory_limit", 100)
+    manager = PipelineManager()
+    manager.run_index(str(archives))
+    manager.run_archives()
+
+    assert ArchiveMember.select().count() == 0
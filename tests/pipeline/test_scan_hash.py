@@ -47,3 +47,186 @@ def test_hash_skip_bundles(test_db):
     
     count = manager.run_hash()
     assert count == 0
+
+def test_hash_hardlinks_once(temp_workspace, test_db, mocker):
+    """Hard links are hashed once and share the result."""
+    import os
+    from sortomatic.core.pipeline.passes import hashing
+    original = temp_workspace / "test.txt"
+    os.link(original, temp_workspace / "documents" / "link.txt")
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+    spy = mocker.spy(hashing, "compute_hashes")
+
+    count = manager.run_hash()
+
+    assert count == 3
+    assert spy.call_count == 3
+    rec = FileIndex.get(FileIndex.path == str(original))
+    link = FileIndex.get(FileIndex.filename == "link.txt")
+    assert (rec.device, rec.inode) == (link.device, link.inode)
+    assert link.full_hash == rec.full_hash is not None
+
+    # A link added later adopts the known hash without reading the file
+    os.link(original, temp_workspace / "images" / "late.txt")
+    manager.run_index(str(temp_workspace))
+    assert manager.run_hash() == 0
+    assert FileIndex.get(FileIndex.filename == "late.txt").full_hash == rec.full_hash
+
+def test_hash_process_backend(temp_workspace, test_db, monkeypatch):
+    """CPU-bound items go to the process pool in batches and come back with the same hashes."""
+    from sortomatic.core.config import settings
+    from sortomatic.core.pipeline import backends
+    from sortomatic.core.pipeline.passes import hashing
+
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+    manager.run_hash()
+    expected = {f.path: f.full_hash for f in FileIndex.select()}
+    FileIndex.update(full_hash=None, fast_hash=None).execute()
+
+    monkeypatch.setitem(settings.pass_backends, 'hash', 'process')
+    monkeypatch.setattr(settings, "process_workers", 2)
+    monkeypatch.setattr(settings, "process_batch_size", 2)
+    # Route every file to the processes, whatever image libraries are installed
+    monkeypatch.setattr(hashing, "is_cpu_bound", lambda category: True)
+    assert isinstance(manager._backend('hash', manager._hash_pass), backends.ProcessBackend)
+    try:
+        assert manager.run_hash() == 3
+    finally:
+        backends.shutdown_process_pool(wait=True)
+
+    assert {f.path: f.full_hash for f in FileIndex.select()} == expected
+
+def test_hash_reclaim_order_and_budget(tmp_path, test_db):
+    """Likely duplicates go first, largest first; a spent budget leaves the rest for later."""
+    from datetime import datetime
+    sizes = {"big_a": 300, "big_b": 300, "small_a": 10, "small_b": 10, "unique": 5000}
+    for name, size in sizes.items():
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        FileIndex.create(path=str(path), filename=name, size_bytes=size, entry_type='file', modified_at=datetime.now())
+    manager = PipelineManager()
+
+    order = [f.filename for f in manager.hash_query('reclaim')]
+    assert order[:2] == ["big_a", "big_b"] or order[:2] == ["big_b", "big_a"]
+    assert set(order[2:4]) == {"small_a", "small_b"}
+    assert order[4] == "unique"
+
+    assert manager.run_hash(order='reclaim', time_budget=1e-9) == 0
+    assert manager.unverified_bytes() == {'count': 4, 'bytes': 620}
+
+    assert manager.run_hash(order='reclaim') == 5
+    assert manager.unverified_bytes() == {'count': 0, 'bytes': 0}
+
+def test_hash_pause_resume_and_cancel(tmp_path, test_db):
+    """A paused pass picks up where it stopped; a cancelled one leaves the rest pending."""
+    import threading
+    from datetime import datetime
+    for i in range(20):
+        path = tmp_path / f"f{i}"
+        path.write_bytes(b"x" * (i + 1))
+        FileIndex.create(path=str(path), filename=path.name, size_bytes=i + 1, entry_type='file', modified_at=datetime.now())
+    manager = PipelineManager()
+
+    def pause_once():
+        if manager.control.status()['done'] == 5:
+            manager.pause()
+            threading.Timer(0.2, manager.resume).start()
+
+    assert manager.run_hash(pause_once) == 20
+    assert manager.status()['state'] == 'completed'
+
+    FileIndex.update(full_hash=None, fast_hash=None).execute()
+    def cancel_early():
+        if manager.control.status()['done'] == 3:
+            manager.cancel()
+
+    hashed = manager.run_hash(cancel_early)
+    assert 3 <= hashed < 20
+    assert manager.status()['state'] == 'cancelled'
+    assert FileIndex.select().where(FileIndex.full_hash.is_null()).count() == 20 - hashed
+
+def test_failed_files_are_quarantined(tmp_path, test_db, monkeypatch):
+    """A file that fails is skipped until its backoff ends, then retried; a success releases it."""
+    from datetime import datetime, timedelta
+    from sortomatic.core import quarantine
+    from sortomatic.core.database import HashFailure
+    from sortomatic.core.pipeline.passes import hashing
+    for name in ("good", "bad"):
+        path = tmp_path / name
+        path.write_bytes(name.encode())
+        FileIndex.create(path=str(path), filename=name, size_bytes=path.stat().st_size, entry_type='file', modified_at=datetime.now())
+    compute = hashing.compute_hashes
+    def flaky(ctx):
+        if ctx['path'].endswith("bad"):
+            ctx['error'] = 'PermissionError'
+            return ctx
+        return compute(ctx)
+    monkeypatch.setattr(hashing, "compute_hashes", flaky)
+    manager = PipelineManager()
+
+    assert manager.run_hash() == 2
+    failure = HashFailure.get()
+    assert (failure.error, failure.attempts) == ('PermissionError', 1)
+    assert [entry.path for entry in quarantine.entries()] == [failure.path]
+    # Skipped while in quarantine
+    assert manager.hash_query().count() == 0
+    assert manager.run_hash() == 0
+
+    # Retried once the backoff is over, and the wait doubles
+    HashFailure.update(retry_after=datetime.now() - timedelta(seconds=1)).execute()
+    assert manager.run_hash() == 1
+    failure = HashFailure.get()
+    assert failure.attempts == 2
+    assert failure.retry_after - failure.last_attempt == quarantine.backoff(2) == 2 * quarantine.backoff(1)
+
+    # An explicit retry does not wait; a success ends the quarantine
+    monkeypatch.setattr(hashing, "compute_hashes", compute)
+    assert manager.run_hash(quarantined=True) == 1
+    assert HashFailure.select().count() == 0
+    assert FileIndex.select().where(FileIndex.full_hash.is_null()).count() == 0
+
+def test_hash_reclaim_skips_hardlinks(tmp_path, test_db, monkeypatch):
+    """Hard links of one inode free nothing: a real duplicate pair is hashed before them, even a smaller one."""
+    import os
+    from sortomatic.core.config import settings
+    (tmp_path / "linked").write_bytes(b"l" * 5000)
+    os.link(tmp_path / "linked", tmp_path / "link")
+    (tmp_path / "copy_a").write_bytes(b"c" * 100)
+    (tmp_path / "copy_b").write_bytes(b"c" * 100)
+    manager = PipelineManager()
+    manager.run_index(str(tmp_path))
+    # The controller then submits one file at a time: files are read in the order they are handed out
+    monkeypatch.setattr(settings, "max_workers", 1)
+    monkeypatch.setattr(settings, "adaptive_concurrency", True)
+
+    order = [f.filename for f in manager.hash_query('reclaim')]
+    assert sorted(order[:2]) == ["copy_a", "copy_b"]
+    assert order[2] in ("linked", "link")
+    assert manager.unverified_bytes() == {'count': 2, 'bytes': 200}
+
+    hashed = []
+    hash_pass = manager._hash_pass
+    def record(item):
+        hashed.append(item.filename)
+        return hash_pass(item)
+    monkeypatch.setattr(manager, "_hash_pass", record)
+    assert manager.run_hash(order='reclaim') == 3
+    assert sorted(hashed[:2]) == ["copy_a", "copy_b"]
+
+def test_hash_hardlinks_once_across_pages(temp_workspace, test_db, mocker, monkeypatch):
+    """A link read in a later page than its hashed sibling is not read again."""
+    import os
+    from sortomatic.core.config import settings
+    from sortomatic.core.pipeline.passes import hashing
+    os.link(temp_workspace / "test.txt", temp_workspace / "documents" / "link.txt")
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+    monkeypatch.setattr(settings, "db_page_rows", 1)
+    monkeypatch.setattr(settings, "batch_size", 1)
+    spy = mocker.spy(hashing, "compute_hashes")
+
+    assert manager.run_hash(order='index') == 3
+    assert spy.call_count == 3
+    assert FileIndex.select().where(FileIndex.full_hash.is_null()).count() == 0
@@ -0,0 +1,129 @@
+import os
+import pytest
+from sortomatic.core.pipeline.manager import PipelineManager
+from sortomatic.core.database import FileIndex, DirSnapshot
+
+def _bump_mtime(path):
+    """Moves a directory's mtime forward: coarse timestamps could hide a change made right after a scan."""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 2_000_000_000))
+
+def test_incremental_skips_unchanged(temp_workspace, test_db):
+    """A second incremental run lists no directory when nothing changed."""
+    manager = PipelineManager()
+
+    first = manager.run_index(str(temp_workspace), incremental=True)
+    assert first['count'] == 3
+    assert first['relisted_dirs'] == 3
+    assert DirSnapshot.select().count() == 3
+
+    second = manager.run_index(str(temp_workspace), incremental=True)
+    assert second['count'] == 0
+    assert second['relisted_dirs'] == 0
+    assert second['skipped_dirs'] == 3
+    assert FileIndex.select().count() == 3
+
+def test_incremental_picks_up_changes(temp_workspace, test_db):
+    """New, changed and deleted entries of a changed directory are reconciled."""
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace), incremental=True)
+
+    docs = temp_workspace / "documents"
+    report = str(docs / "report.pdf")
+    FileIndex.update(category="Document", full_hash="abc").where(FileIndex.path == report).execute()
+
+    (docs / "new.txt").write_text("new")
+    (docs / "report.pdf").write_text("A much longer fake PDF content")
+    (temp_workspace / "images" / "photo.jpg").unlink()
+    _bump_mtime(docs)
+    _bump_mtime(temp_workspace / "images")
+
+    result = manager.run_index(str(temp_workspace), incremental=True)
+
+    assert result['relisted_dirs'] == 2
+    assert result['skipped_dirs'] == 1
+    assert result['removed'] == 1
+    paths = {f.path for f in FileIndex.select()}
+    assert str(docs / "new.txt") in paths
+    assert str(temp_workspace / "images" / "photo.jpg") not in paths
+
+    changed = FileIndex.get(FileIndex.path == report)
+    assert changed.size_bytes == len("A much longer fake PDF content")
+    assert changed.category is None
+    assert changed.full_hash is None
+
+def test_incremental_rewritten_in_place(temp_workspace, test_db):
+    """A file rewritten in place is refreshed although its directory's mtime did not move."""
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace), incremental=True)
+
+    docs = temp_workspace / "documents"
+    report = docs / "report.pdf"
+    FileIndex.update(category="Document", full_hash="abc").where(FileIndex.path == str(report)).execute()
+    st = os.stat(docs)
+    report.write_text("Rewritten fake PDF content")
+    os.utime(report, ns=(st.st_atime_ns, os.stat(report).st_mtime_ns + 2_000_000_000))
+    os.utime(docs, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    result = manager.run_index(str(temp_workspace), incremental=True)
+
+    assert result['relisted_dirs'] == 0
+    assert result['rewritten'] == 1
+    assert result['count'] == 1
+    changed = FileIndex.get(FileIndex.path == str(report))
+    assert changed.size_bytes == len("Rewritten fake PDF content")
+    assert changed.category is None
+    assert changed.full_hash is None
+
+def test_incremental_removed_directory(temp_workspace, test_db):
+    """Rows and snapshots below a deleted directory are dropped."""
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace), incremental=True)
+
+    (temp_workspace / "images" / "photo.jpg").unlink()
+    (temp_workspace / "images").rmdir()
+    _bump_mtime(temp_workspace)
+
+    result = manager.run_index(str(temp_workspace), incremental=True)
+
+    assert result['removed'] == 1
+    assert FileIndex.select().count() == 2
+    assert not DirSnapshot.select().where(DirSnapshot.path == str(temp_workspace / "images")).exists()
+
+def test_full_rescan_refreshes_changed_rows(temp_workspace, test_db):
+    """Without incremental mode, a rescan still updates changed files and keeps unchanged ones."""
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+    FileIndex.update(full_hash="abc").execute()
+
+    (temp_workspace / "test.txt").write_text("Hello World, again")
+    manager.run_index(str(temp_workspace))
+
+    assert FileIndex.get(FileIndex.filename == "test.txt").full_hash is None
+    assert FileIndex.get(FileIndex.filename == "test.txt").size_bytes == len("Hello World, again")
+    assert FileIndex.get(FileIndex.filename == "report.pdf").full_hash == "abc"
+
+def test_incremental_run_all_deletes_on_writer(temp_workspace, tmp_path, monkeypatch):
+    """run_all walks on the pipeline's source thread: its deletes are applied by the writer thread."""
+    import threading
+    from sortomatic.core import incremental
+    from sortomatic.core.database import db, init_db
+    db.close()
+    init_db(str(tmp_path / "incremental.db"))
+    manager = PipelineManager()
+    manager.run_all(str(temp_workspace), incremental=True)
+
+    threads = []
+    forget_tree = incremental.forget_tree
+    monkeypatch.setattr(incremental, "forget_tree",
+                        lambda *args: threads.append(threading.current_thread().name) or forget_tree(*args))
+    (temp_workspace / "test.txt").unlink()
+    (temp_workspace / "images" / "photo.jpg").unlink()
+    (temp_workspace / "images").rmdir()
+    _bump_mtime(temp_workspace)
+
+    result = manager.run_all(str(temp_workspace), incremental=True)
+
+    assert result['removed'] == 2
+    assert threads == ["sortomatic_writer"]
+    assert {f.filename for f in FileIndex.select()} == {"report.pdf"}
@@ -42,3 +42,20 @@ def test_run_index(temp_workspace, test_db):
     for f in files:
         assert f.category is None
         assert f.full_hash is None
+
+def test_run_index_parallel_walker(temp_workspace, test_db):
+    """run_index accepts the parallel walker and indexes the same files."""
+    manager = PipelineManager()
+
+    result = manager.run_index(str(temp_workspace), walker='parallel')
+
+    assert result['count'] == 3
+    assert FileIndex.select().count() == 3
+
+def test_index_one_task_per_file(temp_workspace, test_db, monkeypatch):
+    """Chunked and per-file submission index the same rows."""
+    from sortomatic.core.config import settings
+    monkeypatch.setattr(settings, "chunked_submission", False)
+    result = PipelineManager().run_index(str(temp_workspace))
+    assert result['count'] == 3
+    assert FileIndex.select().count() == 3
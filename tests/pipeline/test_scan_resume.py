@@ -0,0 +1,125 @@
+import pytest
+from sortomatic.core import checkpoint as checkpoint_module
+from sortomatic.core.config import settings
+from sortomatic.core.database import FileIndex, WalkFrontier
+from sortomatic.core.pipeline.manager import PipelineManager
+
+@pytest.fixture
+def tree(tmp_path):
+    for d in range(6):
+        folder = tmp_path / f"dir{d}"
+        folder.mkdir()
+        for f in range(3):
+            (folder / f"file{f}.txt").write_text("x" * (d + f))
+    return tmp_path
+
+def _spy_listings(monkeypatch):
+    listed = []
+    original = checkpoint_module.scan_directory
+    def spy(dirpath, *args):
+        listed.append(dirpath)
+        return original(dirpath, *args)
+    monkeypatch.setattr(checkpoint_module, "scan_directory", spy)
+    return listed
+
+def _spy_walk(monkeypatch):
+    yielded = []
+    original = checkpoint_module.ResumableWalk.walk
+    def walk(self):
+        for entry in original(self):
+            yielded.append(entry.path)
+            yield entry
+    monkeypatch.setattr(checkpoint_module.ResumableWalk, "walk", walk)
+    return yielded
+
+def _written(directory) -> int:
+    return FileIndex.select().where(FileIndex.parent == str(directory)).count()
+
+def test_interrupted_index_resumes(tree, test_db, monkeypatch):
+    """
+    A restarted index continues from the saved frontier: finished directories
+    are not listed again, and the files of the directory it stopped in come
+    back exactly once.
+    """
+    monkeypatch.setattr(settings, "walker", "sequential")
+    monkeypatch.setattr(settings, "checkpoint_interval", 1e-9)  # After every collected batch
+    monkeypatch.setattr(settings, "batch_size", 2)
+    monkeypatch.setattr(settings, "chunked_submission", False)
+    manager = PipelineManager()
+
+    done = []
+    def interrupt_on_fourth_file():
+        done.append(1)
+        if len(done) == 4:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        manager.run_index(str(tree), interrupt_on_fourth_file)
+
+    pending = {row.path for row in WalkFrontier.select()}
+    assert pending and str(tree) not in pending
+    # The checkpoint was taken in the middle of a directory: it is listed
+    # again although some of its files are already written
+    partial = [path for path in pending if _written(path)]
+    assert partial
+
+    listed = _spy_listings(monkeypatch)
+    yielded = _spy_walk(monkeypatch)
+    manager.control.reset()
+    result = manager.run_index(str(tree))
+
+    assert result['resumed']
+    assert set(listed) <= pending | {str(tree / f"dir{d}") for d in range(6)}
+    assert str(tree) not in listed
+    assert len(yielded) == len(set(yielded))
+    for path in partial:
+        assert sorted(p for p in yielded if p.startswith(path + "/")) == \
+            [f"{path}/file{f}.txt" for f in range(3)]
+    assert FileIndex.select().count() == 18
+    # A completed walk leaves no checkpoint behind
+    assert WalkFrontier.select().count() == 0
+
+def test_complete_index_leaves_no_checkpoint(temp_workspace, test_db, monkeypatch):
+    monkeypatch.setattr(settings, "walker", "sequential")
+    result = PipelineManager().run_index(str(temp_workspace))
+    assert result['count'] == 3
+    assert not result['resumed']
+    assert WalkFrontier.select().count() == 0
+
+def test_cancelled_run_all_resumes(tree, test_db, monkeypatch):
+    """scan all checkpoints its walk too: a cancelled run is resumed without listing finished directories."""
+    monkeypatch.setattr(settings, "walker", "sequential")
+    monkeypatch.setattr(settings, "checkpoint_interval", 1e-9)
+    monkeypatch.setattr(settings, "batch_size", 2)
+    # One content worker: files complete in walk order
+    monkeypatch.setattr(settings, "adaptive_concurrency", False)
+    monkeypatch.setattr(settings, "max_workers", 1)
+    manager = PipelineManager()
+
+    done = []
+    def cancel_after_ninth_file():
+        done.append(1)
+        if len(done) == 9:
+            manager.cancel()
+
+    manager.run_all(str(tree), cancel_after_ninth_file)
+
+    pending = {row.path for row in WalkFrontier.select()}
+    assert pending and str(tree) not in pending
+    finished = {str(tree / f"dir{d}") for d in range(6)} - pending
+    assert finished
+    # Every file of a directory that left the frontier was written before its checkpoint
+    for path in finished:
+        assert _written(path) == 3
+
+    listed = _spy_listings(monkeypatch)
+    yielded = _spy_walk(monkeypatch)
+    manager.control.reset()
+
+    result = manager.run_all(str(tree))
+
+    assert result['resumed']
+    assert not (finished | {str(tree)}) & set(listed)
+    assert len(yielded) == len(set(yielded))
+    assert FileIndex.select().where(FileIndex.full_hash.is_null(False)).count() == 18
+    assert WalkFrontier.select().count() == 0
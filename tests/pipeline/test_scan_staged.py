@@ -0,0 +1,127 @@
+import threading
+import time
+import pytest
+from sortomatic.core.config import settings
+from sortomatic.core.database import FileIndex, db
+from sortomatic.core.pipeline.manager import PipelineManager
+from sortomatic.core.pipeline.passes import categorization, content, hashing
+from sortomatic.core.pipeline.stages import Stage, StagedPipeline
+
+def test_run_all_single_stream(temp_workspace, test_db):
+    """run_all writes categorized and hashed rows without separate passes."""
+    (temp_workspace / "project").mkdir()
+    (temp_workspace / "project" / "Makefile").write_text("all:")
+    manager = PipelineManager()
+
+    result = manager.run_all(str(temp_workspace))
+
+    assert result['count'] == 4
+    files = FileIndex.select().where(FileIndex.entry_type == 'file')
+    assert all(f.category and f.full_hash for f in files)
+    bundle = FileIndex.get(FileIndex.entry_type == 'bundle')
+    assert bundle.full_hash is None
+    assert manager.queue_depths() == {}
+
+def test_run_all_fills_missing_results(temp_workspace, test_db):
+    """Rows indexed earlier get their category and hashes even though they did not change."""
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+    assert FileIndex.select().where(FileIndex.full_hash.is_null()).count() == 3
+
+    manager.run_all(str(temp_workspace))
+
+    assert FileIndex.select().where(FileIndex.full_hash.is_null()).count() == 0
+
+@pytest.mark.parametrize("size", [0, 100, 4096, 5000, 8192, 70000])
+def test_single_read_matches_separate_passes(tmp_path, size, monkeypatch):
+    """analyze() gives the category and hashes of detect_type() then compute_hashes()."""
+    monkeypatch.setattr(settings, "hashing_chunk_size", 1000)
+    path = tmp_path / "blob"
+    path.write_bytes(b"%PDF-1.4" + bytes(range(256)) * (size // 256) if size else b"")
+    ctx = {'path': str(path), 'size_bytes': path.stat().st_size, 'category': None}
+
+    expected = hashing.compute_hashes(categorization.detect_type(dict(ctx)))
+    fused = content.analyze(dict(ctx))
+
+    for name in ('extension', 'category', 'mime_type', 'fast_hash', 'full_hash'):
+        assert fused.get(name) == expected.get(name), name
+
+def test_run_all_skips_unchanged_files(temp_workspace, tmp_path, monkeypatch):
+    """A second scan does not read files that are already hashed and unchanged."""
+    from sortomatic.core.database import init_db
+    db.close()
+    init_db(str(tmp_path / "resume.db"))
+    manager = PipelineManager()
+    manager.run_all(str(temp_workspace))
+
+    read = []
+    analyze = content.analyze
+    monkeypatch.setattr(content, "analyze", lambda ctx: read.append(ctx['path']) or analyze(ctx))
+    (temp_workspace / "test.txt").write_text("Changed")
+
+    result = manager.run_all(str(temp_workspace))
+
+    assert read == [str(temp_workspace / "test.txt")]
+    assert result['unchanged'] == 2
+    # Files skipped as unchanged are not counted as bytes read
+    from sortomatic.core.database import ScanRun
+    run = ScanRun.select().order_by(ScanRun.id.desc()).get()
+    assert (run.files, run.bytes) == (3, len("Changed"))
+    assert FileIndex.select().where(FileIndex.full_hash.is_null()).count() == 0
+
+def test_bounded_queues_backpressure():
+    """A slow stage fills its queue and holds the faster stages back."""
+    release = threading.Event()
+    seen = []
+
+    def slow(item):
+        release.wait()
+        return item
+
+    pipeline = StagedPipeline(iter(range(100)), [
+        Stage("fast", lambda item: item, workers=2, maxsize=5),
+        Stage("slow", slow, workers=1, maxsize=5),
+    ], output_size=5)
+
+    consumer = threading.Thread(target=lambda: seen.extend(pipeline.run()))
+    consumer.start()
+    time.sleep(0.3)
+    depths = pipeline.depths()
+    # Only what the bounded queues (and the busy workers) can hold has left the source
+    assert depths['slow'] == 5
+    assert depths['fast'] == 5
+    assert pipeline.stats()['slow']['busy'] == 1
+
+    release.set()
+    consumer.join(timeout=5)
+    assert sorted(seen) == list(range(100))
+    assert pipeline.stats()['fast']['processed'] == 100
+
+def test_stage_errors_drop_item():
+    def fail_on_odd(item):
+        if item % 2:
+            raise ValueError(item)
+        return item
+
+    pipeline = StagedPipeline(iter(range(10)), [Stage("even", fail_on_odd, workers=3)])
+    assert sorted(pipeline.run()) == [0, 2, 4, 6, 8]
+    assert pipeline.stats()['even']['errors'] == 5
+
+def test_run_all_process_backend(temp_workspace, test_db, monkeypatch, mocker):
+    """With the process backend for hash, media hashes of scan all come from the process pool."""
+    from sortomatic.core.pipeline import backends
+    manager = PipelineManager()
+    manager.run_all(str(temp_workspace))
+    expected = {f.path: (f.fast_hash, f.full_hash) for f in FileIndex.select()}
+    FileIndex.delete().execute()
+
+    monkeypatch.setitem(settings.pass_backends, 'hash', 'process')
+    monkeypatch.setattr(hashing, "is_cpu_bound", lambda category: True)
+    submit = mocker.spy(backends.ProcessBackend, "submit")
+    try:
+        manager.run_all(str(temp_workspace))
+    finally:
+        backends.shutdown_process_pool(wait=True)
+
+    assert sorted(call.args[1]['path'] for call in submit.call_args_list) == sorted(expected)
+    assert {f.path: (f.fast_hash, f.full_hash) for f in FileIndex.select()} == expected
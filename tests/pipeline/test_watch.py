@@ -0,0 +1,114 @@
+import os
+import threading
+import pytest
+from sortomatic.core.config import settings
+from sortomatic.core.database import FileIndex
+from sortomatic.core.watcher import Watcher, Inotify, WatchLimitReached
+
+try:
+    Inotify().close()
+    HAS_INOTIFY = True
+except OSError:
+    HAS_INOTIFY = False
+
+needs_inotify = pytest.mark.skipif(not HAS_INOTIFY, reason="inotify not available")
+
+def _pump(watcher):
+    """Feeds pending kernel events to the watcher and processes them as one batch (on this thread)."""
+    for _ in range(3):
+        for wd, mask, _cookie, name in watcher._inotify.read_events(0.2):
+            watcher._on_event(wd, mask, name)
+    watcher._flush()
+
+@pytest.fixture
+def watcher(temp_workspace, test_db):
+    w = Watcher(temp_workspace)
+    w._inotify = Inotify()
+    w._watch_tree(w.root)
+    w._refresh(w.root)
+    yield w
+    w._close_inotify()
+
+@needs_inotify
+def test_watch_file_events(watcher, temp_workspace):
+    """Created, modified and deleted files reach the index in one batch."""
+    (temp_workspace / "documents" / "new.txt").write_text("new file")
+    (temp_workspace / "test.txt").write_text("Hello World, modified")
+    (temp_workspace / "images" / "photo.jpg").unlink()
+
+    _pump(watcher)
+
+    rows = {f.filename: f for f in FileIndex.select()}
+    assert "new.txt" in rows
+    assert "photo.jpg" not in rows
+    assert rows["test.txt"].size_bytes == len("Hello World, modified")
+    # Processed through categorize and hash as well
+    assert rows["new.txt"].category is not None
+    assert rows["new.txt"].full_hash is not None
+
+@needs_inotify
+def test_watch_directory_events(watcher, temp_workspace):
+    """New directories are watched and indexed; removed ones are forgotten."""
+    nested = temp_workspace / "incoming" / "nested"
+    nested.mkdir(parents=True)
+    (nested / "a.txt").write_text("a")
+    os.rename(temp_workspace / "images", temp_workspace / "pictures")
+
+    _pump(watcher)
+
+    paths = {f.path for f in FileIndex.select()}
+    assert str(nested / "a.txt") in paths
+    assert str(temp_workspace / "pictures" / "photo.jpg") in paths
+    assert str(temp_workspace / "images" / "photo.jpg") not in paths
+
+    (nested / "b.txt").write_text("b")
+    _pump(watcher)
+    assert FileIndex.select().where(FileIndex.path == str(nested / "b.txt")).exists()
+
+def test_events_are_coalesced(temp_workspace, test_db):
+    """Repeated events on a path collapse into a single pending operation (last one wins)."""
+    w = Watcher(temp_workspace)
+    path = str(temp_workspace / "test.txt")
+    for _ in range(100):
+        w._queue(path, Watcher.FILE)
+    w._queue(path, Watcher.DELETE)
+
+    assert w._pending == {path: Watcher.DELETE}
+
+def test_watch_limit_falls_back_to_polling(temp_workspace, test_db, mocker):
+    """When the kernel refuses watches, the watcher rescans periodically instead."""
+    mocker.patch.object(settings, "watch_rescan_interval", 0.01)
+    mocker.patch("sortomatic.core.watcher.Inotify.__init__", return_value=None)
+    mocker.patch("sortomatic.core.watcher.Inotify.close")
+    mocker.patch("sortomatic.core.watcher.Inotify.add_watch", side_effect=WatchLimitReached(28, "limit", "/x"))
+    w = Watcher(temp_workspace)
+    refreshed = threading.Event()
+    mocker.patch.object(w, "_refresh", side_effect=lambda path: refreshed.set() or {'count': 0})
+
+    thread = threading.Thread(target=w.run, kwargs={'catch_up': False}, daemon=True)
+    thread.start()
+    assert refreshed.wait(2)
+    assert w.mode == "polling"
+    w.stop()
+    thread.join(2)
+    assert not thread.is_alive()
+
+@needs_inotify
+def test_watch_relative_root(temp_workspace, test_db, monkeypatch):
+    """A watch on a relative root updates the rows a scan of that same root created."""
+    monkeypatch.chdir(temp_workspace.parent)
+    root = temp_workspace.name
+    w = Watcher(root)
+    w._inotify = Inotify()
+    try:
+        w._watch_tree(w.root)
+        w._refresh(w.root)
+        (temp_workspace / "test.txt").write_text("Hello World, modified")
+        (temp_workspace / "images" / "photo.jpg").unlink()
+        _pump(w)
+    finally:
+        w._close_inotify()
+
+    rows = {f.path: f for f in FileIndex.select()}
+    assert set(rows) == {os.path.join(root, "test.txt"), os.path.join(root, "documents", "report.pdf")}
+    assert rows[os.path.join(root, "test.txt")].size_bytes == len("Hello World, modified")
@@ -0,0 +1,51 @@
+from datetime import datetime
+import pytest
+from peewee import SqliteDatabase
+from sortomatic.core import catalog
+from sortomatic.core.database import CatalogFile, FileIndex, MODELS, Volume, db
+
+@pytest.fixture
+def make_source(tmp_path):
+    """Writes FileIndex rows to a database file of their own, then rebinds db to the catalog."""
+    def make(name, rows):
+        path = tmp_path / f"{name}.db"
+        catalog_db = db.obj
+        source = SqliteDatabase(str(path))
+        db.initialize(source)
+        db.create_tables(MODELS)
+        FileIndex.insert_many([{'path': p, 'filename': p.rsplit('/', 1)[-1], 'size_bytes': size,
+                                'modified_at': datetime(2024, 1, 1, 0, 0, mtime), 'full_hash': h}
+                               for p, size, mtime, h in rows]).execute()
+        source.close()
+        db.initialize(catalog_db)
+        return str(path)
+    return make
+
+def test_merge_keeps_volumes_apart(test_db, make_source):
+    a = make_source("a", [("/data/x", 10, 0, "h1"), ("/data/y", 20, 0, "h2")])
+    b = make_source("b", [("/data/x", 10, 0, "h1")])
+
+    results = catalog.merge([("host-a", a), ("host-b", b)], chunk_rows=1)
+
+    assert [r['files'] for r in results] == [2, 1]
+    # Same path on two volumes: two rows, found as cross-volume duplicates
+    dupes = CatalogFile.select().where(CatalogFile.full_hash == "h1")
+    assert {f.volume.name for f in dupes} == {"host-a", "host-b"}
+
+def test_merge_again_only_applies_changes(test_db, make_source):
+    a = make_source("a", [("/data/x", 10, 0, None), ("/data/y", 20, 0, "h2"), ("/data/z", 5, 0, "h3")])
+    catalog.merge([("host-a", a)])
+
+    # Since: x was hashed, y changed on disk, z was deleted
+    a = make_source("a2", [("/data/x", 10, 0, "h1"), ("/data/y", 25, 9, None)])
+    result, = catalog.merge([("host-a", a)], chunk_rows=1)
+
+    assert result['merged'] == 2
+    assert result['removed'] == 2  # z, and the old version of y
+    rows = {f.path: (f.size_bytes, f.full_hash) for f in CatalogFile.select()}
+    assert rows == {"/data/x": (10, "h1"), "/data/y": (25, None)}
+    assert Volume.get().files == 2
+
+    # Nothing changed: nothing written
+    result, = catalog.merge([("host-a", a)])
+    assert (result['merged'], result['removed']) == (0, 0)
@@ -0,0 +1,25 @@
+from sortomatic.core.pipeline.chunking import AdaptiveChunker, run_chunk
+
+def test_chunk_grows_for_fast_items():
+    chunker = AdaptiveChunker(max_size=256, target_seconds=0.02)
+    sizes = []
+    for _ in range(12):
+        # 10µs per item
+        chunker.observe(chunker.size, chunker.size * 1e-5)
+        sizes.append(chunker.size)
+    assert sizes[:3] == [2, 4, 8]
+    assert sizes[-1] == 256
+
+def test_chunk_shrinks_for_slow_items():
+    chunker = AdaptiveChunker(max_size=256, target_seconds=0.02)
+    for _ in range(10):
+        chunker.observe(chunker.size, chunker.size * 1e-5)
+    for _ in range(10):
+        # Hashing large files: 200ms per item
+        chunker.observe(chunker.size, chunker.size * 0.2)
+    assert chunker.size == 1
+
+def test_run_chunk_skips_failures():
+    results, elapsed = run_chunk(lambda x: 10 // x, [1, 0, 2])
+    assert results == [10, 5]
+    assert elapsed >= 0
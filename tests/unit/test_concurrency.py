@@ -0,0 +1,100 @@
+import time
+import pytest
+from sortomatic.core.config import settings
+from sortomatic.core.pipeline import concurrency
+from sortomatic.core.pipeline.concurrency import ConcurrencyController, concurrency_bound
+
+def simulate(controller, knee, seconds=60, per_worker=100.0):
+    """
+    Feeds the controller one interval per simulated second: throughput grows
+    with the workers up to the knee, past it extra workers only queue.
+    """
+    limits = []
+    for _ in range(seconds):
+        throughput = per_worker * min(controller.limit, knee)
+        completed = int(throughput * controller.interval)
+        controller._window_start = time.monotonic() - controller.interval
+        controller._completed = completed
+        # Little's law: items in flight / throughput
+        controller._busy_seconds = completed * controller.limit / throughput
+        with controller._cond:
+            controller._adjust()
+        limits.append(controller.limit)
+    return limits
+
+@pytest.fixture
+def no_iowait(monkeypatch):
+    monkeypatch.setattr(concurrency, "_iowait", lambda: 0.0)
+
+def test_converges_to_the_knee(no_iowait):
+    controller = ConcurrencyController("Test", start=2, bound=64, interval=1.0)
+    limits = simulate(controller, knee=12)
+    # Reached the knee within seconds, then stays close without running to the bound
+    assert limits.index(next(l for l in limits if l >= 12)) < 10
+    assert all(12 <= l < 24 for l in limits[20:])
+    assert controller.decisions
+
+def test_respects_the_bound(no_iowait):
+    controller = ConcurrencyController("Test", start=2, bound=6, interval=1.0)
+    limits = simulate(controller, knee=100)
+    assert max(limits) == 6
+    assert limits[-1] == 6
+
+def test_backs_off_on_iowait(monkeypatch):
+    monkeypatch.setattr(concurrency, "_iowait", lambda: 0.9)
+    controller = ConcurrencyController("Test", start=16, bound=64, interval=1.0)
+    limits = simulate(controller, knee=2)
+    assert max(limits[20:]) <= 4
+
+def test_bound_is_max_workers(monkeypatch):
+    """-j stays the most workers of a pass: the controller only runs fewer."""
+    monkeypatch.setattr(settings, "max_workers", 7)
+    assert concurrency_bound() == 7
+    controller = ConcurrencyController("Test")
+    assert controller.limit == controller.bound == 7
+
+@pytest.fixture
+def fixed_limit(monkeypatch):
+    """
+    A pool of 8 threads under controllers held at 2 workers. Returns the
+    most calls seen inside ConcurrencyController.run at once, waiting or not.
+    """
+    import threading
+    from sortomatic.core.pipeline import manager as manager_module
+    monkeypatch.setattr(settings, "max_workers", 8)
+    monkeypatch.setattr(settings, "chunked_submission", False)
+    manager_module._shutdown_executor(wait=True)
+    lock = threading.Lock()
+    state = {'inside': 0, 'peak': 0}
+
+    class Fixed(ConcurrencyController):
+        def run(self, func, *args, items=1):
+            with lock:
+                state['inside'] += 1
+                state['peak'] = max(state['peak'], state['inside'])
+            try:
+                time.sleep(0.005)
+                return super().run(func, *args, items=items)
+            finally:
+                with lock:
+                    state['inside'] -= 1
+
+        def _adjust(self):
+            pass
+
+    monkeypatch.setattr(manager_module, "ConcurrencyController", lambda name: Fixed(name, start=2))
+    yield state
+    manager_module._shutdown_executor(wait=True)
+
+def test_limit_gates_submission(temp_workspace, test_db, fixed_limit):
+    """Pool threads never wait for a slot: no more tasks than the limit are submitted."""
+    from sortomatic.core.pipeline.manager import PipelineManager, get_executor
+    for i in range(30):
+        (temp_workspace / f"f{i}.bin").write_bytes(b"x" * i)
+    manager = PipelineManager()
+
+    assert manager.run_index(str(temp_workspace))['count'] == 33
+    assert fixed_limit['peak'] <= 2
+    assert manager.run_hash() == 33
+    assert fixed_limit['peak'] <= 2
+    assert get_executor()._max_workers == 8
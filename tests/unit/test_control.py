@@ -0,0 +1,110 @@
+import threading
+import time
+from sortomatic.core.pipeline.control import ScanControl, check_interrupt
+
+def _reader(attempts, chunks=50):
+    """A long read that checks for interruptions between chunks."""
+    attempts.append(time.monotonic())
+    for _ in range(chunks):
+        check_interrupt()
+        time.sleep(0.005)
+    return "hashed"
+
+def test_pause_interrupts_and_restarts_item():
+    control = ScanControl()
+    attempts, results = [], []
+    worker = threading.Thread(target=lambda: results.append(control.run(_reader, attempts)))
+    worker.start()
+    time.sleep(0.05)
+    control.pause()
+    time.sleep(0.1)
+    # The read stopped at its next chunk and gave its slot back
+    assert len(attempts) == 1
+    assert control.status()['busy_workers'] == 0
+    assert control.status()['state'] == 'paused'
+
+    control.resume()
+    worker.join(5)
+    assert results == ["hashed"]
+    assert len(attempts) == 2
+
+def test_cancel_drops_items():
+    control = ScanControl()
+    control.cancel()
+    attempts = []
+    assert control.run(_reader, attempts) is None
+    assert attempts == []
+    assert control.wait() is False
+    control.reset()
+    assert control.wait() is True
+
+def test_throttle_caps_busy_workers():
+    control = ScanControl()
+    control.throttle(1)
+    busy, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            busy[0] += 1
+            peak[0] = max(peak[0], busy[0])
+        time.sleep(0.02)
+        with lock:
+            busy[0] -= 1
+
+    workers = [threading.Thread(target=control.run, args=(work,)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(5)
+    assert peak[0] == 1
+
+def test_process_backend_follows_control():
+    """Batches sent to a process backend count as busy workers, and a cancel drops what is left."""
+    import concurrent.futures
+    from sortomatic.core.pipeline.backends import ProcessBackend
+    control = ScanControl()
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+
+    def batch(items):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return [item * 2 for item in items]
+
+    # A thread pool stands in for the process pool
+    with concurrent.futures.ThreadPoolExecutor(4) as pool, concurrent.futures.ThreadPoolExecutor(4) as threads:
+        backend = ProcessBackend(batch, encode=lambda item: item, decode=lambda row: row,
+                                 pool=pool, batch_size=1, control=control, executor=threads)
+        control.throttle(1)
+        futures = [backend.submit(i) for i in range(4)]
+        assert [f.result(5) for f in futures] == [0, 2, 4, 6]
+        assert peak[0] == 1
+
+        control.cancel()
+        assert backend.submit(5).result(5) is None
+
+def test_service_reports_a_cancel_still_unwinding(monkeypatch):
+    """A scan that outlives cancel_scan's wait stays 'cancelling', and no other scan starts meanwhile."""
+    from sortomatic.core import service
+    from sortomatic.core.pipeline.manager import PipelineManager
+    monkeypatch.setattr(service, "_scan_manager", None)
+    monkeypatch.setattr(service, "_scan_thread", None)
+    release = threading.Event()
+    monkeypatch.setattr(PipelineManager, "run_all", lambda self, path: release.wait(5))
+
+    assert service.start_scan("/data")
+    assert not service.cancel_scan(wait=0.05)
+    assert service.scan_status()['state'] == 'cancelling'
+    assert not service.start_scan("/data")
+
+    release.set()
+    assert service.cancel_scan(wait=5)
+    assert service.scan_status()['state'] != 'cancelling'
+    assert service.start_scan("/data")
+    release.set()
+    service._scan_thread.join(5)
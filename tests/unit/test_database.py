@@ -0,0 +1,32 @@
+import sqlite3
+from sortomatic.core import database
+
+def test_init_db_migrates_old_schema(tmp_path):
+    """Columns added since a database was created are added on open."""
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE fileindex (id INTEGER PRIMARY KEY, path VARCHAR(1024) NOT NULL, "
+        "filename VARCHAR(255) NOT NULL, extension VARCHAR(255), size_bytes INTEGER NOT NULL, "
+        "modified_at DATETIME NOT NULL, entry_type VARCHAR(255) NOT NULL, category VARCHAR(255), "
+        "mime_type VARCHAR(255), fast_hash VARCHAR(255), full_hash VARCHAR(255), "
+        "perceptual_hash VARCHAR(255), is_duplicate INTEGER NOT NULL, group_id VARCHAR(255), "
+        "action_pending VARCHAR(255))"
+    )
+    conn.execute(
+        "INSERT INTO fileindex (path, filename, size_bytes, modified_at, entry_type, is_duplicate) "
+        "VALUES ('/data/docs/a.txt', 'a.txt', 1, '2024-01-01 00:00:00', 'file', 0)"
+    )
+    conn.commit()
+    conn.close()
+
+    database.db.close()
+    database.init_db(str(db_path))
+
+    columns = {c.name for c in database.db.get_columns("fileindex")}
+    assert set(database.FileIndex._meta.columns) <= columns
+    indexes = {tuple(i.columns) for i in database.db.get_indexes("fileindex")}
+    assert ("parent",) in indexes
+    assert database.DirSnapshot.table_exists()
+    # Rows indexed before the column existed get their parent
+    assert database.FileIndex.get().parent == "/data/docs"
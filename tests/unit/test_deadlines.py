@@ -0,0 +1,46 @@
+import threading
+import time
+import pytest
+from sortomatic.core.config import settings
+from sortomatic.core.pipeline.deadlines import DeadlineExceeded, DeadlineSupervisor
+from sortomatic.core.pipeline.passes import hashing
+
+def test_supervisor_warns_then_expires(mocker):
+    warn = mocker.patch("sortomatic.core.pipeline.deadlines.logger.warning")
+    supervisor = DeadlineSupervisor()
+
+    with supervisor.watch(0.2, warning="slow", message="too slow") as deadline:
+        deadline.check()
+        time.sleep(0.35)
+        assert deadline.expired
+        with pytest.raises(DeadlineExceeded):
+            deadline.check()
+
+    assert [call.args[0] for call in warn.call_args_list] == ["slow", "too slow"]
+    assert supervisor.active() == 0
+
+def test_finished_work_fires_nothing(mocker):
+    warn = mocker.patch("sortomatic.core.pipeline.deadlines.logger.warning")
+    supervisor = DeadlineSupervisor()
+    for _ in range(2000):
+        with supervisor.watch(0.1, warning="slow", message="too slow"):
+            pass
+    time.sleep(0.2)
+
+    assert warn.call_count == 0
+    # Finished deadlines are compacted away
+    assert len(supervisor._heap) < 2000
+
+def test_hash_timeout_stops_reading(tmp_path, monkeypatch):
+    """A timed-out file is abandoned between chunks, without a thread left reading it."""
+    path = tmp_path / "big.bin"
+    path.write_bytes(b"x" * 64 * 1024)
+    monkeypatch.setattr(settings, "hashing_chunk_size", 1024)
+    monkeypatch.setattr(settings, "hashing_timeout", 0.0)
+    threads = threading.active_count()
+
+    ctx = hashing.compute_hashes({'path': str(path), 'size_bytes': 64 * 1024, 'category': None})
+
+    assert ctx['full_hash'] is None
+    assert ctx['timed_out']
+    assert threading.active_count() <= threads + 1  # at most the shared supervisor
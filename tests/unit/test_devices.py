@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from sortomatic.core.pipeline import devices
+from sortomatic.core.pipeline.devices import DeviceScheduler, describe_device
+
+def test_describe_device_real_path(tmp_path):
+    info = describe_device(os.stat(tmp_path).st_dev)
+    assert info['kind'] in ('hdd', 'ssd', 'nvme', 'other')
+    assert describe_device(None)['kind'] == 'other'
+
+def _fake_disk(root, sys_path, rotational, vendor=None):
+    disk = root / sys_path
+    (disk / "queue").mkdir(parents=True)
+    (disk / "queue" / "rotational").write_text(f"{rotational}\n")
+    if vendor:
+        (disk / "device").mkdir()
+        (disk / "device" / "vendor").write_text(vendor)
+    return disk
+
+def test_describe_device_virtual_disks(tmp_path, monkeypatch):
+    """Only physical disks are throttled: VM, loop and unknown devices are 'other' whatever their rotational flag."""
+    sda = _fake_disk(tmp_path, "devices/pci0000:00/ata1/host0/block/sda", 1, vendor="ATA")
+    (sda / "sda1").mkdir()
+    (sda / "sda1" / "partition").write_text("1")
+    _fake_disk(tmp_path, "devices/pci0000:00/0000:00:04.0/virtio1/block/vda", 1)
+    _fake_disk(tmp_path, "devices/pci0000:00/host1/block/sdb", 1, vendor="QEMU")
+    _fake_disk(tmp_path, "devices/virtual/block/loop0", 1)
+    dm = _fake_disk(tmp_path, "devices/virtual/block/dm-0", 0)
+    (dm / "slaves").mkdir()
+    (dm / "slaves" / "sda1").symlink_to(sda / "sda1")
+    _fake_disk(tmp_path, "devices/pci0000:00/nvme/block/nvme0n1", 0)
+
+    block = tmp_path / "dev" / "block"
+    block.mkdir(parents=True)
+    links = {(8, 1): sda / "sda1", (253, 0): dm, (259, 0): tmp_path / "devices/pci0000:00/nvme/block/nvme0n1",
+             (252, 0): tmp_path / "devices/pci0000:00/0000:00:04.0/virtio1/block/vda",
+             (8, 16): tmp_path / "devices/pci0000:00/host1/block/sdb",
+             (7, 0): tmp_path / "devices/virtual/block/loop0"}
+    for (major, minor), target in links.items():
+        (block / f"{major}:{minor}").symlink_to(target)
+    monkeypatch.setattr(devices, "SYS_DEV_BLOCK", str(block))
+
+    def kind(major, minor):
+        return describe_device(os.makedev(major, minor))['kind']
+    assert describe_device(os.makedev(8, 1)) == {'name': 'sda', 'kind': 'hdd'}
+    assert kind(253, 0) == 'hdd'  # LVM on the spinning disk
+    assert kind(259, 0) == 'nvme'
+    assert kind(252, 0) == 'other'  # virtio
+    assert kind(8, 16) == 'other'  # emulated SCSI disk
+    assert kind(7, 0) == 'other'  # loop
+    assert kind(9, 9) == 'other'  # not in sysfs
+
+def test_scheduler_limits_per_device(mocker):
+    """Each device only gets its own number of items in flight."""
+    kinds = {1: {'name': 'sda', 'kind': 'hdd'}, 2: {'name': 'nvme0n1', 'kind': 'nvme'}}
+    mocker.patch.object(devices, "describe_device", side_effect=lambda dev: dict(kinds[dev]))
+    mocker.patch.object(devices.settings, "hdd_readers", 2)
+    mocker.patch.object(devices.settings, "nvme_readers", 5)
+    scheduler = DeviceScheduler()
+    for i in range(10):
+        scheduler.push(("hdd", i), 1)
+        scheduler.push(("nvme", i), 2)
+
+    released = list(scheduler.ready(100))
+    assert sum(1 for kind, _ in released if kind == "hdd") == 2
+    assert sum(1 for kind, _ in released if kind == "nvme") == 5
+    assert scheduler.pending() == 13
+
+    scheduler.done(1, 100)
+    assert list(scheduler.ready(100)) == [("hdd", 2)]
+
+    report = {row['device']: row for row in scheduler.report()}
+    assert report['sda']['files'] == 1
+    assert report['sda']['bytes'] == 100
+
+def test_hash_pass_respects_device_limit(temp_workspace, test_db, mocker):
+    """The pipeline never runs more readers on a device than its limit."""
+    from sortomatic.core.pipeline.manager import PipelineManager
+    for i in range(20):
+        (temp_workspace / f"f{i}.bin").write_bytes(b"x" * i)
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+
+    mocker.patch.object(devices, "readers_for", return_value=2)
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0}
+
+    def slow_hash(item):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        time.sleep(0.01)
+        with lock:
+            state['active'] -= 1
+        return {'id': item.id, 'full_hash': 'x'}
+
+    mocker.patch.object(manager, "_hash_pass", side_effect=slow_hash)
+    assert manager.run_hash() == 23
+    assert state['peak'] <= 2
+
+def test_run_all_respects_device_limit(temp_workspace, test_db, mocker):
+    """scan all reads through the same per-device limits as the hash pass."""
+    from sortomatic.core.pipeline.manager import PipelineManager
+    from sortomatic.core.pipeline.passes import content
+    for i in range(20):
+        (temp_workspace / f"f{i}.bin").write_bytes(b"x" * i)
+
+    mocker.patch.object(devices, "readers_for", return_value=2)
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0}
+    analyze = content.analyze
+
+    def slow_analyze(ctx):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        time.sleep(0.01)
+        with lock:
+            state['active'] -= 1
+        return analyze(ctx)
+
+    mocker.patch.object(content, "analyze", side_effect=slow_analyze)
+    assert PipelineManager().run_all(str(temp_workspace))['count'] == 23
+    assert 0 < state['peak'] <= 2
+
+def test_stage_does_not_wait_for_a_busy_device(mocker):
+    """Workers of a scheduled stage take the items of free devices while another device is busy."""
+    from sortomatic.core.pipeline.stages import Stage, StagedPipeline
+    kinds = {1: {'name': 'sda', 'kind': 'hdd'}, 2: {'name': 'nvme0n1', 'kind': 'nvme'}}
+    mocker.patch.object(devices, "describe_device", side_effect=lambda dev: dict(kinds[dev]))
+    mocker.patch.object(devices.settings, "hdd_readers", 1)
+    mocker.patch.object(devices.settings, "nvme_readers", 4)
+    release = threading.Event()
+
+    def read(item):
+        if item[0] == 1:
+            release.wait(5)
+        return item
+
+    items = [(1, i) for i in range(3)] + [(2, i) for i in range(10)] + [(None, 0)]
+    scheduler = DeviceScheduler()
+    pipeline = StagedPipeline(iter(items), [
+        Stage("content", read, workers=4, maxsize=20, scheduler=scheduler,
+              device=lambda item: None if item[0] is None else (item[0], 10)),
+    ])
+    results = pipeline.run()
+    first = [next(results) for _ in range(11)]
+    # Everything but the disk's items comes out while its first read is still running
+    assert sorted(first, key=str) == sorted(items[3:], key=str)
+    release.set()
+    assert sorted(results) == items[:3]
+    assert [row['files'] for row in scheduler.report()] == [10, 3]
@@ -0,0 +1,45 @@
+import random
+from sortomatic.core.estimate import TreeEstimator, estimate_tree
+
+def _uniform_tree(root, depth, fanout, files):
+    """Every directory has the same number of sub-directories and files."""
+    for i in range(files):
+        (root / f"f{i}.txt").write_text("x" * 10)
+    if depth:
+        for i in range(fanout):
+            sub = root / f"d{i}"
+            sub.mkdir()
+            _uniform_tree(sub, depth - 1, fanout, files)
+
+def test_single_probe_exact_on_uniform_tree(tmp_path):
+    """On a uniform tree every probe sees the same weighted total: the estimator has no variance."""
+    _uniform_tree(tmp_path, depth=3, fanout=4, files=2)
+    estimator = TreeEstimator(tmp_path, random.Random(1)).run(seconds=5, max_probes=3)
+
+    dirs = 1 + 4 + 16 + 64
+    assert not estimator.complete()
+    assert estimator.interval('dirs') == (dirs, dirs, dirs)
+    assert estimator.interval('files') == (2 * dirs, 2 * dirs, 2 * dirs)
+    assert estimator.interval('bytes')[0] == 20 * dirs
+
+def test_estimate_interval_on_skewed_tree(tmp_path):
+    """Uneven branches give a spread between probes, centred on the true count."""
+    for i in range(10):
+        (tmp_path / f"big{i}").mkdir()
+        for j in range(40):
+            (tmp_path / f"big{i}" / f"f{j}.txt").write_text("")
+    for i in range(50):
+        (tmp_path / f"small{i}").mkdir()
+        (tmp_path / f"small{i}" / "one.jpg").write_text("")
+    estimator = TreeEstimator(tmp_path, random.Random(3)).run(seconds=5, max_probes=40)
+
+    assert not estimator.complete()
+    value, low, high = estimator.interval('files')
+    assert low < value < high
+    # The 95% interval spans ~4 standard errors: the truth is well within two widths
+    assert abs(value - 450) <= 2 * (high - low)
+
+def test_small_tree_is_exact(temp_workspace):
+    result = estimate_tree(temp_workspace, seconds=1)
+    assert result['files'] == (3, 3, 3)
+    assert sum(row['files'] for row in result['categories'].values()) == 3
@@ -0,0 +1,52 @@
+import json
+import time
+from sortomatic.core.database import FileIndex, ScanRun
+from sortomatic.core.pipeline import history
+from sortomatic.core.pipeline.history import RunRecorder, recent_runs
+from sortomatic.core.pipeline.manager import PipelineManager
+
+def test_passes_are_recorded(temp_workspace, test_db):
+    """Every pass that did something leaves a ScanRun with its counts and throughput."""
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+    manager.run_hash()
+    manager.run_hash()  # Nothing left: not recorded
+
+    index, hashed = ScanRun.select().order_by(ScanRun.id)
+    assert (index.pass_name, index.root, index.state, index.files) == ("index", str(temp_workspace), "completed", 3)
+    assert index.bytes == sum(f.size_bytes for f in FileIndex.select())
+    assert (hashed.pass_name, hashed.files, hashed.errors) == ("hash", 3, 0)
+    assert sum(json.loads(hashed.samples)) == 3
+    assert hashed.files_per_second > 0
+    # Workers actually busy, not the concurrency ceiling
+    assert 0 < index.workers <= 3 and 0 < hashed.workers <= 3
+
+    manager.run_index(str(temp_workspace))
+    latest = recent_runs()[0]
+    assert latest['run'].pass_name == "index"
+    assert latest['change'] is not None
+
+def test_samples_stay_bounded(test_db, monkeypatch):
+    """Long runs merge neighbouring samples instead of growing the curve."""
+    monkeypatch.setattr(history, "MAX_SAMPLES", 8)
+    clock = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    run = RunRecorder("hash")
+    for second in range(40):
+        clock[0] = second + 0.5
+        run.add(10)
+    assert len(run.samples) <= 8
+    assert sum(run.samples) == 40
+    assert run.sample_seconds == 8.0
+
+def test_workers_is_the_peak_busy(test_db):
+    run = RunRecorder("hash")
+    run.worker_started()
+    run.worker_started()
+    run.worker_finished()
+    run.worker_started()
+    run.worker_finished()
+    run.worker_finished()
+    run.add(1)
+    run.save()
+    assert ScanRun.get().workers == 2
@@ -0,0 +1,52 @@
+import fnmatch
+import pytest
+from sortomatic.core.ignore import IgnoreMatcher, compile_ignore
+
+NAME_PATTERNS = [".git", "node_modules", "*.tmp", "~$*", "Thumbs.db", "*.sw[po]", "[!a-z]*.bak", "cache?"]
+
+@pytest.mark.parametrize("name", [
+    ".git", "node_modules", "a.tmp", ".tmp", "~$report.docx", "Thumbs.db", "x.swp", "x.swo",
+    "x.swx", "1.bak", "a.bak", "cache1", "cache", "cache12", "readme.md", "git",
+])
+def test_name_patterns_match_fnmatch(name):
+    """Literal names and combined globs agree with the fnmatch loop."""
+    matcher = IgnoreMatcher(NAME_PATTERNS)
+    expected = any(fnmatch.fnmatch(name, p) for p in NAME_PATTERNS)
+    assert matcher.match_name(name) is expected
+    assert matcher.match(name, f"/data/{name}") is expected
+
+def test_literals_go_to_set():
+    matcher = IgnoreMatcher(NAME_PATTERNS)
+    assert matcher.literals == {".git", "node_modules", "Thumbs.db"}
+
+def test_path_patterns():
+    """Patterns with a slash match the full path; relative ones at any depth."""
+    matcher = IgnoreMatcher(["**/cache/*.tmp", "build/out", "/mnt/nas/scratch/**"])
+
+    assert matcher.match("a.tmp", "/data/cache/a.tmp")
+    assert matcher.match("a.tmp", "/data/x/y/cache/a.tmp")
+    assert not matcher.match("a.tmp", "/data/cache/sub/a.tmp")
+    assert not matcher.match("a.tmp", "/data/mycache/a.tmp")
+    assert matcher.match("out", "/home/me/project/build/out")
+    assert not matcher.match("out", "/home/me/project/build/output")
+    assert matcher.match("f", "/mnt/nas/scratch/deep/f")
+    assert not matcher.match("f", "/other/mnt/nas/scratch/f")
+    # Name-only lookups never consult path patterns
+    assert not matcher.match_name("a.tmp")
+
+def test_compile_ignore_is_cached():
+    assert compile_ignore([".git", "*.tmp"]) is compile_ignore((".git", "*.tmp"))
+
+def test_walk_respects_path_patterns(temp_workspace, mocker):
+    """smart_walk skips entries matched by full-path patterns."""
+    from sortomatic.core.config import settings
+    from sortomatic.core.scanner import smart_walk
+    (temp_workspace / "documents" / "cache").mkdir()
+    (temp_workspace / "documents" / "cache" / "x.tmp").write_text("")
+    (temp_workspace / "documents" / "cache" / "keep.txt").write_text("")
+    mocker.patch.object(settings, "ignore_patterns", ["**/cache/*.tmp"])
+
+    names = {e.path.rsplit("/", 1)[-1] for e in smart_walk(temp_workspace)}
+
+    assert "keep.txt" in names
+    assert "x.tmp" not in names
@@ -0,0 +1,36 @@
+from datetime import datetime
+from sortomatic.core.config import settings
+from sortomatic.core.database import FileIndex
+from sortomatic.core.pipeline.manager import PipelineManager
+from sortomatic.core.pipeline.paging import paginate
+
+def _create(sizes):
+    for i, size in enumerate(sizes):
+        FileIndex.create(path=f"/p/{i}", filename=str(i), size_bytes=size, entry_type='file', modified_at=datetime.now())
+
+def test_pages_cover_every_row_once(test_db):
+    _create(range(25))
+    query = FileIndex.select().where(FileIndex.full_hash.is_null())
+    seen = []
+    for row in paginate(query, page_size=4):
+        seen.append(row.id)
+        # Writes between pages: processed rows leave the filter, nothing is skipped
+        FileIndex.update(full_hash='x').where(FileIndex.id == row.id).execute()
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen)) == 25
+
+def test_descending_keys_with_ties(test_db):
+    _create([5, 9, 9, 9, 1, 9, 5])
+    keys = (FileIndex.size_bytes, FileIndex.id)
+    rows = [(row.size_bytes, row.id) for row in paginate(FileIndex.select(), keys, descending=True, page_size=2)]
+    assert rows == sorted(rows, reverse=True)
+    assert len(rows) == 7
+
+def test_hash_pages_follow_reclaim_order(test_db):
+    _create([10, 300, 5000, 10, 300])
+    settings.db_page_rows = 1
+    try:
+        sizes = [row.size_bytes for row in PipelineManager()._hash_pages('reclaim')]
+    finally:
+        settings.db_page_rows = 2000
+    assert sizes == [300, 300, 10, 10, 5000]
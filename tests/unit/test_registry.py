@@ -0,0 +1,90 @@
+import sys
+import pytest
+from sortomatic.core.database import FileIndex
+from sortomatic.core.pipeline import registry
+from sortomatic.core.pipeline.manager import PipelineManager
+from sortomatic.core.pipeline.registry import Pass
+
+@pytest.fixture
+def fake_perceptual():
+    """Replaces the perceptual pass by one from a module only imported when the pass runs."""
+    module = type(sys)("fake_plugin")
+    module.calls = []
+    def fingerprint(ctx):
+        module.calls.append(ctx['path'])
+        ctx['perceptual_hash'] = f"size-{ctx['size_bytes']}"
+        return ctx
+    module.fingerprint = fingerprint
+    builtin = registry.passes()["perceptual"]
+    spec = registry.register(Pass("perceptual", inputs=('path', 'size_bytes'), outputs=('perceptual_hash',),
+                                  target="fake_plugin:fingerprint", categories=builtin.categories))
+    sys.modules["fake_plugin"] = module
+    yield module
+    del sys.modules["fake_plugin"]
+    registry.register(builtin)
+    assert spec._function is fingerprint
+
+def test_plan_orders_dependencies():
+    assert [p.name for p in registry.plan('full_hash')] == ["categorize", "hash"]
+    assert [p.name for p in registry.plan('perceptual_hash')] == ["categorize", "perceptual"]
+    assert registry.plan('size_bytes') == []
+    with pytest.raises(ValueError):
+        registry.plan('group_id')
+
+def test_plan_rejects_cycles():
+    registry.register(Pass("loop", inputs=('bundle_files',), outputs=('bundle_signature',), target="x:y"))
+    registry.register(Pass("loop_back", inputs=('bundle_signature',), outputs=('bundle_files',), target="x:y"))
+    try:
+        with pytest.raises(ValueError):
+            registry.plan('bundle_signature')
+    finally:
+        registry.passes().pop("loop")
+        registry.passes().pop("loop_back")
+
+def test_unknown_column_is_rejected():
+    with pytest.raises(ValueError):
+        Pass("bad", inputs=('path',), outputs=('nope',), target="x:y")
+
+def test_run_target_skips_current_passes(temp_workspace, test_db, fake_perceptual):
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+
+    assert manager.run_target('perceptual_hash')['counts'] == {"categorize": 3, "perceptual": 1}
+    assert fake_perceptual.calls == [str(temp_workspace / "images" / "photo.jpg")]
+
+    # Everything is current: no pass runs again
+    assert manager.run_target('perceptual_hash') == {'counts': {}, 'skipped': []}
+    assert FileIndex.get(FileIndex.filename == "photo.jpg").perceptual_hash == "size-16"
+
+def test_undecodable_images_are_not_pending(temp_workspace, test_db, monkeypatch):
+    """An image PIL cannot open is marked, not left NULL and retried on every run."""
+    from types import SimpleNamespace
+    from sortomatic.core.pipeline.passes import hashing
+
+    def broken(path):
+        raise OSError("cannot identify image file")
+    monkeypatch.setitem(hashing._installed, 'imagehash', True)
+    monkeypatch.setitem(hashing._installed, 'PIL', True)
+    monkeypatch.setitem(hashing._modules, 'PIL.Image', SimpleNamespace(open=broken))
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+
+    assert manager.run_target('perceptual_hash')['counts'] == {"categorize": 3, "perceptual": 1}
+    assert FileIndex.get(FileIndex.filename == "photo.jpg").perceptual_hash == hashing.UNDECODABLE
+    assert not FileIndex.select().where(registry.passes()["perceptual"].pending()).exists()
+    assert manager.run_target('perceptual_hash') == {'counts': {}, 'skipped': []}
+
+def test_run_target_reports_missing_libraries(temp_workspace, test_db, monkeypatch):
+    """A pass whose libraries are missing is reported, and scan target fails."""
+    from typer.testing import CliRunner
+    from sortomatic.cli import app
+    monkeypatch.setattr(Pass, "available", lambda spec: spec.name != "perceptual")
+    manager = PipelineManager()
+    manager.run_index(str(temp_workspace))
+
+    result = manager.run_target('perceptual_hash')
+    assert result == {'counts': {"categorize": 3}, 'skipped': ["perceptual"]}
+
+    monkeypatch.chdir(temp_workspace)
+    outcome = CliRunner().invoke(app, ["scan", "target", "perceptual_hash"])
+    assert outcome.exit_code == 1 and isinstance(outcome.exception, SystemExit)
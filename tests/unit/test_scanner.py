@@ -0,0 +1,135 @@
+import os
+import pytest
+from sortomatic.core.scanner import smart_walk, parallel_walk
+from sortomatic.core.types import WalkEntry
+
+def test_smart_walk_carries_stat(temp_workspace):
+    """Every record carries the stat data of its file."""
+    entries = list(smart_walk(temp_workspace))
+
+    assert len(entries) == 3
+    for entry in entries:
+        assert isinstance(entry, WalkEntry)
+        assert entry.entry_type == 'file'
+        st = os.stat(entry.path)
+        assert entry.size_bytes == st.st_size
+        assert entry.mtime_ns == st.st_mtime_ns
+        assert entry.inode == st.st_ino
+        assert entry.device == st.st_dev
+
+def test_smart_walk_bundle_and_ignore(temp_workspace):
+    """Atomic folders are yielded once as bundles; ignored names are skipped."""
+    project = temp_workspace / "project"
+    (project / "src").mkdir(parents=True)
+    (project / "package.json").write_text("{}")
+    (project / "src" / "main.js").write_text("")
+    (temp_workspace / "__pycache__").mkdir()
+    (temp_workspace / "__pycache__" / "mod.pyc").write_text("")
+    (temp_workspace / ".DS_Store").write_text("")
+
+    entries = {e.path: e for e in smart_walk(temp_workspace)}
+
+    assert entries[str(project)].entry_type == 'bundle'
+    assert not any(p.startswith(str(project) + os.sep) for p in entries)
+    assert not any("__pycache__" in p or p.endswith(".DS_Store") for p in entries)
+    assert len(entries) == 4
+
+def test_smart_walk_skips_special_files(temp_workspace):
+    """Broken symlinks and symlinked directories are not indexed."""
+    (temp_workspace / "dangling").symlink_to(temp_workspace / "missing")
+    (temp_workspace / "docs_link").symlink_to(temp_workspace / "documents")
+    (temp_workspace / "text_link").symlink_to(temp_workspace / "test.txt")
+
+    paths = {os.path.basename(e.path) for e in smart_walk(temp_workspace)}
+
+    assert "dangling" not in paths
+    assert "text_link" in paths
+    # report.pdf is reached once, through the real directory only
+    assert sum(1 for e in smart_walk(temp_workspace) if e.path.endswith("report.pdf")) == 1
+
+def test_index_pass_no_syscalls(mocker):
+    """_index_pass builds the context from the walk record alone."""
+    from sortomatic.core.pipeline.manager import PipelineManager
+    entry = WalkEntry("/nowhere/file.bin", 'file', 42, 1_700_000_000_000_000_000, 7, 1)
+    spy = mocker.patch("os.stat", side_effect=AssertionError("stat called"))
+
+    ctx = PipelineManager()._index_pass(entry)
+
+    assert spy.call_count == 0
+    assert ctx['size_bytes'] == 42
+    assert ctx['filename'] == "file.bin"
+    assert ctx['modified_at'].year == 2023
+
+def test_parallel_walk_matches_sequential(temp_workspace):
+    """The parallel walker yields the same records, bundle and ignore rules included."""
+    for i in range(5):
+        sub = temp_workspace / f"dir{i}" / "nested"
+        sub.mkdir(parents=True)
+        (sub / f"f{i}.txt").write_text("x" * i)
+    (temp_workspace / "dir0" / "Makefile").write_text("")
+    (temp_workspace / "dir1" / "node_modules").mkdir()
+    (temp_workspace / "dir1" / "node_modules" / "lib.js").write_text("")
+
+    expected = set(smart_walk(temp_workspace))
+    assert set(parallel_walk(temp_workspace, workers=4)) == expected
+    assert set(parallel_walk(temp_workspace, workers=1)) == expected
+
+def test_parallel_walk_early_close(temp_workspace):
+    """Closing the generator early stops the worker threads."""
+    import threading
+    for i in range(50):
+        (temp_workspace / f"d{i}").mkdir()
+        (temp_workspace / f"d{i}" / "f.txt").write_text("")
+
+    walker = parallel_walk(temp_workspace, workers=3, max_buffered=1)
+    next(walker)
+    walker.close()
+
+    for t in threading.enumerate():
+        if t.name.startswith("sortomatic_walker"):
+            t.join(timeout=2)
+    assert not any(t.name.startswith("sortomatic_walker") for t in threading.enumerate())
+
+def test_parallel_walk_bounds_the_frontier(tmp_path, monkeypatch):
+    """A wide tree never queues more than max_pending directories, and every file still comes out."""
+    from sortomatic.core import scanner
+    for i in range(40):
+        for j in range(5):
+            (tmp_path / f"d{i}" / f"s{j}").mkdir(parents=True)
+            (tmp_path / f"d{i}" / f"s{j}" / "f.txt").write_text("")
+
+    peak = []
+    share = scanner._WorkStealingFrontier._share
+    def spy(frontier, worker_id, paths):
+        kept = share(frontier, worker_id, paths)
+        peak.append(frontier._queued)
+        return kept
+    monkeypatch.setattr(scanner._WorkStealingFrontier, "_share", spy)
+
+    assert set(parallel_walk(tmp_path, workers=3, max_pending=4)) == set(smart_walk(tmp_path))
+    assert max(peak) <= 4
+
+def test_parallel_walk_raises_worker_errors(temp_workspace, monkeypatch):
+    """A walker thread that dies fails the walk instead of silently dropping its subtrees."""
+    from sortomatic.core import scanner
+    original = scanner.scan_directory
+    def flaky(dirpath, *args):
+        if dirpath.endswith("images"):
+            raise RuntimeError("boom")
+        return original(dirpath, *args)
+    monkeypatch.setattr(scanner, "scan_directory", flaky)
+
+    with pytest.raises(RuntimeError):
+        list(parallel_walk(temp_workspace, workers=2))
+
+def test_modified_at_matches_st_mtime(tmp_path):
+    """modified_at rounds like datetime.fromtimestamp(st_mtime), which rows indexed earlier hold."""
+    from datetime import datetime
+    path = tmp_path / "f.txt"
+    path.write_text("")
+    # mtime_ns / 1e9 rounds this one a microsecond away from st_mtime
+    os.utime(path, ns=(1_884_472_535_618_734_469, 1_884_472_535_618_734_469))
+    st = os.stat(path)
+
+    entry = WalkEntry(str(path), 'file', st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
+    assert entry.modified_at == datetime.fromtimestamp(st.st_mtime)
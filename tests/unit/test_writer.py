@@ -0,0 +1,74 @@
+import threading
+import pytest
+from peewee import SqliteDatabase
+from sortomatic.core.database import db, FileIndex, MODELS
+from sortomatic.core.pipeline.writer import DatabaseWriter
+
+@pytest.fixture
+def file_db(tmp_path):
+    """A database file, so the writer runs on its own thread and connection."""
+    db.close()
+    db.initialize(SqliteDatabase(str(tmp_path / "writer.db"), pragmas={'journal_mode': 'wal'}))
+    db.connect()
+    db.create_tables(MODELS)
+    yield db
+
+def _rows(start, count):
+    return [{'path': f"/r/{i}", 'filename': str(i), 'extension': '', 'size_bytes': i,
+             'modified_at': 0.0, 'entry_type': 'file'} for i in range(start, start + count)]
+
+def _insert(rows):
+    FileIndex.insert_many(rows).execute()
+
+def test_writes_are_coalesced(file_db):
+    writer = DatabaseWriter()
+    writer.max_delay = 1.0
+    for start in range(0, 100, 10):
+        writer.write(_insert, _rows(start, 10))
+    writer.close()
+    assert FileIndex.select().count() == 100
+    assert writer.stats()['rows'] == 100
+    # Ten writes queued within max_delay share transactions
+    assert writer.commits < 10
+
+def test_call_runs_after_earlier_writes(file_db):
+    writer = DatabaseWriter()
+    seen = []
+    writer.write(_insert, _rows(0, 5))
+    writer.call(lambda: seen.append((threading.current_thread().name, FileIndex.select().count())))
+    writer.close()
+    assert seen == [("sortomatic_writer", 5)]
+
+def test_backpressure_blocks_producer(file_db):
+    writer = DatabaseWriter()
+    writer.max_pending = 10
+    gate = threading.Event()
+    writer.call(gate.wait)
+    writer.write(_insert, _rows(0, 10))
+
+    # The writer is stuck on the gate with 10 rows queued: the next write waits
+    producer = threading.Thread(target=writer.write, args=(_insert, _rows(10, 5)))
+    producer.start()
+    producer.join(0.3)
+    assert producer.is_alive()
+
+    gate.set()
+    producer.join(5)
+    assert not producer.is_alive()
+    writer.close()
+    assert FileIndex.select().count() == 15
+    assert writer.stats()['blocked_seconds'] > 0
+
+def test_failed_write_is_raised(file_db):
+    writer = DatabaseWriter()
+    writer.write(_insert, _rows(0, 3))
+    writer.write(_insert, _rows(0, 3))  # Same paths: unique constraint
+    with pytest.raises(Exception):
+        writer.close()
+
+def test_in_memory_database_writes_inline():
+    writer = DatabaseWriter()
+    assert writer.inline
+    writer.write(_insert, _rows(0, 3))
+    assert FileIndex.select().count() == 3
+    writer.close()